@@ -0,0 +1,4 @@
+"""
+Hitronet EMS - benchmarki i provjere performansi
+Pokretanje iz backend direktorija, npr. `python -m benchmarks.engine_profile`
+"""
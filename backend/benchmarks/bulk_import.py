@@ -0,0 +1,146 @@
+"""
+Benchmark offline uvoza (bulk_import.py) nad sintetičkim podacima.
+
+Sintetičku bazu (benchmarks.dataset) izvozi u datoteke kakve bi dao stari
+sustav: korisnici i veze kao CSV, lokacije i oprema kao JSONL, s izvornim
+id-evima i stranim ključevima. Mali udio zapisa namjerno se pokvari
+(neispravan tip, nepoznat strani ključ, dupli serijski broj). Zatim
+bulk_import.py u zasebnom procesu puni praznu bazu i ispisuje redaka/s po
+tablici; na kraju se provjerava da je uvezeno + odbijeno jednako broju zapisa
+i da se broj redaka u bazi slaže.
+
+    python -m benchmarks.bulk_import --scale 0.2 --workers 3
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.dataset import generate
+
+CSV_TABLES = {"korisnici", "veze"}
+UNIQUE = {"korisnici": "oib", "oprema": "serijski_broj"}
+FOREIGN_KEY = {"lokacije": "korisnik_id", "veze": "lokacija_a_id", "oprema": "lokacija_id"}
+COLUMNS = {
+    "korisnici": ("id", "oib", "naziv", "adresa", "tip_korisnika", "paket_usluga", "status",
+                  "kontakt_admin", "kontakt_tehnika"),
+    "lokacije": ("id", "naziv", "tip", "adresa", "latitude", "longitude", "status", "korisnik_id"),
+    "veze": ("id", "lokacija_a_id", "lokacija_b_id", "tip", "kapacitet_vlakana", "kapacitet_parica",
+             "brzina_mbps", "status", "redundantna_veza_id"),
+    "oprema": ("id", "lokacija_id", "tip", "proizvodjac", "model", "serijski_broj", "inventurni_broj",
+               "status", "datum_instalacije"),
+}
+
+
+def spoil(rnd: random.Random, table: str, row: dict, previous: dict):
+    """Kvari zapis na jedan od načina koje uvoz mora odbiti; None ako nema kako."""
+    kinds = []
+    if table != "korisnici":
+        # CSV ne može izraziti None za obavezno polje, pa korisnici nemaju neispravan zapis
+        kinds += ["invalid", "foreign_key"]
+    if table in UNIQUE and previous:
+        kinds.append("duplicate")
+    if not kinds:
+        return None
+    kind = rnd.choice(kinds)
+    if kind == "foreign_key":
+        return {**row, FOREIGN_KEY[table]: "nepostojeci"}
+    if kind == "duplicate":
+        return {**row, UNIQUE[table]: previous[UNIQUE[table]]}
+    return {**row, "brzina_mbps": "brzo"} if table == "veze" else {**row, "status": None}
+
+
+def export(source: str, directory: str, bad_fraction: float, seed: int) -> dict:
+    """Izvozi tablice u datoteke; vraća {tablica: (putanja, broj zapisa, pokvareno)}."""
+    rnd = random.Random(seed)
+    connection = sqlite3.connect(source)
+    connection.row_factory = sqlite3.Row
+    files = {}
+    for table, columns in COLUMNS.items():
+        path = os.path.join(directory, f"{table}.{'csv' if table in CSV_TABLES else 'jsonl'}")
+        count = spoiled = 0
+        previous = None
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle) if table in CSV_TABLES else None
+            if writer:
+                writer.writerow(columns)
+            for row in connection.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id"):
+                row = dict(row)
+                spoiled_row = spoil(rnd, table, row, previous) if rnd.random() < bad_fraction else None
+                if spoiled_row is not None:
+                    row = spoiled_row
+                    spoiled += 1
+                else:
+                    previous = row
+                if writer:
+                    writer.writerow(["" if row[name] is None else row[name] for name in columns])
+                else:
+                    handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+                count += 1
+        files[table] = (path, count, spoiled)
+    connection.close()
+    return files
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bad", type=float, default=0.001, help="udio pokvarenih zapisa")
+    parser.add_argument("--workers", type=int, help="procesi za validaciju (zadano kao bulk_import.py)")
+    parser.add_argument("--keep-indexes", action="store_true")
+    parser.add_argument("--json", action="store_true", help="ispiši rezultat kao JSON")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="hitronet-import-")
+    source = os.path.join(directory, "izvor.db")
+    generate(source, args.scale, args.seed)
+    files = export(source, directory, args.bad, args.seed)
+
+    target = os.path.join(directory, "uvoz.db")
+    command = [sys.executable, "bulk_import.py", "--json", "--rejected", os.path.join(directory, "odbijeni.jsonl")]
+    command += [option for table, (path, _, _) in files.items() for option in (f"--{table}", path)]
+    if args.workers is not None:
+        command += ["--workers", str(args.workers)]
+    if args.keep_indexes:
+        command.append("--keep-indexes")
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(command, cwd=backend, check=True, capture_output=True, text=True,
+                            env={**os.environ, "HITRONET_DB_URL": f"sqlite:///{target}"}).stdout
+    result = json.loads(output)
+
+    connection = sqlite3.connect(target)
+    failures = []
+    for item in result["files"]:
+        table = item["entity"]
+        _, count, spoiled = files[table]
+        rows = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        item.update(records=count, spoiled=spoiled, rows_in_db=rows)
+        if item["imported"] + item["rejected"] != count or rows != item["imported"] or item["rejected"] < spoiled:
+            failures.append(table)
+    connection.close()
+    result["failures"] = failures
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        total = sum(item["imported"] for item in result["files"])
+        seconds = sum(item["seconds"] for item in result["files"])
+        for item in result["files"]:
+            print(f"{item['entity']:10} {item['imported']:>9,} uvezeno {item['rejected']:>6,} odbijeno "
+                  f"(pokvareno {item['spoiled']:,}) {item['seconds']:>7} s {item['rows_per_s']:>9,} redaka/s")
+        print(f"ukupno {total:,} redaka za {seconds:.1f} s ({total / seconds:,.0f} redaka/s), "
+              f"indeksi i izvedeni podatci {result.get('rebuild_seconds', 0)} s")
+        if failures:
+            print("broj redaka se ne slaže za: " + ", ".join(failures))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,47 @@
+"""
+Sve provjere ispravnosti odjednom, na malim skupovima podataka.
+
+Svaka provjera se pokreće u vlastitom procesu (main.py pri importu otvara bazu
+iz HITRONET_DB_URL, a svaka provjera ima svoju privremenu bazu). Izlazi s
+kodom 1 ako bilo koja provjera padne; to pokreće i CI (.github/workflows).
+
+    python -m benchmarks.checks
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+# (modul, argumenti); skale su male da cijeli skup traje oko minute
+CHECKS = (
+    ("benchmarks.query_plans", ["--scale", "0.05"]),
+    ("benchmarks.expand_queries", []),
+    ("benchmarks.geo_queries", []),
+    ("benchmarks.topology_checks", []),
+    ("benchmarks.reports", ["--scale", "0.05", "--repeat", "1"]),
+)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("only", nargs="*", help="samo ove provjere (npr. query_plans)")
+    args = parser.parse_args()
+
+    failed = []
+    for module, arguments in CHECKS:
+        if args.only and module.rsplit(".", 1)[1] not in args.only:
+            continue
+        print(f"== {module}", flush=True)
+        start = time.perf_counter()
+        code = subprocess.call([sys.executable, "-m", module, *arguments])
+        print(f"== {module}: {'ok' if code == 0 else f'PALO (kod {code})'}, {time.perf_counter() - start:.1f} s\n",
+              flush=True)
+        if code != 0:
+            failed.append(module)
+    print(f"{len(failed)} provjera palo" + (f": {', '.join(failed)}" if failed else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,236 @@
+"""
+Deterministički generator sintetičke mreže za benchmarke.
+
+Piše direktno u SQLite (executemany, bez ORM-a i HTTP-a). Tablice se kreiraju
+bez indeksa i triggera; indeksi, brojači, R*Tree, FTS i slijed promjena grade
+se jednom na kraju preko main.init_db, što je puno brže od održavanja po retku.
+Isti seed i skala uvijek daju istu bazu.
+
+Skala 1.0: 150k korisnika, 200k lokacija (1 % servisnih, 9 % pomoćnih),
+oko 230k veza i 1M opreme.
+
+    python -m benchmarks.dataset --out /tmp/hitronet-bench.db --scale 1.0
+"""
+
+from datetime import datetime, timedelta
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+# main.py pri importu otvara bazu; ne želimo dirati ./hitronet.db
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-bench-")
+os.environ.setdefault("HITRONET_DB_URL", f"sqlite:///{os.path.join(_tmpdir, 'import.db')}")
+# gradnja indeksa nad milijun redaka nije spori upit
+os.environ.setdefault("HITRONET_SLOW_QUERY_MS", "0")
+
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.schema import CreateTable
+
+import main
+
+BASE_COUNTS = {"korisnici": 150_000, "lokacije": 200_000, "oprema": 1_000_000}
+CHUNK_SIZE = 50_000
+EPOCH = datetime(2020, 1, 1)
+
+# (grad, lat, lon, udio lokacija)
+GRADOVI = [
+    ("Zagreb", 45.815, 15.982, 0.35), ("Split", 43.508, 16.440, 0.12), ("Rijeka", 45.327, 14.442, 0.10),
+    ("Osijek", 45.551, 18.694, 0.08), ("Zadar", 44.119, 15.231, 0.06), ("Pula", 44.866, 13.850, 0.05),
+    ("Slavonski Brod", 45.160, 18.016, 0.05), ("Karlovac", 45.487, 15.548, 0.05),
+    ("Varaždin", 46.304, 16.338, 0.05), ("Šibenik", 43.735, 15.889, 0.04), ("Dubrovnik", 42.650, 18.094, 0.05),
+]
+ULICE = ["Ilica", "Vukovarska", "Savska", "Radnička cesta", "Dubrava", "Frankopanska", "Zagrebačka",
+         "Ulica kralja Zvonimira", "Slavonska avenija", "Ulica Hrvatske bratske zajednice"]
+IMENA = ["Ivan", "Marija", "Luka", "Ana", "Marko", "Petra", "Josip", "Ivana", "Tomislav", "Katarina"]
+PREZIMENA = ["Horvat", "Kovačević", "Babić", "Marić", "Jurić", "Novak", "Kovačić", "Knežević", "Vuković", "Šarić"]
+PAKETI = ["Home 200", "Home 500", "Business 1000", "Business 2000"]
+# (tip, proizvodjac, model) po tipu lokacije
+MODELI_KORISNIK = [("ONT", "Huawei", "HG8245H"), ("ONT", "Nokia", "G-240W-A"), ("antena", "Ubiquiti", "airFiber 5XHD")]
+MODELI_MREZA = [("switch", "Cisco", "Catalyst 9300"), ("switch", "HP", "ProCurve 2910"),
+                ("switch", "Juniper", "EX4300"), ("router", "Cisco", "ASR-9010"), ("router", "MikroTik", "CCR1036")]
+
+
+def _timestamp(index: int, step_seconds: int = 60) -> str:
+    # isti format kao SQLAlchemy DateTime na SQLite-u, da sortiranje po created_at radi
+    return (EPOCH + timedelta(seconds=index * step_seconds)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def _insert(connection, table: str, columns, rows):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            connection.executemany(sql, chunk)
+            chunk = []
+    if chunk:
+        connection.executemany(sql, chunk)
+
+
+def gen_korisnici(rnd: random.Random, count: int):
+    for i in range(1, count + 1):
+        pravni = rnd.random() < 0.25
+        ime = f"{rnd.choice(PREZIMENA)} {'d.o.o.' if pravni else rnd.choice(IMENA)}"
+        grad = rnd.choices(GRADOVI, weights=[g[3] for g in GRADOVI])[0][0]
+        yield (
+            f"{i * 7919 % 10**11:011d}", ime, f"{rnd.choice(ULICE)} {rnd.randint(1, 200)}, {grad}",
+            "pravni" if pravni else "fizicki", rnd.choice(PAKETI[2:] if pravni else PAKETI[:2]),
+            "aktivan" if rnd.random() < 0.92 else "neaktivan",
+            f"admin{i}@example.hr", f"09{rnd.randint(1, 9)}-{rnd.randint(100, 999)}-{rnd.randint(1000, 9999)}",
+            _timestamp(i, 300), _timestamp(i, 300),
+        )
+
+
+def plan_lokacije(rnd: random.Random, count: int, korisnici: int):
+    """Tip i grad svake lokacije; servisne su raspoređene po svim gradovima."""
+    servisne = max(len(GRADOVI), count // 100)
+    pomocne = max(len(GRADOVI), count * 9 // 100)
+    weights = [g[3] for g in GRADOVI]
+    plan = []
+    for i in range(count):
+        if i < servisne:
+            tip, grad = "servisna", i % len(GRADOVI)
+        elif i < servisne + pomocne:
+            tip, grad = "pomocna", (i - servisne) % len(GRADOVI) if i - servisne < len(GRADOVI) else \
+                rnd.choices(range(len(GRADOVI)), weights=weights)[0]
+        else:
+            tip, grad = "korisnik", rnd.choices(range(len(GRADOVI)), weights=weights)[0]
+        plan.append((tip, grad))
+    return plan
+
+
+def gen_lokacije(rnd: random.Random, plan, korisnici: int):
+    for i, (tip, grad) in enumerate(plan, start=1):
+        naziv_grada, lat, lon, _ = GRADOVI[grad]
+        spread = 0.02 if tip == "servisna" else 0.06
+        status = rnd.choices(("aktivna", "planirana", "neaktivna"), weights=(90, 7, 3))[0]
+        korisnik_id = (i % korisnici) + 1 if tip == "korisnik" and korisnici else None
+        naziv = {"servisna": "DC", "pomocna": "Čvor", "korisnik": "Lokacija"}[tip]
+        yield (
+            f"{naziv} {naziv_grada} {i}", tip, f"{rnd.choice(ULICE)} {rnd.randint(1, 200)}, {naziv_grada}",
+            round(lat + rnd.gauss(0, spread), 6), round(lon + rnd.gauss(0, spread), 6),
+            status, korisnik_id, _timestamp(i, 240),
+        )
+
+
+def gen_veze(rnd: random.Random, plan):
+    """Hijerarhijska mreža: prsten servisnih lokacija s tetivama, pomoćni čvorovi
+    na dvije servisne lokacije svog grada (druga je rezerva), korisničke
+    lokacije na pomoćni čvor svog grada, 5 % s rezervnom bežičnom vezom."""
+    by_type = {"servisna": {}, "pomocna": {}}
+    for lokacija_id, (tip, grad) in enumerate(plan, start=1):
+        if tip in by_type:
+            by_type[tip].setdefault(grad, []).append(lokacija_id)
+    servisne = [lokacija_id for ids in by_type["servisna"].values() for lokacija_id in ids]
+    next_id = 1
+
+    def veza(a, b, tip, brzina, redundantna=None):
+        nonlocal next_id
+        status = rnd.choices(("aktivan", "planiran", "u_kvaru"), weights=(93, 5, 2))[0]
+        vlakna = rnd.choice((12, 24, 48, 96)) if tip == "optika" else None
+        parice = rnd.choice((10, 25, 50)) if tip == "bakar" else None
+        row = (a, b, tip, vlakna, parice, brzina, status, redundantna, _timestamp(next_id, 200))
+        next_id += 1
+        return next_id - 1, row
+
+    for i, a in enumerate(servisne):
+        yield veza(a, servisne[(i + 1) % len(servisne)], "optika", 100_000)[1]
+        for _ in range(2):
+            yield veza(a, rnd.choice(servisne), "optika", 100_000)[1]
+    for grad, pomocne in by_type["pomocna"].items():
+        jezgra = by_type["servisna"].get(grad) or servisne
+        for lokacija_id in pomocne:
+            primarna, row = veza(lokacija_id, rnd.choice(jezgra), "optika", 10_000)
+            yield row
+            yield veza(lokacija_id, rnd.choice(jezgra), "optika", 10_000, primarna)[1]
+    for lokacija_id, (tip, grad) in enumerate(plan, start=1):
+        if tip != "korisnik":
+            continue
+        cvorovi = by_type["pomocna"].get(grad) or by_type["pomocna"][0]
+        tip_veze = rnd.choices(("optika", "bakar", "wireless"), weights=(70, 20, 10))[0]
+        primarna, row = veza(lokacija_id, rnd.choice(cvorovi), tip_veze, {"optika": 1000, "bakar": 100, "wireless": 300}[tip_veze])
+        yield row
+        if rnd.random() < 0.05:
+            yield veza(lokacija_id, rnd.choice(cvorovi), "wireless", 300, primarna)[1]
+
+
+def gen_oprema(rnd: random.Random, count: int, plan):
+    for i in range(1, count + 1):
+        lokacija_id = rnd.randint(1, len(plan))
+        tip, proizvodjac, model = rnd.choice(MODELI_KORISNIK if plan[lokacija_id - 1][0] == "korisnik" else MODELI_MREZA)
+        status = rnd.choices(("u_upotrebi", "rezerva", "otpisana"), weights=(85, 10, 5))[0]
+        yield (
+            lokacija_id, tip, proizvodjac, model, f"{proizvodjac[:2].upper()}{i:09d}", f"INV-{i:07d}", status,
+            _timestamp(rnd.randint(0, 2_000_000), 60), _timestamp(i, 30),
+        )
+
+
+def generate(path: str, scale: float = 1.0, seed: int = 42, counts: dict = None) -> dict:
+    """Generira bazu na `path` (postojeća se briše) i vraća broj redaka po tablici."""
+    counts = {table: max(1, int(n * scale)) for table, n in BASE_COUNTS.items()} | (counts or {})
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rnd = random.Random(seed)
+    timings = {}
+
+    started = time.perf_counter()
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    for table in main.Base.metadata.sorted_tables:
+        connection.execute(str(CreateTable(table).compile(dialect=sqlite_dialect.dialect())))
+
+    _insert(connection, "korisnici", ("oib", "naziv", "adresa", "tip_korisnika", "paket_usluga", "status",
+                                      "kontakt_admin", "kontakt_tehnika", "datum_ugovora", "created_at"),
+            gen_korisnici(rnd, counts["korisnici"]))
+    plan = plan_lokacije(rnd, counts["lokacije"], counts["korisnici"])
+    _insert(connection, "lokacije", ("naziv", "tip", "adresa", "latitude", "longitude", "status", "korisnik_id",
+                                     "created_at"),
+            gen_lokacije(rnd, plan, counts["korisnici"]))
+    _insert(connection, "veze", ("lokacija_a_id", "lokacija_b_id", "tip", "kapacitet_vlakana", "kapacitet_parica",
+                                 "brzina_mbps", "status", "redundantna_veza_id", "created_at"),
+            gen_veze(rnd, plan))
+    _insert(connection, "oprema", ("lokacija_id", "tip", "proizvodjac", "model", "serijski_broj", "inventurni_broj",
+                                   "status", "datum_instalacije", "created_at"),
+            gen_oprema(rnd, counts["oprema"], plan))
+    connection.commit()
+    counts["veze"] = connection.execute("SELECT COUNT(*) FROM veze").fetchone()[0]
+    connection.close()
+    timings["rows_s"] = round(time.perf_counter() - started, 2)
+
+    # indeksi, triggeri i izvedeni podatci (brojači, R*Tree, FTS, seq) u jednom prolazu
+    started = time.perf_counter()
+    write_engine, read_engine = main.create_engines(f"sqlite:///{path}")
+    main.init_db(write_engine)
+    write_engine.dispose()
+    read_engine.dispose()
+    timings["indexes_s"] = round(time.perf_counter() - started, 2)
+    return {"path": path, "scale": scale, "seed": seed, "counts": counts, "timings": timings}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=os.path.join(tempfile.gettempdir(), "hitronet-bench.db"))
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    for table in BASE_COUNTS:
+        parser.add_argument(f"--{table}", type=int, help=f"broj redaka (zadano {BASE_COUNTS[table]:,} x skala)")
+    parser.add_argument("--json", action="store_true", help="ispiši rezultat kao JSON")
+    args = parser.parse_args()
+
+    overrides = {table: getattr(args, table) for table in BASE_COUNTS if getattr(args, table) is not None}
+    result = generate(args.out, args.scale, args.seed, overrides)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['path']}: " + ", ".join(f"{n:,} {table}" for table, n in result["counts"].items()))
+    print(f"retci {result['timings']['rows_s']} s, indeksi i izvedeni podatci {result['timings']['indexes_s']} s")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,126 @@
+"""
+Benchmark profila baze: miješano čitanje/pisanje iz više threadova.
+
+Uspoređuje "legacy" profil (rollback journal, jedan pool) s "production"
+profilom (WAL, read-only pool, jedan pisac) nad istim podatcima.
+
+    python -m benchmarks.engine_profile --threads 16 --seconds 10 --write-ratio 0.2
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+# main.py pri importu otvara bazu; ne želimo dirati ./hitronet.db
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-bench-")
+os.environ.setdefault("HITRONET_DB_URL", f"sqlite:///{os.path.join(_tmpdir, 'import.db')}")
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import main
+from main import Lokacija, Oprema
+
+
+def seed(session_factory, lokacije: int, oprema: int):
+    with session_factory() as db:
+        db.execute(main.sqlite_insert(Lokacija), [
+            {"naziv": f"Lokacija {i}", "tip": "korisnik", "adresa": f"Adresa {i}", "status": "aktivna"}
+            for i in range(lokacije)
+        ])
+        db.execute(main.sqlite_insert(Oprema), [
+            {"lokacija_id": i % lokacije + 1, "tip": "ONT", "proizvodjac": "Huawei", "model": "HG8245H",
+             "serijski_broj": f"SEED{i:09d}", "inventurni_broj": f"INV-{i}", "status": "u_upotrebi"}
+            for i in range(oprema)
+        ])
+        db.commit()
+
+
+def run_profile(profile: str, args) -> dict:
+    url = f"sqlite:///{os.path.join(_tmpdir, profile + '.db')}"
+    write_engine, read_engine = main.create_engines(url, profile)
+    main.init_db(write_engine)
+    WriteSession = sessionmaker(bind=write_engine, autoflush=False)
+    ReadSession = sessionmaker(bind=read_engine, autoflush=False)
+    seed(WriteSession, args.lokacije, args.oprema)
+
+    stats = {"reads": 0, "writes": 0, "errors": 0, "latencies": []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+    counter = itertools.count()
+
+    def worker(seed_value):
+        rnd = random.Random(seed_value)
+        reads = writes = errors = 0
+        latencies = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if rnd.random() < args.write_ratio:
+                    with WriteSession() as db:
+                        db.add(Oprema(lokacija_id=rnd.randint(1, args.lokacije), tip="ONT", proizvodjac="Nokia",
+                                      model="G-240W-A", serijski_broj=f"{profile}-{next(counter)}",
+                                      inventurni_broj="INV", status="u_upotrebi"))
+                        db.commit()
+                    writes += 1
+                else:
+                    with ReadSession() as db:
+                        after = rnd.randint(0, args.oprema)
+                        db.query(Oprema).filter(Oprema.id > after).order_by(Oprema.id).limit(100).all()
+                    reads += 1
+            except OperationalError:
+                # "database is locked" nakon isteka busy timeouta
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        with lock:
+            stats["reads"] += reads
+            stats["writes"] += writes
+            stats["errors"] += errors
+            stats["latencies"].extend(latencies)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    latencies = sorted(stats.pop("latencies")) or [0.0]
+    total = stats["reads"] + stats["writes"]
+    return {
+        "profile": profile,
+        **stats,
+        "ops_per_s": round(total / args.seconds, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--lokacije", type=int, default=1000)
+    parser.add_argument("--oprema", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="ispis rezultata kao JSON")
+    args = parser.parse_args()
+
+    results = [run_profile(profile, args) for profile in ("legacy", "production")]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'profil':<12}{'ops/s':>10}{'čitanja':>10}{'pisanja':>10}{'greške':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in results:
+        print(f"{r['profile']:<12}{r['ops_per_s']:>10}{r['reads']:>10}{r['writes']:>10}"
+              f"{r['errors']:>8}{r['p50_ms']:>9}{r['p99_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main_cli()
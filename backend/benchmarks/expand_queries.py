@@ -0,0 +1,82 @@
+"""
+Provjera da `?expand=` nema N+1 upita.
+
+Za svaku veličinu (broj lokacija po korisniku, 3 komada opreme po lokaciji)
+šalje iste expand zahtjeve i čita broj SQL naredbi iz Server-Timing headera.
+Broj mora biti isti za 1 i za 200 djece; inače izlazi s kodom 1.
+
+    python -m benchmarks.expand_queries
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+# main.py pri importu otvara bazu; ne želimo dirati ./hitronet.db
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-expand-")
+os.environ.setdefault("HITRONET_DB_URL", f"sqlite:///{os.path.join(_tmpdir, 'expand.db')}")
+
+from fastapi.testclient import TestClient
+
+import main
+from main import Korisnik, Lokacija, Oprema, Veza
+
+OPREMA_PER_LOKACIJA = 3
+CASES = (
+    "/korisnici/{korisnik}?expand=lokacije.oprema",
+    "/korisnici?ids={korisnik}&expand=lokacije.oprema",
+    "/lokacije?korisnik_id={korisnik}&limit=1000&expand=korisnik,oprema",
+    "/veze?lokacija_a_id={hub}&limit=1000&expand=lokacija_a,lokacija_b",
+    "/oprema?ids={oprema}&expand=lokacija.korisnik",
+)
+
+
+def seed(size: int) -> dict:
+    """Korisnik sa `size` lokacija, opremom na svakoj i vezama od prve lokacije prema ostalima."""
+    with main.SessionLocal() as db:
+        korisnik = Korisnik(oib=f"E{size:010d}", naziv=f"Expand {size}", adresa="Ilica 1, Zagreb",
+                            tip_korisnika="pravni", paket_usluga="Business 1000", status="aktivan")
+        lokacije = [Lokacija(naziv=f"Expand {size}/{i}", tip="korisnik", adresa=f"Ilica {i}, Zagreb",
+                             latitude=45.8, longitude=15.9, status="aktivna", korisnik=korisnik)
+                    for i in range(size)]
+        oprema = [Oprema(lokacija=lokacija, tip="ONT", proizvodjac="Huawei", model="HG8245H",
+                         serijski_broj=f"EX{size}-{i}-{j}", inventurni_broj=f"INV-E{size}-{i}-{j}", status="u_upotrebi")
+                  for i, lokacija in enumerate(lokacije) for j in range(OPREMA_PER_LOKACIJA)]
+        veze = [Veza(lokacija_a=lokacije[0], lokacija_b=lokacija, tip="optika", brzina_mbps=1000, status="aktivan")
+                for lokacija in lokacije]
+        db.add_all([korisnik, *lokacije, *oprema, *veze])
+        db.commit()
+        return {"korisnik": korisnik.id, "hub": lokacije[0].id, "oprema": ",".join(str(o.id) for o in oprema)}
+
+
+def query_count(client: TestClient, url: str) -> int:
+    response = client.get(url)
+    response.raise_for_status()
+    return int(re.search(r'desc="(\d+) queries"', response.headers["server-timing"]).group(1))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,200", help="broj lokacija po korisniku, odvojeno zarezom")
+    args = parser.parse_args()
+
+    # cache bi vratio odgovor bez ijednog upita
+    main.response_cache.max_entries = 0
+    sizes = [int(size) for size in args.sizes.split(",")]
+    datasets = {size: seed(size) for size in sizes}
+    failures = 0
+    with TestClient(main.app) as client:
+        for case in CASES:
+            counts = {size: query_count(client, case.format(**datasets[size])) for size in sizes}
+            ok = len(set(counts.values())) == 1
+            failures += not ok
+            print(f"{'ok  ' if ok else 'N+1 '} {case.split('?')[0]:22} {case.split('?')[1][:48]:48} "
+                  + "  ".join(f"{size} djece: {count}" for size, count in counts.items()))
+    print(f"{failures} ruta s brojem upita koji raste s brojem djece")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
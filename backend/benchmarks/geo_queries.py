@@ -0,0 +1,93 @@
+"""
+Provjera /lokacije/nearest i /lokacije/radius protiv brute force haversinea.
+
+Lokacije se postavljaju na rub kruga (sjever, jug, istok, zapad, malo
+unutar radijusa) na više geografskih širina, plus slučajne točke; R*Tree
+pravokutnik ne smije izbaciti nijednu koja je unutar radijusa. Izlazi s
+kodom 1 ako se rezultat razlikuje.
+
+    python -m benchmarks.geo_queries
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+
+# main.py pri importu otvara bazu; ne želimo dirati ./hitronet.db
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-geo-")
+os.environ.setdefault("HITRONET_DB_URL", f"sqlite:///{os.path.join(_tmpdir, 'geo.db')}")
+
+from fastapi.testclient import TestClient
+
+import main
+from main import EARTH_RADIUS_KM, Lokacija, haversine_km
+
+LATITUDES = (0.0, 45.0, 60.0, 75.0, 85.0, -45.0)
+RADII_KM = (0.5, 5.0, 50.0, 500.0)
+# koliko unutar radijusa stoje rubne točke
+EDGE_FRACTION = 0.9999
+ISOLATED_LON = 40.0
+
+
+def destination(lat: float, lon: float, bearing: float, km: float):
+    """Točka na udaljenosti `km` u smjeru `bearing` (stupnjevi) po istoj sferi kao haversine_km."""
+    angle = km / EARTH_RADIUS_KM
+    phi, lam, theta = math.radians(lat), math.radians(lon), math.radians(bearing)
+    phi2 = math.asin(math.sin(phi) * math.cos(angle) + math.cos(phi) * math.sin(angle) * math.cos(theta))
+    lam2 = lam + math.atan2(math.sin(theta) * math.sin(angle) * math.cos(phi),
+                            math.cos(angle) - math.sin(phi) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lam2) + 540.0) % 360.0 - 180.0
+
+
+def seed(rng: random.Random) -> list:
+    # daleko od ostalih točaka; druga najbliža je 1.11 km sjevernije, na rubu pravokutnika
+    points = [(45.00, ISOLATED_LON), (45.01, ISOLATED_LON), (45.02, ISOLATED_LON)]
+    for lat in LATITUDES:
+        for radius in RADII_KM:
+            # najveća dužina kruga nije u smjeru istoka, nego malo prema polu
+            for bearing in (0, 90, 180, 270, 60, 75, 105, 120, 240, 255, 285, 300):
+                points.append(destination(lat, 15.9, bearing, radius * EDGE_FRACTION))
+    points += [(rng.uniform(42.0, 47.0), rng.uniform(13.0, 19.0)) for _ in range(3000)]
+    with main.SessionLocal() as db:
+        db.add_all([Lokacija(naziv=f"Geo {i}", tip="korisnik", adresa="Ilica 1, Zagreb", latitude=lat,
+                             longitude=lon, status="aktivna") for i, (lat, lon) in enumerate(points)])
+        db.commit()
+    return points
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    points = seed(rng)
+
+    queries = [(lat, 15.9, radius) for lat in LATITUDES for radius in RADII_KM]
+    queries += [(rng.uniform(42.0, 47.0), rng.uniform(13.0, 19.0), rng.choice(RADII_KM)) for _ in range(50)]
+    failures = 0
+    with TestClient(main.app) as client:
+        response = client.get("/lokacije/nearest", params={"lat": 45.0, "lon": ISOLATED_LON, "k": 2}).json()
+        if len(response) != 2:
+            failures += 1
+            print(f"RAZLIKA nearest lat=45 lon={ISOLATED_LON} k=2: {len(response)} redaka")
+        for lat, lon, radius in queries:
+            expected = sum(haversine_km(lat, lon, p_lat, p_lon) <= radius for p_lat, p_lon in points)
+            got = client.get("/lokacije/radius", params={"lat": lat, "lon": lon, "radius_km": radius,
+                                                         "limit": len(points)}).json()
+            k = min(5, expected) or 1
+            distances = sorted(haversine_km(lat, lon, p_lat, p_lon) for p_lat, p_lon in points)[:k]
+            near = client.get("/lokacije/nearest", params={"lat": lat, "lon": lon, "k": k}).json()
+            near_ok = [round(d, 3) for d in distances] == [row["udaljenost_km"] for row in near]
+            if len(got) != expected or not near_ok:
+                failures += 1
+                print(f"RAZLIKA lat={lat:.4f} lon={lon:.4f} r={radius}: radius {len(got)}/{expected}, "
+                      f"nearest {'ok' if near_ok else 'razlika'}")
+    print(f"{len(queries) + 1} upita, {failures} razlika")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
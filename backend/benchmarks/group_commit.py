@@ -0,0 +1,125 @@
+"""
+Benchmark group commita: propusnost POST /oprema sa i bez zajedničke transakcije.
+
+Aplikacija se vrti u istom procesu (httpx ASGI transport). Za svaku razinu
+konkurentnosti N klijenata `--seconds` sekundi šalje POST zahtjeve, prvo sa
+samostalnim commitom po zahtjevu, zatim kroz GroupCommitter. S
+`--synchronous FULL` svaki commit radi fsync, što je najbliže disku bez
+write cachea; zadani NORMAL je ono što koristi production profil.
+
+    python -m benchmarks.group_commit --concurrency 1,8,32 --synchronous FULL
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import tempfile
+import time
+
+# main.py pri importu otvara bazu; ne želimo dirati ./hitronet.db
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-bench-")
+os.environ.setdefault("HITRONET_DB_URL", f"sqlite:///{os.path.join(_tmpdir, 'group_commit.db')}")
+
+import httpx
+from sqlalchemy import event
+
+import main
+from group_commit import GroupCommitter
+from main import Lokacija
+
+
+def seed(lokacije: int):
+    with main.SessionLocal() as db:
+        db.execute(main.sqlite_insert(Lokacija), [
+            {"naziv": f"Lokacija {i}", "tip": "korisnik", "adresa": f"Adresa {i}", "status": "aktivna"}
+            for i in range(lokacije)
+        ])
+        db.commit()
+
+
+def set_synchronous(mode: str):
+    # postojeće konekcije imaju pragme profila; nove dobivaju i ovu
+    main.engine.dispose()
+
+    @event.listens_for(main.engine, "connect")
+    def _synchronous(dbapi_connection, connection_record):
+        dbapi_connection.execute(f"PRAGMA synchronous = {mode}")
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, seconds: float, serial, lokacije: int) -> dict:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            n = next(serial)
+            body = {"lokacija_id": n % lokacije + 1, "tip": "ONT", "proizvodjac": "Huawei", "model": "HG8245H",
+                    "serijski_broj": f"GC{n:09d}", "inventurni_broj": f"INV-GC{n}", "status": "rezerva"}
+            started = time.perf_counter()
+            response = await client.post("/oprema", json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+    }
+
+
+async def run(args) -> dict:
+    serial = itertools.count()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for mode in ("single", "group"):
+            main.group_committer = None if mode == "single" else \
+                GroupCommitter(main.SessionLocal, args.window_ms / 1000, args.max_ops)
+            for concurrency in levels:
+                result = await run_level(client, concurrency, args.seconds, serial, args.lokacije)
+                if main.group_committer is not None:
+                    result["ops_per_commit"] = round(main.group_committer.operations / max(1, main.group_committer.batches), 1)
+                    main.group_committer.batches = main.group_committer.operations = 0
+                results.setdefault(mode, {})[concurrency] = result
+    main.group_committer = None
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="razine konkurentnosti, odvojene zarezom")
+    parser.add_argument("--seconds", type=float, default=5.0, help="trajanje po razini")
+    parser.add_argument("--window-ms", type=float, default=main.GROUP_COMMIT_WINDOW * 1000)
+    parser.add_argument("--max-ops", type=int, default=main.GROUP_COMMIT_MAX_OPS)
+    parser.add_argument("--synchronous", choices=("NORMAL", "FULL"), default="NORMAL")
+    parser.add_argument("--lokacije", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="ispiši rezultat kao JSON")
+    args = parser.parse_args()
+
+    seed(args.lokacije)
+    set_synchronous(args.synchronous)
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"POST /oprema, synchronous={args.synchronous}, prozor {args.window_ms} ms, najviše {args.max_ops} operacija")
+    for concurrency, single in results["single"].items():
+        group = results["group"][concurrency]
+        print(f"c={concurrency:<3} samostalno {single['throughput_rps']:>8} req/s p50 {single['p50_ms']:>8} ms | "
+              f"group {group['throughput_rps']:>8} req/s p50 {group['p50_ms']:>8} ms "
+              f"({group['ops_per_commit']} po commitu) | {group['throughput_rps'] / single['throughput_rps']:.2f}x"
+              f"{'  greške: ' + str(single['errors'] + group['errors']) if single['errors'] + group['errors'] else ''}")
+
+
+if __name__ == "__main__":
+    main_cli()
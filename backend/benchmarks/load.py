@@ -0,0 +1,273 @@
+"""
+Load i latency benchmark svih CRUD ruta i /stats.
+
+Aplikacija se vrti u istom procesu (httpx ASGI transport), bez mreže i
+uvicorna, nad sintetičkom bazom iz benchmarks.dataset. Za svaku razinu
+konkurentnosti i svaku rutu N workera šalje zahtjeve `--seconds` sekundi;
+bilježe se p50/p95/p99, propusnost i greške. Liste idu sa slučajnim
+filterima, sortom i cursorom, detalji na slučajne id-eve, a PUT i DELETE samo
+na retke koje je POST iz istog mjerenja napravio, pa se podatci skupa ne mijenjaju.
+
+    python -m benchmarks.dataset --out /tmp/hitronet-bench.db --scale 1.0
+    python -m benchmarks.load --db /tmp/hitronet-bench.db --concurrency 1,8,32 --out rezultat.json
+    python -m benchmarks.load --db /tmp/hitronet-bench.db --compare rezultat.json
+
+Bez --db generira se mali skup (--scale, zadano 0.05). Baza se kopira u
+privremeni direktorij osim s --in-place.
+"""
+
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ENTITIES = ("korisnici", "lokacije", "veze", "oprema")
+# vrijednosti filtera kakve generira benchmarks.dataset
+FILTERS = {
+    "korisnici": {"status": ("aktivan", "neaktivan"), "tip_korisnika": ("fizicki", "pravni")},
+    "lokacije": {"status": ("aktivna", "planirana", "neaktivna"), "tip": ("korisnik", "pomocna", "servisna")},
+    "veze": {"status": ("aktivan", "planiran", "u_kvaru"), "tip": ("optika", "bakar", "wireless")},
+    "oprema": {"status": ("u_upotrebi", "rezerva", "otpisana"), "tip": ("ONT", "switch", "router", "antena")},
+}
+SORTS = ("id", "-id", "created_at", "-created_at")
+
+
+class Workload:
+    """Gradi zahtjeve za svaku rutu; pamti retke koje je benchmark sam napravio."""
+
+    def __init__(self, counts: dict, seed: int):
+        self.counts = counts
+        self.rnd = random.Random(seed)
+        self.created = {entity: [] for entity in ENTITIES}
+        self.cursors = {entity: [] for entity in ENTITIES}
+        self.serial = 0
+
+    def random_id(self, entity: str) -> int:
+        return self.rnd.randint(1, self.counts[entity])
+
+    def payload(self, entity: str) -> dict:
+        self.serial += 1
+        n, rnd = self.serial, self.rnd
+        if entity == "korisnici":
+            return {"oib": f"B{n:010d}", "naziv": f"Benchmark {n}", "adresa": f"Ilica {n}, Zagreb",
+                    "tip_korisnika": rnd.choice(("fizicki", "pravni")), "paket_usluga": "Home 500",
+                    "status": "aktivan", "kontakt_admin": f"bench{n}@example.hr"}
+        if entity == "lokacije":
+            return {"naziv": f"Benchmark {n}", "tip": "korisnik", "adresa": f"Ilica {n}, Zagreb",
+                    "latitude": 45.8 + rnd.random() * 0.1, "longitude": 15.9 + rnd.random() * 0.1,
+                    "status": "aktivna", "korisnik_id": self.random_id("korisnici")}
+        if entity == "veze":
+            return {"lokacija_a_id": self.random_id("lokacije"), "lokacija_b_id": self.random_id("lokacije"),
+                    "tip": "optika", "kapacitet_vlakana": 24, "brzina_mbps": 1000, "status": "planiran"}
+        return {"lokacija_id": self.random_id("lokacije"), "tip": "ONT", "proizvodjac": "Huawei",
+                "model": "HG8245H", "serijski_broj": f"BENCH{n:09d}", "inventurni_broj": f"INV-B{n}",
+                "status": "rezerva"}
+
+    def list_params(self, entity: str) -> dict:
+        params = {"limit": 100, "sort": self.rnd.choice(SORTS)}
+        for field, values in FILTERS[entity].items():
+            if self.rnd.random() < 0.3:
+                params[field] = self.rnd.choice(values)
+        # trećina zahtjeva nastavlja neku od ranijih stranica
+        cursors = [c for c in self.cursors[entity] if c[0] == params]
+        if cursors and self.rnd.random() < 0.3:
+            params = dict(params, cursor=self.rnd.choice(cursors)[1])
+        return params
+
+    def routes(self) -> list:
+        """(ime rute, funkcija koja vraća (method, url, params, json) ili None kad nema posla)."""
+        routes = []
+        for entity in ENTITIES:
+            routes += [
+                (f"GET /{entity}", lambda e=entity: ("GET", f"/{e}", self.list_params(e), None)),
+                (f"GET /{entity}/{{id}}", lambda e=entity: ("GET", f"/{e}/{self.random_id(e)}", None, None)),
+                (f"POST /{entity}", lambda e=entity: ("POST", f"/{e}", None, self.payload(e))),
+                (f"PUT /{entity}/{{id}}", lambda e=entity: self.update(e)),
+                (f"DELETE /{entity}/{{id}}", lambda e=entity: self.delete(e)),
+            ]
+        routes.append(("GET /stats", lambda: ("GET", "/stats", None, None)))
+        return routes
+
+    def update(self, entity: str):
+        if not self.created[entity]:
+            return None
+        row_id, payload = self.rnd.choice(self.created[entity])
+        return "PUT", f"/{entity}/{row_id}", None, dict(payload, status=self.rnd.choice(FILTERS[entity]["status"]))
+
+    def delete(self, entity: str):
+        if not self.created[entity]:
+            return None
+        row_id, _ = self.created[entity].pop()
+        return "DELETE", f"/{entity}/{row_id}", None, None
+
+    def observe(self, method: str, url: str, params, body, response: httpx.Response):
+        entity = url.split("/")[1]
+        if method == "POST" and response.status_code == 200:
+            self.created[entity].append((response.json()["id"], body))
+        elif method == "GET" and entity in ENTITIES and params is not None:
+            cursor = response.headers.get("x-next-cursor")
+            base = {k: v for k, v in params.items() if k != "cursor"}
+            if cursor and len(self.cursors[entity]) < 1000:
+                self.cursors[entity].append((base, cursor))
+
+
+def percentile(samples: list, q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+async def run_route(client: httpx.AsyncClient, workload: Workload, build, concurrency: int, seconds: float) -> dict:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            request = build()
+            if request is None:
+                return
+            method, url, params, body = request
+            started = time.perf_counter()
+            response = await client.request(method, url, params=params, json=body)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                workload.observe(method, url, params, body, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+async def run(app, workload: Workload, levels: list, seconds: float, pattern) -> list:
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for concurrency in levels:
+            for name, build in workload.routes():
+                if pattern and not pattern.search(name):
+                    continue
+                result = await run_route(client, workload, build, concurrency, seconds)
+                results.append({"route": name, "concurrency": concurrency, **result})
+                print(f"{name:28} c={concurrency:<3} {result['requests']:>7} req {result['throughput_rps']:>9} req/s "
+                      f"p50 {result['p50_ms']:>8} p95 {result['p95_ms']:>8} p99 {result['p99_ms']:>8} ms"
+                      f"{'  ' + str(result['errors']) + ' grešaka' if result['errors'] else ''}", file=sys.stderr)
+    return results
+
+
+def compare(results: list, baseline: dict, threshold: float) -> list:
+    """Rute kojima je p95 porastao ili propusnost pala više od `threshold` (udio)."""
+    previous = {(r["route"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get((r["route"], r["concurrency"]))
+        if old is None or not old["p95_ms"] or not old["throughput_rps"]:
+            continue
+        p95 = r["p95_ms"] / old["p95_ms"] - 1
+        rps = r["throughput_rps"] / old["throughput_rps"] - 1
+        flag = p95 > threshold or rps < -threshold
+        print(f"{'REGRESIJA' if flag else 'ok':9} {r['route']:28} c={r['concurrency']:<3} "
+              f"p95 {old['p95_ms']:>8} -> {r['p95_ms']:>8} ({p95:+.0%}) "
+              f"req/s {old['throughput_rps']:>9} -> {r['throughput_rps']:>9} ({rps:+.0%})")
+        if flag:
+            regressions.append(r)
+    return regressions
+
+
+def prepare_database(args) -> str:
+    workdir = tempfile.mkdtemp(prefix="hitronet-load-")
+    if args.db is None:
+        path = os.path.join(workdir, "bench.db")
+        subprocess.run([sys.executable, "-m", "benchmarks.dataset", "--out", path, "--scale", str(args.scale),
+                        "--seed", str(args.seed)], check=True, stdout=sys.stderr)
+        return path
+    if args.in_place:
+        return args.db
+    path = os.path.join(workdir, os.path.basename(args.db))
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            shutil.copy(args.db + suffix, path + suffix)
+    return path
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="baza iz benchmarks.dataset (zadano: generira se nova)")
+    parser.add_argument("--in-place", action="store_true", help="ne kopiraj bazu prije mjerenja")
+    parser.add_argument("--scale", type=float, default=0.05, help="skala generiranog skupa bez --db")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", default="1,8,32", help="razine konkurentnosti, odvojene zarezom")
+    parser.add_argument("--seconds", type=float, default=5.0, help="trajanje po ruti i razini")
+    parser.add_argument("--routes", help="regex nad imenom rute, npr. 'GET /oprema'")
+    parser.add_argument("--no-cache", action="store_true", help="isključi HTTP cache odgovora")
+    parser.add_argument("--out", help="zapiši JSON rezultat u datoteku")
+    parser.add_argument("--json", action="store_true", help="ispiši JSON rezultat na stdout")
+    parser.add_argument("--compare", help="JSON rezultat ranijeg mjerenja za usporedbu")
+    parser.add_argument("--threshold", type=float, default=0.2, help="dopušteno pogoršanje p95/propusnosti")
+    args = parser.parse_args()
+
+    path = prepare_database(args)
+    # main.py pri importu otvara bazu iz HITRONET_DB_URL
+    os.environ["HITRONET_DB_URL"] = f"sqlite:///{path}"
+    main = importlib.import_module("main")
+    if args.no_cache:
+        main.response_cache.max_entries = 0
+
+    with sqlite3.connect(path) as connection:
+        counts = {entity: connection.execute(f"SELECT MAX(id) FROM {entity}").fetchone()[0] or 1
+                  for entity in ENTITIES}
+    workload = Workload(counts, args.seed)
+    levels = [int(level) for level in args.concurrency.split(",")]
+    pattern = re.compile(args.routes) if args.routes else None
+
+    results = asyncio.run(run(main.app, workload, levels, args.seconds, pattern))
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "counts": counts,
+            "seed": args.seed,
+            "seconds": args.seconds,
+            "cache": not args.no_cache,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print(f"{len(regressions)} regresija (prag {args.threshold:.0%})")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
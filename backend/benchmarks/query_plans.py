@@ -0,0 +1,118 @@
+"""
+Provjera planova upita za liste: nijedna podržana kombinacija filtera ne smije
+čitati cijelu tablicu.
+
+Planovi ovise o podatcima, pa se prvo generira sintetička mreža
+(benchmarks.dataset) i nad njom pokrene ANALYZE, kao na pravoj bazi. Za
+svaki model prolazi sve podskupove FILTER_FIELDS, sve SORT_FIELDS u oba
+smjera, sa i bez cursora, i čita EXPLAIN QUERY PLAN. S najrjeđom vrijednošću
+filtera plan ne smije sadržavati `SCAN <tablica>`. S najčešćom smije proći
+tablicu redom sortiranja (staje nakon LIMIT redaka), ali ne i pročitati sve
+pa sortirati (`USE TEMP B-TREE FOR ORDER BY`). Izlazi s kodom 1 ako nađe
+takav plan.
+
+    python -m benchmarks.query_plans --scale 0.05
+"""
+
+from datetime import datetime
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+# benchmarks.dataset importa main, koji pri importu otvara bazu iz HITRONET_DB_URL
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-plans-")
+DB_PATH = os.path.join(_tmpdir, "plans.db")
+os.environ["HITRONET_DB_URL"] = f"sqlite:///{DB_PATH}"
+
+from benchmarks.dataset import generate  # noqa: E402
+
+import main  # noqa: E402
+from main import FILTER_FIELDS, SORT_FIELDS, encode_cursor, page_statement  # noqa: E402
+
+
+def filter_value(connection, model, field: str, rare: bool):
+    """Najrjeđa (rare) ili najčešća vrijednost polja u tablici."""
+    table = model.__tablename__
+    return connection.exec_driver_sql(
+        f"SELECT {field} FROM {table} WHERE {field} IS NOT NULL GROUP BY {field} "
+        f"ORDER BY COUNT(*) {'ASC' if rare else 'DESC'}, {field} LIMIT 1").scalar()
+
+
+def middle_value(connection, model, field: str):
+    """Vrijednost iz sredine tablice po polju, za cursor koji ne preskače ništa očito."""
+    table = model.__tablename__
+    value = connection.exec_driver_sql(
+        f"SELECT {field} FROM {table} ORDER BY {field} "
+        f"LIMIT 1 OFFSET (SELECT COUNT(*) / 2 FROM {table})").scalar()
+    if field == "created_at" and isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value
+
+
+def query_plan(connection, stmt) -> list:
+    compiled = stmt.compile(dialect=connection.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params)
+    return [row[3] for row in rows]
+
+
+def full_scans(plan: list, table: str, rare: bool) -> list:
+    # "SCAN t USING INDEX ix" je također prolaz kroz cijelu tablicu, samo drugim redom
+    scans = [line for line in plan if line == f"SCAN {table}" or line.startswith(f"SCAN {table} ")]
+    if not rare and "USE TEMP B-TREE FOR ORDER BY" not in plan:
+        # prolaz redom sortiranja staje nakon LIMIT redaka; kad filter propušta
+        # većinu tablice, to je jeftinije od indeksa filtera pa sortiranja
+        return []
+    return scans
+
+
+def check(connection, verbose: bool = False) -> list:
+    failures = []
+    for model, fields in FILTER_FIELDS.items():
+        table = model.__tablename__
+        for size in range(1, len(fields) + 1):
+            for combination in itertools.combinations(fields, size):
+                for field, direction, with_cursor, rare in itertools.product(
+                        SORT_FIELDS[model], ("", "-"), (False, True), (True, False)):
+                    filters = {name: filter_value(connection, model, name, rare) for name in combination}
+                    sort = direction + field
+                    cursor = encode_cursor(sort, middle_value(connection, model, field), 1) if with_cursor else None
+                    plan = query_plan(connection, page_statement(model, 0, 100, sort, cursor, filters))
+                    label = f"{table} {filters} sort={sort}{' cursor' if with_cursor else ''}"
+                    if full_scans(plan, table, rare):
+                        failures.append((label, plan))
+                    elif verbose:
+                        print(f"ok   {label}: {' | '.join(plan)}")
+    return failures
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="postojeća sintetička baza (kopira se)")
+    parser.add_argument("--verbose", action="store_true", help="ispiši i planove koji prolaze")
+    args = parser.parse_args()
+
+    if args.db:
+        shutil.copyfile(args.db, DB_PATH)
+    else:
+        generate(DB_PATH, args.scale, args.seed)
+    # vlastiti engine: main je bazu otvorio prije nego što ju je generate zamijenio
+    engine, _ = main.create_engines(f"sqlite:///{DB_PATH}")
+    with engine.connect() as connection:
+        connection.exec_driver_sql("ANALYZE")
+        connection.commit()
+        failures = check(connection, args.verbose)
+    engine.dispose()
+    for label, plan in failures:
+        print(f"SCAN {label}: {' | '.join(plan)}")
+    print(f"{len(failures)} upita s punim prolazom kroz tablicu")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,102 @@
+"""
+Mjerenje /reports nad sintetičkim podacima i usporedba sa SQL GROUP BY.
+
+Svaki izvještaj se izračuna iz stupčanog snapshota (reports.py) i istim
+upitom u SQLite-u; ispisuje se vrijeme oba i izlazi s kodom 1 ako se
+rezultati razlikuju. Vrijeme prvog zahtjeva uključuje punjenje snapshota.
+Nekoliko komada opreme dobije datum instalacije prije 1970. ili bez datuma,
+da se provjere i ti mjeseci.
+
+    python -m benchmarks.reports --scale 0.2
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# benchmarks.dataset importa main, koji pri importu otvara bazu iz HITRONET_DB_URL
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-reports-")
+DB_PATH = os.path.join(_tmpdir, "reports.db")
+os.environ["HITRONET_DB_URL"] = f"sqlite:///{DB_PATH}"
+
+from benchmarks.dataset import generate  # noqa: E402
+
+# (url, ekvivalentni SQL); redoslijed kolona u SQL-u isti je kao u retku odgovora
+CASES = (
+    ("/reports/oprema/group?by=lokacija_id,proizvodjac,model,status&limit=10000",
+     "SELECT lokacija_id, proizvodjac, model, status, COUNT(*) FROM oprema GROUP BY 1, 2, 3, 4 "
+     "ORDER BY 5 DESC, 1, 2, 3, 4 LIMIT 10000"),
+    ("/reports/oprema/group?by=datum_instalacije&sort=key",
+     "SELECT substr(datum_instalacije, 1, 7), COUNT(*) FROM oprema GROUP BY 1"),
+    ("/reports/oprema/group?by=status&datum_instalacije=1969-12",
+     "SELECT status, COUNT(*) FROM oprema WHERE substr(datum_instalacije, 1, 7) = '1969-12' GROUP BY 1"),
+    ("/reports/oprema/group?by=proizvodjac,status&tip=ONT",
+     "SELECT proizvodjac, status, COUNT(*) FROM oprema WHERE tip = 'ONT' GROUP BY 1, 2"),
+    ("/reports/veze/group?by=tip&sum=brzina_mbps",
+     "SELECT tip, COUNT(*), COALESCE(SUM(brzina_mbps), 0) FROM veze GROUP BY 1"),
+    ("/reports/veze/group?by=status,created_at&sum=kapacitet_vlakana,kapacitet_parica",
+     "SELECT status, substr(created_at, 1, 7), COUNT(*), COALESCE(SUM(kapacitet_vlakana), 0), "
+     "COALESCE(SUM(kapacitet_parica), 0) FROM veze GROUP BY 1, 2"),
+    ("/reports/korisnici/group?by=tip_korisnika,paket_usluga,status",
+     "SELECT tip_korisnika, paket_usluga, status, COUNT(*) FROM korisnici GROUP BY 1, 2, 3"),
+)
+
+
+def timed(function, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="postojeća sintetička baza (kopira se)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.db:
+        shutil.copyfile(args.db, DB_PATH)
+    else:
+        generate(DB_PATH, args.scale, args.seed)
+    with sqlite3.connect(DB_PATH) as connection:
+        # mjeseci prije 1970. i NULL moraju ostati u zasebnim grupama
+        for oprema_id, datum in ((1, "1969-12-31"), (2, "1969-12-01"), (3, "1969-01-15"), (4, "1955-06-01"),
+                                 (5, None)):
+            connection.execute("UPDATE oprema SET datum_instalacije = ? WHERE id = ?", (datum, oprema_id))
+
+    from fastapi.testclient import TestClient
+    import main
+
+    # cache bi vratio spremljeni odgovor bez računanja
+    main.response_cache.max_entries = 0
+    connection = sqlite3.connect(DB_PATH)
+    failures = 0
+    with TestClient(main.app) as client:
+        start = time.perf_counter()
+        client.get("/reports/korisnici/group").raise_for_status()
+        print(f"punjenje snapshota {time.perf_counter() - start:.1f} s")
+        for url, sql in CASES:
+            response, api_ms = timed(lambda: client.get(url), args.repeat)
+            response.raise_for_status()
+            expected, sql_ms = timed(lambda: connection.execute(sql).fetchall(), args.repeat)
+            rows = response.json()["rows"]
+            ok = sorted((tuple(row.values()) for row in rows), key=repr) == sorted(expected, key=repr)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'RAZLIKA'} {url[:72]:72} {len(rows):>6} grupa "
+                  f"snapshot {api_ms:8.1f} ms  SQL {sql_ms:8.1f} ms")
+    connection.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
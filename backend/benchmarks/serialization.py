@@ -0,0 +1,120 @@
+"""
+Micro-benchmark serijalizacije jedne stranice liste.
+
+Uspoređuje stari put (ORM objekti -> response_model validacija s
+from_attributes -> stdlib json, kako to radi FastAPI) s novim (tuple kolona
+-> dict -> orjson, vidi json_page u main.py). Mjeri se i čitanje iz SQLite-a,
+jer stari put gradi ORM objekte, a novi samo retke.
+
+    python -m benchmarks.serialization --rows 100 --iterations 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+
+# main.py pri importu otvara bazu; ne želimo dirati ./hitronet.db
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-bench-")
+os.environ.setdefault("HITRONET_DB_URL", f"sqlite:///{os.path.join(_tmpdir, 'serialization.db')}")
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import main
+from main import Korisnik, Lokacija, Oprema, Veza, RESPONSE_COLUMNS, RESPONSE_SCHEMAS
+
+
+def seed(rows: int):
+    with main.SessionLocal() as db:
+        db.execute(main.sqlite_insert(Korisnik), [
+            {"oib": f"{i:011d}", "naziv": f"Korisnik {i}", "adresa": f"Ilica {i}, Zagreb",
+             "tip_korisnika": "pravni", "paket_usluga": "Business 1G", "status": "aktivan",
+             "kontakt_admin": "admin@example.com", "kontakt_tehnika": "noc@example.com",
+             "datum_ugovora": datetime(2024, 1, 1)}
+            for i in range(rows)
+        ])
+        db.execute(main.sqlite_insert(Lokacija), [
+            {"naziv": f"Lokacija {i}", "tip": "korisnik", "adresa": f"Ilica {i}, Zagreb",
+             "latitude": 45.8 + i * 1e-4, "longitude": 15.9 + i * 1e-4, "status": "aktivna", "korisnik_id": i + 1}
+            for i in range(rows)
+        ])
+        db.execute(main.sqlite_insert(Veza), [
+            {"lokacija_a_id": i + 1, "lokacija_b_id": (i + 1) % rows + 1, "tip": "optika",
+             "kapacitet_vlakana": 24, "kapacitet_parica": 0, "brzina_mbps": 10000, "status": "aktivan"}
+            for i in range(rows)
+        ])
+        db.execute(main.sqlite_insert(Oprema), [
+            {"lokacija_id": i + 1, "tip": "ONT", "proizvodjac": "Huawei", "model": "HG8245H",
+             "serijski_broj": f"SN{i:09d}", "inventurni_broj": f"INV-{i}", "status": "u_upotrebi",
+             "datum_instalacije": datetime(2024, 1, 1)}
+            for i in range(rows)
+        ])
+        db.commit()
+
+
+def old_path(model, field, rows: int, loop) -> bytes:
+    with main.ReadSessionLocal() as db:
+        objects = db.query(model).order_by(model.id).limit(rows).all()
+        content = loop.run_until_complete(serialize_response(field=field, response_content=objects))
+    return JSONResponse(content).body
+
+
+def new_path(model, rows: int) -> bytes:
+    with main.ReadSessionLocal() as db:
+        result = db.connection().execute(main.select(*RESPONSE_COLUMNS[model]).order_by(model.id).limit(rows)).all()
+    return ORJSONResponse(main.rows_payload(model, result)).body
+
+
+def measure(fn, iterations: int) -> dict:
+    for _ in range(min(50, iterations)):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[int(len(samples) * 0.95)], 1),
+        "mean_us": round(statistics.fmean(samples), 1),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="redaka po stranici")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="ispiši rezultat kao JSON")
+    args = parser.parse_args()
+
+    seed(args.rows)
+    loop = asyncio.new_event_loop()
+    results = {}
+    for model, schema in RESPONSE_SCHEMAS.items():
+        field = create_response_field(name=f"Response_{model.__tablename__}", type_=List[schema], mode="serialization")
+        # oba puta moraju dati isti JSON
+        assert json.loads(old_path(model, field, args.rows, loop)) == json.loads(new_path(model, args.rows))
+        old = measure(lambda: old_path(model, field, args.rows, loop), args.iterations)
+        new = measure(lambda: new_path(model, args.rows), args.iterations)
+        results[model.__tablename__] = {"old": old, "new": new, "speedup": round(old["p50_us"] / new["p50_us"], 2)}
+    loop.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.rows} redaka po stranici, {args.iterations} iteracija (mikrosekunde)")
+    for table, r in results.items():
+        print(f"{table:10} stari p50 {r['old']['p50_us']:>8} p95 {r['old']['p95_us']:>8} | "
+              f"novi p50 {r['new']['p50_us']:>8} p95 {r['new']['p95_us']:>8} | {r['speedup']}x")
+
+
+if __name__ == "__main__":
+    main_cli()
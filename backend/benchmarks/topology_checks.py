@@ -0,0 +1,204 @@
+"""
+Provjera topologije i analize utjecaja kvarova na malim ručno složenim mrežama.
+
+Svaka mreža se upiše kroz API u praznu bazu, a rezultat /topology i /impact
+ruta uspoređuje se s ručno izračunatim. Pokriva najkraći put, komponente,
+paralelne veze, rezervne veze, palu lokaciju, izoliranu lokaciju, lokaciju
+čija je zadnja veza obrisana i prvi upit odmah nakon kvara (bez čekanja na
+pozadinsku izgradnju indeksa). Izlazi s kodom 1 ako se ijedan rezultat razlikuje.
+
+    python -m benchmarks.topology_checks
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+
+# main.py pri importu otvara bazu; ne želimo dirati ./hitronet.db
+_tmpdir = tempfile.mkdtemp(prefix="hitronet-topology-")
+os.environ.setdefault("HITRONET_DB_URL", f"sqlite:///{os.path.join(_tmpdir, 'topology.db')}")
+
+from fastapi.testclient import TestClient
+
+import main
+
+_oib = itertools.count(1)
+
+
+class Network:
+    """Pomoćnik za slaganje mreže kroz API; lokacije i veze pamti po imenu."""
+
+    def __init__(self, client: TestClient):
+        self.client = client
+        self.ids = {}
+        self.paths = {}
+
+    def _post(self, url: str, payload: dict) -> int:
+        response = self.client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()["id"]
+
+    def lokacija(self, name: str, tip: str = "pomocna", status: str = "aktivna"):
+        korisnik_id = None
+        if tip == "korisnik":
+            korisnik_id = self._post("/korisnici", {
+                "oib": f"T{next(_oib):010d}", "naziv": f"Korisnik {name}", "adresa": "Ilica 1, Zagreb",
+                "tip_korisnika": "privatni", "paket_usluga": "Home 200", "status": "aktivan"})
+        self.paths[name] = "/lokacije"
+        self.ids[name] = self._post("/lokacije", {
+            "naziv": name, "tip": tip, "adresa": "Ilica 1, Zagreb", "latitude": 45.8, "longitude": 15.9,
+            "status": status, "korisnik_id": korisnik_id})
+
+    def veza(self, name: str, a: str, b: str, status: str = "aktivan", rezerva_za: str = None):
+        self.paths[name] = "/veze"
+        self.ids[name] = self._post("/veze", {
+            "lokacija_a_id": self.ids[a], "lokacija_b_id": self.ids[b], "tip": "optika", "brzina_mbps": 1000,
+            "status": status, "redundantna_veza_id": self.ids[rezerva_za] if rezerva_za else None})
+
+    def update(self, name: str, **fields):
+        path = self.paths[name]
+        row = self.client.get(f"{path}/{self.ids[name]}").json()
+        response = self.client.put(f"{path}/{self.ids[name]}", json={**row, **fields})
+        response.raise_for_status()
+
+    def impact(self, kind: str, name: str) -> dict:
+        response = self.client.get(f"/impact/{kind}/{self.ids[name]}")
+        response.raise_for_status()
+        return response.json()
+
+    def delete(self, name: str):
+        self.client.delete(f"{self.paths[name]}/{self.ids[name]}").raise_for_status()
+
+    def path(self, a: str, b: str, weight: str = "hops", all_links: bool = False) -> list:
+        response = self.client.get("/topology/path", params={
+            "from": self.ids[a], "to": self.ids[b], "weight": weight, "all_links": all_links})
+        return response.json()["veze"] if response.status_code == 200 else None
+
+    def component(self, name: str, all_links: bool = False) -> list:
+        """Komponenta koja sadrži lokaciju; None ako je nema ni u jednoj."""
+        components = self.client.get("/topology/components", params={"all_links": all_links}).json()
+        return next((c["lokacije"] for c in components["components"] if self.ids[name] in c["lokacije"]), None)
+
+    def names(self, *names: str) -> list:
+        return sorted(self.ids[name] for name in names)
+
+
+def check_topology(client: TestClient) -> list:
+    """(opis, dobiveno, očekivano) za najkraći put i komponente."""
+    results = []
+    net = Network(client)
+    for name in ("A", "B", "C", "E", "F", "G"):
+        net.lokacija(name)
+    net.veza("ab", "A", "B")
+    net.veza("bc", "B", "C")
+    net.veza("ac", "A", "C")
+    net.veza("fa", "F", "A")
+    net.veza("ga", "G", "A", status="planiran")
+    # brža paralelna veza A-B i spora izravna A-C
+    net.update("ac", brzina_mbps=10)
+    net.veza("ab2", "A", "B")
+    net.update("ab2", brzina_mbps=10000)
+
+    results.append(("put po skokovima", net.path("A", "C"), [net.ids["ac"]]))
+    results.append(("put po propusnosti, paralelne veze", net.path("A", "C", "bandwidth"),
+                    [net.ids["ab2"], net.ids["bc"]]))
+    results.append(("put do iste lokacije bez veza", net.path("E", "E"), []))
+    results.append(("put do izolirane lokacije", net.path("A", "E"), None))
+    results.append(("put samo preko neaktivne veze", (net.path("G", "A"), net.path("G", "A", all_links=True)),
+                    (None, [net.ids["ga"]])))
+    net.update("bc", status="u_kvaru")
+    results.append(("put bez veze u kvaru", net.path("A", "C", "bandwidth"), [net.ids["ac"]]))
+
+    results.append(("komponenta", net.component("A"), net.names("A", "B", "C", "F")))
+    results.append(("izolirana lokacija", net.component("E"), net.names("E")))
+    results.append(("lokacija samo s neaktivnom vezom", (net.component("G"), net.component("G", all_links=True)),
+                    (net.names("G"), net.names("A", "B", "C", "F", "G"))))
+    net.delete("fa")
+    results.append(("lokacija bez zadnje veze", (net.component("F"), net.component("A")),
+                    (net.names("F"), net.names("A", "B", "C"))))
+    net.delete("F")
+    results.append(("obrisana lokacija", net.component("F"), None))
+    return results
+
+
+def check_impact(client: TestClient) -> list:
+    """(opis, dobiveno, očekivano) za svaki slučaj analize utjecaja."""
+    results = []
+
+    # dvije paralelne veze S-C: kvar jedne odmah čini drugu mostom
+    net = Network(client)
+    net.lokacija("S1", "servisna")
+    net.lokacija("C1", "korisnik")
+    net.veza("v1", "S1", "C1")
+    net.veza("v2", "S1", "C1")
+    got = net.impact("veza", "v1")
+    results.append(("paralelne veze", (got["most"], got["lokacije"]), (False, [])))
+    net.update("v2", status="u_kvaru")
+    got = net.impact("veza", "v1")
+    results.append(("prvi upit nakon kvara paralelne veze", (got["most"], got["lokacije"], got["zastarjelo"]),
+                    (True, net.names("C1"), False)))
+
+    # rezerva preuzima promet kad primarna padne
+    net = Network(client)
+    net.lokacija("S2", "servisna")
+    net.lokacija("C2", "korisnik")
+    net.veza("p2", "S2", "C2")
+    net.veza("r2", "S2", "C2", status="planiran", rezerva_za="p2")
+    results.append(("primarna s rezervom", net.impact("veza", "p2")["lokacije"], []))
+    net.update("r2", status="u_kvaru")
+    results.append(("primarna s rezervom u kvaru", net.impact("veza", "p2")["lokacije"], net.names("C2")))
+
+    # rezerva za S-A ne pomaže kad padne neka druga veza
+    net = Network(client)
+    net.lokacija("S3", "servisna")
+    net.lokacija("A3")
+    net.lokacija("C3", "korisnik")
+    net.veza("a3", "S3", "A3")
+    net.veza("b3", "A3", "C3")
+    net.veza("r3", "S3", "C3", status="planiran", rezerva_za="a3")
+    results.append(("rezerva tuđe veze", net.impact("veza", "b3")["lokacije"], net.names("C3")))
+    results.append(("rezerva vlastite veze", net.impact("veza", "a3")["lokacije"], []))
+
+    # lokacija: čvorište H između S i C; s rezervom veze H-C prema S
+    net = Network(client)
+    net.lokacija("S4", "servisna")
+    net.lokacija("H4")
+    net.lokacija("C4", "korisnik")
+    net.veza("sh4", "S4", "H4")
+    net.veza("hc4", "H4", "C4")
+    got = net.impact("lokacija", "H4")
+    results.append(("artikulacijska lokacija", (got["artikulacija"], got["lokacije"]), (True, net.names("C4"))))
+    net.veza("r4", "S4", "C4", status="planiran", rezerva_za="hc4")
+    results.append(("lokacija s rezervom njene veze", net.impact("lokacija", "H4")["lokacije"], []))
+    net.update("r4", status="u_kvaru")
+    net.update("H4", status="neaktivna")
+    got = net.impact("lokacija", "H4")
+    results.append(("pala lokacija", (got["aktivna"], got["lokacije"]), (False, net.names("C4"))))
+    got = net.impact("veza", "hc4")
+    results.append(("veza prema paloj lokaciji", got["u_prometu"], False))
+
+    # lokacija bez ijedne veze
+    net = Network(client)
+    net.lokacija("I5", "korisnik")
+    got = net.impact("lokacija", "I5")
+    results.append(("izolirana lokacija", (got["artikulacija"], got["lokacije"]), (False, [])))
+    return results
+
+
+def main_cli():
+    # cache bi vratio odgovor prije promjene statusa
+    main.response_cache.max_entries = 0
+    failures = 0
+    with TestClient(main.app) as client:
+        results = check_topology(client) + check_impact(client)
+    for label, got, expected in results:
+        ok = got == expected
+        failures += not ok
+        print(f"{'ok  ' if ok else 'RAZLIKA'} {label}" + ("" if ok else f": {got}, očekivano {expected}"))
+    print(f"{len(results)} slučajeva, {failures} razlika")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_cli()
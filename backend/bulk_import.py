@@ -0,0 +1,523 @@
+"""
+Hitronet EMS - offline uvoz inventara iz CSV/JSONL datoteka
+Za migraciju milijuna redaka iz starog sustava, bez HTTP-a i ORM-a.
+
+Datoteke se čitaju u chunkovima; zapisi se validiraju postojećim *Create
+shemama u poolu procesa, a glavni proces razrješava strane ključeve preko
+mapa u memoriji i svaki chunk upisuje jednim executemany unutar velikih
+transakcija. Zapis koji ne prođe validaciju, nema poznati strani ključ ili
+padne na bazi (npr. dupli OIB) završava u datoteci odbijenih redaka.
+
+Stupac `id` u ulazu je ključ iz starog sustava: novi id dodjeljuje baza, a
+par (izvorni id, novi id) pamti se u tablici `uvoz_kljucevi`. Strani ključevi
+(`korisnik_id`, `lokacija_id`, `lokacija_a_id`/`lokacija_b_id`,
+`redundantna_veza_id`) pokazuju na izvorne id-eve, pa se korisnici, lokacije,
+veze i oprema mogu uvesti i u odvojenim pokretanjima. S `--direct-ids` su
+strani ključevi postojeći id-evi u bazi.
+
+Napredak po datoteci (`uvoz_datoteke`) upisuje se u istoj transakciji kao i
+retci, pa prekinuti uvoz nastavlja od zadnjeg commita bez duplikata.
+
+Uvoz je offline: triggeri i sekundarni indeksi uvoženih tablica brišu se na
+početku, a brojače, seq, R*Tree, grid, FTS i indekse na kraju gradi init_db
+jednim prolazom (vidi main.drop_derived_data). `--keep-indexes` ih ostavlja.
+
+    HITRONET_DB_URL=sqlite:///./hitronet.db python bulk_import.py \\
+        --korisnici korisnici.csv --lokacije lokacije.jsonl --veze veze.csv --oprema oprema.jsonl
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import itertools
+import gc
+import json
+import multiprocessing
+import operator
+import os
+import sys
+import tempfile
+import time
+import typing
+
+# executemany od nekoliko desetaka tisuća redaka nije spori upit
+os.environ.setdefault("HITRONET_SLOW_QUERY_MS", "0")
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, text
+from sqlalchemy.exc import IntegrityError
+
+import main
+
+# redoslijed uvoza: tablice na koje se pokazuje idu prve
+ENTITIES = {
+    "korisnici": main.KorisnikCreate,
+    "lokacije": main.LokacijaCreate,
+    "veze": main.VezaCreate,
+    "oprema": main.OpremaCreate,
+}
+# strani ključ -> tablica na koju pokazuje
+FOREIGN_KEYS = {
+    "korisnici": {},
+    "lokacije": {"korisnik_id": "korisnici"},
+    "veze": {"lokacija_a_id": "lokacije", "lokacija_b_id": "lokacije", "redundantna_veza_id": "veze"},
+    "oprema": {"lokacija_id": "lokacije"},
+}
+REFERENCED = {table for keys in FOREIGN_KEYS.values() for table in keys.values()}
+# prirodni ključevi s unique indeksom, isti kao za upsert u /bulk
+UNIQUE_KEYS = {model.__tablename__: key for model, key in main.BULK_CONFLICT_KEYS.items()}
+# kolone kojih nema u *Create shemama, a ORM ih puni s datetime.now
+DEFAULT_NOW = {
+    "korisnici": ("datum_ugovora", "created_at"),
+    "lokacije": ("created_at",),
+    "veze": ("created_at",),
+    "oprema": ("created_at",),
+}
+# format SQLAlchemy DateTime kolona na SQLite-u
+SQLITE_DATETIME = "%04d-%02d-%02d %02d:%02d:%02d.%06d"
+
+CHUNK_SIZE = 20_000
+COMMIT_ROWS = 500_000
+
+metadata = MetaData()
+
+uvoz_datoteke = Table(
+    "uvoz_datoteke", metadata,
+    Column("datoteka", String, primary_key=True),
+    Column("entitet", String, nullable=False),
+    Column("velicina", Integer, nullable=False),
+    Column("redaka", Integer, nullable=False),  # pročitani zapisi; od sljedećeg se nastavlja
+    Column("uvezeno", Integer, nullable=False),
+    Column("odbijeno", Integer, nullable=False),
+    Column("zavrseno", Integer, nullable=False),
+    Column("azurirano", Float),
+)
+
+uvoz_kljucevi = Table(
+    "uvoz_kljucevi", metadata,
+    Column("entitet", String, primary_key=True),
+    Column("izvorni_id", String, primary_key=True),
+    Column("id", Integer, nullable=False),
+    sqlite_with_rowid=False,
+)
+
+
+# === VALIDACIJA (u procesima iz poola) ===
+
+def _raw(record, header):
+    """Izvorni zapis za datoteku odbijenih redaka."""
+    if header is not None:
+        return dict(zip(header, record))
+    try:
+        return orjson.loads(record)
+    except ValueError:
+        return record.decode("utf-8", "replace")
+
+
+def sql_datetime(value: datetime) -> str:
+    # isto što radi SQLAlchemy; % je primjetno brži od strftime
+    return SQLITE_DATETIME % (value.year, value.month, value.day, value.hour, value.minute, value.second,
+                              value.microsecond)
+
+
+def validate_chunk(entity: str, header: Optional[List[str]], start: int, records: list) -> Tuple[list, list]:
+    """Parsira i validira zapise jednog chunka.
+
+    Vraća (retci, odbijeni). Redak je ravna torka (index, izvorni id,
+    vrijednosti polja *Create sheme..., izvorne vrijednosti stranih ključeva...);
+    na mjestu stranog ključa je placeholder dok ga glavni proces ne razriješi.
+    Ravne torke se puno brže prenose između procesa od ugniježđenih lista.
+    """
+    schema = ENTITIES[entity]
+    fields = list(schema.model_fields)
+    values_of = operator.itemgetter(*fields)
+    required = {name for name, field in schema.model_fields.items() if field.is_required()}
+    dates = [position for position, field in enumerate(schema.model_fields.values())
+             if datetime in (field.annotation, *typing.get_args(field.annotation))]
+    foreign = FOREIGN_KEYS[entity]
+    rows, rejected = [], []
+    for index, record in enumerate(records, start):
+        try:
+            if header is None:
+                item = orjson.loads(record)
+                if not isinstance(item, dict):
+                    raise ValueError("Expected a JSON object")
+            else:
+                if len(record) != len(header):
+                    raise ValueError(f"Expected {len(header)} columns, got {len(record)}")
+                # prazna ćelija je None, osim za obavezna polja gdje ostaje prazan string
+                item = {name: None if value == "" and name not in required else value
+                        for name, value in zip(header, record)}
+            source_id = item.get("id")
+            keys = []
+            for name in foreign:
+                value = item.get(name)
+                keys.append(None if value is None else str(value))
+                if value is not None:
+                    item[name] = 0
+            obj = schema.model_validate(item)
+        except ValidationError as e:
+            rejected.append((index, _raw(record, header), json.loads(e.json(include_url=False))))
+            continue
+        except ValueError as e:
+            rejected.append((index, _raw(record, header), str(e)))
+            continue
+        values = values_of(obj.__dict__)
+        if dates:
+            values = list(values)
+            for position in dates:
+                if values[position] is not None:
+                    values[position] = sql_datetime(values[position])
+        rows.append((index, None if source_id is None else str(source_id), *values, *keys))
+    return rows, rejected
+
+
+# === ČITANJE ===
+
+def open_records(path: str, delimiter: str = ","):
+    """(datoteka, zaglavlje, zapisi): CSV daje liste stringova, JSONL neprazne retke kao bytes."""
+    if path.endswith((".jsonl", ".ndjson")):
+        handle = open(path, "rb")
+        return handle, None, (line for line in handle if line.strip())
+    handle = open(path, newline="", encoding="utf-8-sig")
+    reader = csv.reader(handle, delimiter=delimiter)
+    header = [name.strip() for name in next(reader, [])]
+    return handle, header, reader
+
+
+def chunked(records: Iterator, start: int, size: int):
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+# === UVOZ ===
+
+class Importer:
+    def __init__(self, engine, workers: int = 0, chunk_size: int = CHUNK_SIZE, commit_rows: int = COMMIT_ROWS,
+                 direct_ids: bool = False, rejected_path: str = "uvoz-odbijeni.jsonl", delimiter: str = ","):
+        self.engine = engine
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.commit_rows = commit_rows
+        self.direct_ids = direct_ids
+        self.rejected_path = rejected_path
+        self.delimiter = delimiter
+        self.executor = None
+        self._rejected_file = None
+        self._db_url = None
+        self.maps: Dict[str, Dict[str, int]] = {}
+        metadata.create_all(engine)
+
+    def __enter__(self):
+        # milijuni kratkoživućih torki i velike mape ključeva: ciklički GC bi
+        # svakih par tisuća alokacija prolazio kroz sve njih, a ciklusa nema
+        self._gc_enabled = gc.isenabled()
+        gc.disable()
+        if self.workers > 0:
+            # procesi sa "spawn" iznova importaju main; neka otvore praznu pomoćnu
+            # bazu, a ne ovu (init_db bi inače vratio triggere obrisane za uvoz).
+            # Varijabla se vraća u __exit__, kad su procesi već pokrenuti.
+            scratch = os.path.join(tempfile.mkdtemp(prefix="hitronet-import-"), "validacija.db")
+            self._db_url = os.environ.get("HITRONET_DB_URL")
+            os.environ["HITRONET_DB_URL"] = f"sqlite:///{scratch}"
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=gc.disable)
+        return self
+
+    def __exit__(self, *exc):
+        if self._gc_enabled:
+            gc.enable()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            if self._db_url is None:
+                os.environ.pop("HITRONET_DB_URL", None)
+            else:
+                os.environ["HITRONET_DB_URL"] = self._db_url
+        if self._rejected_file is not None:
+            self._rejected_file.close()
+
+    def lookup(self, connection, entity: str) -> Dict[str, int]:
+        """Mapa izvorni id -> id; puni se pri prvoj upotrebi i raste s uvozom."""
+        if entity not in self.maps:
+            if self.direct_ids:
+                rows = connection.exec_driver_sql(f"SELECT CAST(id AS TEXT), id FROM {entity}")
+            else:
+                rows = connection.execute(text(
+                    "SELECT izvorni_id, id FROM uvoz_kljucevi WHERE entitet = :entitet"
+                ), {"entitet": entity})
+            self.maps[entity] = dict(rows.all())
+        return self.maps[entity]
+
+    def validated(self, entity: str, header, chunks):
+        """(početak, broj zapisa, (retci, odbijeni)) po redu, s ograničenim brojem chunkova u obradi."""
+        if self.executor is None:
+            for start, records in chunks:
+                yield start, len(records), validate_chunk(entity, header, start, records)
+            return
+        pending = deque()
+        for start, records in chunks:
+            pending.append((start, len(records), self.executor.submit(validate_chunk, entity, header, start, records)))
+            if len(pending) >= self.workers * 2:
+                start, count, future = pending.popleft()
+                yield start, count, future.result()
+        while pending:
+            start, count, future = pending.popleft()
+            yield start, count, future.result()
+
+    def reject(self, path: str, entity: str, rejected: list):
+        if not rejected:
+            return
+        if self._rejected_file is None:
+            self._rejected_file = open(self.rejected_path, "ab")
+        for index, row, error in rejected:
+            self._rejected_file.write(orjson.dumps(
+                {"file": path, "entity": entity, "index": index, "error": error, "row": row}, default=str
+            ) + b"\n")
+        # prije commita, da prekid ne izgubi odbijene retke (nastavak ih može ponoviti)
+        self._rejected_file.flush()
+
+    def resolve(self, connection, entity: str, rows: list, next_id: int):
+        """Zamjenjuje izvorne strane ključeve id-evima i dodjeljuje nove id-eve.
+
+        Duplikati prirodnog ključa (OIB, serijski broj) odbijaju se ovdje, jednim
+        upitom po chunku, da jedan dupli redak ne sruši executemany cijelog chunka.
+        Vraća (parametri za executemany, indeksi zapisa, parametri za uvoz_kljucevi,
+        odbijeni, zadnji id).
+        """
+        fields = list(ENTITIES[entity].model_fields)
+        foreign = [(fields.index(name), name, self.lookup(connection, table))
+                   for name, table in FOREIGN_KEYS[entity].items()]
+        own = self.lookup(connection, entity) if entity in REFERENCED else None
+        unique = UNIQUE_KEYS.get(entity)
+        end = 2 + len(fields)
+        seen = set()
+        if unique is not None and rows:
+            unique_position = fields.index(unique)
+            seen = set(connection.exec_driver_sql(
+                f"SELECT {unique} FROM {entity} WHERE {unique} IN (SELECT value FROM json_each(?))",
+                (orjson.dumps([row[2 + unique_position] for row in rows]).decode(),),
+            ).scalars())
+
+        now = (sql_datetime(datetime.now()),) * len(DEFAULT_NOW[entity])
+        params, indexes, key_params, rejected = [], [], [], []
+        # jedan prolaz redom, da veza može pokazivati na rezervnu vezu iz istog chunka
+        for row in rows:
+            index, source_id, values, keys = row[0], row[1], row[2:end], row[end:]
+            error = None
+            if foreign:
+                values = list(values)
+                for (position, name, mapping), key in zip(foreign, keys):
+                    if key is not None:
+                        target = mapping.get(key)
+                        if target is None:
+                            error = f"Unknown {name} {key}"
+                            break
+                        values[position] = target
+            if error is None and not self.direct_ids and own is not None and source_id in own:
+                error = f"Duplicate id {source_id}"
+            if error is None and unique is not None:
+                if values[unique_position] in seen:
+                    error = f"Duplicate {unique} {values[unique_position]}"
+                seen.add(values[unique_position])
+            if error is not None:
+                rejected_row = dict(zip(fields, values))
+                rejected_row.update({name: key for (_, name, _), key in zip(foreign, keys)}, id=source_id)
+                rejected.append((index, rejected_row, error))
+                continue
+
+            next_id += 1
+            params.append((next_id, *values, *now))
+            indexes.append(index)
+            if self.direct_ids:
+                if own is not None:
+                    own[str(next_id)] = next_id
+            elif source_id is not None:
+                key_params.append((entity, source_id, next_id))
+                if own is not None:
+                    own[source_id] = next_id
+        return params, indexes, key_params, rejected, next_id
+
+    def write(self, connection, entity: str, params: list, indexes: list, key_params: list) -> list:
+        """Upisuje chunk jednim executemany; ako padne, redak po redak. Vraća odbijene."""
+        columns = ["id", *ENTITIES[entity].model_fields, *DEFAULT_NOW[entity]]
+        insert_rows = f"INSERT INTO {entity} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        insert_keys = "INSERT INTO uvoz_kljucevi (entitet, izvorni_id, id) VALUES (?, ?, ?)"
+        if not params:
+            return []
+        try:
+            with connection.begin_nested():
+                connection.exec_driver_sql(insert_rows, params)
+                if key_params:
+                    connection.exec_driver_sql(insert_keys, key_params)
+            return []
+        except IntegrityError:
+            pass
+
+        keys_by_id = {row_id: (source, row_id) for _, source, row_id in key_params}
+        own = self.maps.get(entity)
+        rejected = []
+        for index, row in zip(indexes, params):
+            key = keys_by_id.get(row[0])
+            try:
+                with connection.begin_nested():
+                    connection.exec_driver_sql(insert_rows, [row])
+                    if key is not None:
+                        connection.exec_driver_sql(insert_keys, [(entity, *key)])
+            except IntegrityError as e:
+                if own is not None:
+                    own.pop(key[0] if key is not None else str(row[0]), None)
+                rejected.append((index, dict(zip(columns, row)), str(e.orig)))
+        return rejected
+
+    def save_checkpoint(self, connection, path: str, entity: str, state: dict, finished: bool = False):
+        connection.execute(text(
+            "INSERT INTO uvoz_datoteke (datoteka, entitet, velicina, redaka, uvezeno, odbijeno, zavrseno, azurirano) "
+            "VALUES (:datoteka, :entitet, :velicina, :redaka, :uvezeno, :odbijeno, :zavrseno, :azurirano) "
+            "ON CONFLICT (datoteka) DO UPDATE SET redaka = excluded.redaka, uvezeno = excluded.uvezeno, "
+            "odbijeno = excluded.odbijeno, zavrseno = excluded.zavrseno, azurirano = excluded.azurirano"
+        ), {"datoteka": path, "entitet": entity, "velicina": os.path.getsize(path), "zavrseno": int(finished),
+            "azurirano": time.time(), **state})
+
+    def checkpoint(self, path: str, entity: str, restart: bool = False) -> Optional[dict]:
+        """Stanje prijašnjeg uvoza datoteke ili None ako se kreće ispočetka."""
+        with self.engine.begin() as connection:
+            if restart:
+                connection.execute(text("DELETE FROM uvoz_datoteke WHERE datoteka = :datoteka"), {"datoteka": path})
+                return None
+            row = connection.execute(text(
+                "SELECT entitet, velicina, redaka, uvezeno, odbijeno, zavrseno FROM uvoz_datoteke "
+                "WHERE datoteka = :datoteka"
+            ), {"datoteka": path}).mappings().first()
+        if row is None:
+            return None
+        if row["entitet"] != entity or row["velicina"] != os.path.getsize(path):
+            raise SystemExit(f"{path}: datoteka se promijenila od prošlog uvoza (pokreni s --restart)")
+        return dict(row)
+
+    def import_file(self, path: str, entity: str, restart: bool = False) -> dict:
+        path = os.path.abspath(path)
+        started = time.perf_counter()
+        previous = self.checkpoint(path, entity, restart)
+        state = {"redaka": 0, "uvezeno": 0, "odbijeno": 0}
+        if previous is not None:
+            state = {name: previous[name] for name in state}
+            if previous["zavrseno"]:
+                return {"file": path, "entity": entity, "imported": 0, "rejected": 0, "skipped": True,
+                        "total_imported": state["uvezeno"], "seconds": 0.0}
+        resumed_from = state["redaka"]
+
+        handle, header, records = open_records(path, self.delimiter)
+        # zapisi uvezeni prije prekida se samo preskaču, bez validacije
+        records = itertools.islice(records, resumed_from, None)
+        chunks = chunked(records, resumed_from + 1, self.chunk_size)
+        imported = rejected_count = 0
+
+        with handle, self.engine.connect() as connection:
+            transaction = connection.begin()
+            next_id = connection.exec_driver_sql(f"SELECT COALESCE(MAX(id), 0) FROM {entity}").scalar()
+            pending = 0
+            for start, count, (rows, rejected) in self.validated(entity, header, chunks):
+                params, indexes, key_params, unresolved, next_id = self.resolve(connection, entity, rows, next_id)
+                failed = self.write(connection, entity, params, indexes, key_params)
+                rejected += unresolved + failed
+                self.reject(path, entity, rejected)
+                imported += len(params) - len(failed)
+                rejected_count += len(rejected)
+                state = {"redaka": start + count - 1, "uvezeno": state["uvezeno"] + len(params) - len(failed),
+                         "odbijeno": state["odbijeno"] + len(rejected)}
+                pending += count
+                if pending >= self.commit_rows:
+                    self.save_checkpoint(connection, path, entity, state)
+                    transaction.commit()
+                    transaction = connection.begin()
+                    # netko drugi je mogao upisati retke između dvije transakcije
+                    next_id = max(next_id, connection.exec_driver_sql(
+                        f"SELECT COALESCE(MAX(id), 0) FROM {entity}").scalar())
+                    pending = 0
+                    elapsed = time.perf_counter() - started
+                    print(f"{path}: {state['redaka']:,} zapisa, {imported / elapsed:,.0f} redaka/s", file=sys.stderr)
+            self.save_checkpoint(connection, path, entity, state, finished=True)
+            transaction.commit()
+
+        elapsed = time.perf_counter() - started
+        return {"file": path, "entity": entity, "imported": imported, "rejected": rejected_count,
+                "resumed_from": resumed_from, "seconds": round(elapsed, 2),
+                "rows_per_s": round(imported / elapsed) if elapsed else 0}
+
+
+def run_import(files: List[Tuple[str, str]], workers: int = 0, chunk_size: int = CHUNK_SIZE,
+               commit_rows: int = COMMIT_ROWS, direct_ids: bool = False, keep_indexes: bool = False,
+               restart: bool = False, rejected_path: str = "uvoz-odbijeni.jsonl", delimiter: str = ",") -> dict:
+    """Uvozi (entitet, putanja) parove redom iz ENTITIES u bazu iz main.engine."""
+    files = sorted(files, key=lambda item: list(ENTITIES).index(item[0]))
+    entities = {entity for entity, _ in files}
+    result = {"files": []}
+    if not keep_indexes:
+        main.drop_derived_data(main.engine, entities)
+    try:
+        with Importer(main.engine, workers, chunk_size, commit_rows, direct_ids, rejected_path, delimiter) as importer:
+            for entity, path in files:
+                result["files"].append(importer.import_file(path, entity, restart))
+    finally:
+        if not keep_indexes:
+            started = time.perf_counter()
+            main.init_db(main.engine)
+            result["rebuild_seconds"] = round(time.perf_counter() - started, 2)
+            # bez triggera verzije tablica nisu rasle; cache mora vidjeti nove retke
+            with main.engine.begin() as connection:
+                for entity in entities:
+                    imported = sum(item["imported"] for item in result["files"] if item["entity"] == entity)
+                    if imported:
+                        connection.execute(text(
+                            f"UPDATE verzije SET verzija = verzija + :n, promijenjeno = {main.SQL_NOW} "
+                            "WHERE tablica = :tablica"
+                        ), {"n": imported, "tablica": entity})
+    return result
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for entity in ENTITIES:
+        parser.add_argument(f"--{entity}", action="append", default=[], metavar="PUTANJA",
+                            help=f"CSV ili JSONL datoteka s {entity} (može više puta)")
+    parser.add_argument("--workers", type=int, default=max(0, (os.cpu_count() or 1) - 1),
+                        help="procesi za validaciju; 0 validira u glavnom procesu")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--commit-rows", type=int, default=COMMIT_ROWS, help="zapisa po transakciji")
+    parser.add_argument("--delimiter", default=",", help="separator u CSV datotekama")
+    parser.add_argument("--direct-ids", action="store_true", help="strani ključevi su id-evi u bazi, ne izvorni")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="ne briši triggere i indekse (sporije, ali izvedeni podatci su stalno ažurni)")
+    parser.add_argument("--restart", action="store_true", help="zanemari spremljeni napredak za ove datoteke")
+    parser.add_argument("--rejected", default="uvoz-odbijeni.jsonl", help="datoteka za odbijene retke (JSONL)")
+    parser.add_argument("--json", action="store_true", help="ispiši rezultat kao JSON")
+    args = parser.parse_args()
+
+    files = [(entity, path) for entity in ENTITIES for path in getattr(args, entity)]
+    if not files:
+        parser.error("nema datoteka za uvoz")
+    result = run_import(files, args.workers, args.chunk_size, args.commit_rows, args.direct_ids,
+                        args.keep_indexes, args.restart, args.rejected, args.delimiter)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for item in result["files"]:
+        if item.get("skipped"):
+            print(f"{item['file']}: već uvezeno ({item['total_imported']:,} redaka)")
+            continue
+        print(f"{item['file']}: {item['imported']:,} {item['entity']}, {item['rejected']:,} odbijeno, "
+              f"{item['seconds']} s ({item['rows_per_s']:,} redaka/s)")
+    if "rebuild_seconds" in result:
+        print(f"indeksi i izvedeni podatci {result['rebuild_seconds']} s")
+
+
+if __name__ == "__main__":
+    main_cli()
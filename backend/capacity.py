@@ -0,0 +1,268 @@
+"""
+Hitronet EMS - duljine veza i kapaciteti po lokaciji
+Duljina veze računa se haversinom iz koordinata njenih krajnjih lokacija, a
+za svaku lokaciju drže se zbrojevi veza koje u nju ulaze (broj, vlakna,
+parice, brzina, duljina) po statusu veze.
+
+Pri učitavanju se sve duljine i zbrojevi računaju vektorski (NumPy) za cijelu
+mrežu. Dalje se održavaju po promjeni: promjena veze oduzme stari i doda novi
+doprinos na obje krajnje lokacije, a pomak lokacije preračuna samo njene veze.
+"""
+
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+import threading
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+# zbrojevi po lokaciji i statusu, redom kao zadnja os polja totals
+METRICS = ("veze", "kapacitet_vlakana", "kapacitet_parica", "brzina_mbps", "duljina_km")
+INITIAL_CAPACITY = 1024
+
+
+class Link(NamedTuple):
+    id: int
+    a: Optional[int]
+    b: Optional[int]
+    status: Optional[str]
+    kapacitet_vlakana: Optional[int]
+    kapacitet_parica: Optional[int]
+    brzina_mbps: Optional[int]
+
+
+class Site(NamedTuple):
+    id: int
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Udaljenost po velikoj kružnici za skalare ili NumPy polja; NaN ako koordinata nema."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _coordinate(value) -> float:
+    return np.nan if value is None else value
+
+
+def _same(old: float, new: float) -> bool:
+    return old == new or (np.isnan(old) and np.isnan(new))
+
+
+class CapacityIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self.links: Dict[int, Link] = {}
+        # izračunata duljina veze; NaN ako nekoj krajnjoj lokaciji nedostaju koordinate
+        self.lengths: Dict[int, float] = {}
+        self._adjacent: Dict[int, Set[int]] = {}
+        self._slots: Dict[int, int] = {}
+        self._alive = np.zeros(0, bool)
+        self._lat = np.zeros(0)
+        self._lon = np.zeros(0)
+        self._statuses: List[Optional[str]] = []
+        self._status_index: Dict[Optional[str], int] = {}
+        self.totals = np.zeros((0, 0, len(METRICS)))
+
+    # --- održavanje ---
+
+    def load(self, fetch_links: Callable[[], Iterable[Link]], fetch_sites: Callable[[], Iterable[Site]]):
+        """Računa duljine i zbrojeve za cijelu mrežu, jednom (do invalidate()).
+
+        Kasnije promjene dolaze kroz upsert/remove (vidi IndexFeed u main.py).
+        """
+        with self._load_lock:
+            if self.loaded:
+                return
+            sites = list(fetch_sites())
+            links = list(fetch_links())
+            with self._lock:
+                self._build(sites, links)
+                self.version += 1
+                self.loaded = True
+
+    def invalidate(self):
+        """Sljedeći load() gradi indeks iznova (npr. kad je u bazi previše promjena za dostizanje)."""
+        with self._load_lock:
+            self.loaded = False
+
+    def _build(self, sites: List[Site], links: List[Link]):
+        self._reset()
+        for site in sites:
+            self._slot(site.id)
+        self._alive[:len(sites)] = True
+        self._lat[:len(sites)] = [_coordinate(site.latitude) for site in sites]
+        self._lon[:len(sites)] = [_coordinate(site.longitude) for site in sites]
+        for link in links:
+            for end in {link.a, link.b} - {None}:
+                # veza na lokaciju koje (još) nema dobiva slot bez koordinata
+                self._slot(end)
+        for link in links:
+            self._status(link.status)
+
+        slot_a = np.array([self._slots[link.a] if link.a is not None else -1 for link in links], np.int64)
+        slot_b = np.array([self._slots[link.b] if link.b is not None else -1 for link in links], np.int64)
+        status = np.array([self._status_index[link.status] for link in links], np.int64)
+        lengths = haversine_km(self._lat[slot_a], self._lon[slot_a], self._lat[slot_b], self._lon[slot_b])
+        lengths[(slot_a < 0) | (slot_b < 0)] = np.nan
+        values = np.array([(1, link.kapacitet_vlakana or 0, link.kapacitet_parica or 0, link.brzina_mbps or 0)
+                           for link in links], np.float64).reshape(-1, len(METRICS) - 1)
+        values = np.column_stack([values, np.nan_to_num(lengths)])
+
+        # svaka veza doprinosi objema krajnjim lokacijama; petlja (a == b) samo jednom
+        statuses = len(self._statuses)
+        cells = len(self._alive) * statuses
+        flat = self.totals.reshape(cells, len(METRICS))
+        for slots, valid in ((slot_a, slot_a >= 0), (slot_b, (slot_b >= 0) & (slot_b != slot_a))):
+            index = slots[valid] * statuses + status[valid]
+            for metric in range(len(METRICS)):
+                flat[:, metric] += np.bincount(index, weights=values[valid, metric], minlength=cells)
+
+        self.links = {link.id: link for link in links}
+        self.lengths = dict(zip((link.id for link in links), lengths.tolist()))
+        for link in links:
+            for end in {link.a, link.b} - {None}:
+                self._adjacent.setdefault(end, set()).add(link.id)
+
+    def _slot(self, lokacija_id: int) -> int:
+        slot = self._slots.get(lokacija_id)
+        if slot is None:
+            slot = len(self._slots)
+            if slot >= len(self._alive):
+                self._grow(max(INITIAL_CAPACITY, 2 * len(self._alive)), self.totals.shape[1])
+            self._slots[lokacija_id] = slot
+        return slot
+
+    def _status(self, status: Optional[str]) -> int:
+        index = self._status_index.get(status)
+        if index is None:
+            index = len(self._statuses)
+            self._statuses.append(status)
+            self._status_index[status] = index
+            if index >= self.totals.shape[1]:
+                self._grow(len(self._alive), index + 1)
+        return index
+
+    def _grow(self, sites: int, statuses: int):
+        old = len(self._alive)
+        self._alive = np.concatenate([self._alive, np.zeros(sites - old, bool)])
+        self._lat = np.concatenate([self._lat, np.full(sites - old, np.nan)])
+        self._lon = np.concatenate([self._lon, np.full(sites - old, np.nan)])
+        totals = np.zeros((sites, statuses, len(METRICS)))
+        totals[:old, :self.totals.shape[1]] = self.totals
+        self.totals = totals
+
+    def _length(self, link: Link) -> float:
+        if link.a is None or link.b is None:
+            return np.nan
+        a, b = self._slots[link.a], self._slots[link.b]
+        return float(haversine_km(self._lat[a], self._lon[a], self._lat[b], self._lon[b]))
+
+    def _apply(self, link: Link, length: float, sign: int):
+        """Dodaje (sign=1) ili oduzima (sign=-1) doprinos veze njenim krajnjim lokacijama."""
+        status = self._status(link.status)
+        values = sign * np.array((1, link.kapacitet_vlakana or 0, link.kapacitet_parica or 0,
+                                  link.brzina_mbps or 0, 0.0 if np.isnan(length) else length))
+        for end in {link.a, link.b} - {None}:
+            self.totals[self._slots[end], status] += values
+
+    def upsert(self, link: Link):
+        with self._lock:
+            old = self.links.get(link.id)
+            if old is not None:
+                self._apply(old, self.lengths[link.id], -1)
+                for end in {old.a, old.b} - {None}:
+                    self._adjacent[end].discard(link.id)
+            for end in {link.a, link.b} - {None}:
+                self._slot(end)
+                self._adjacent.setdefault(end, set()).add(link.id)
+            length = self._length(link)
+            self.links[link.id] = link
+            self.lengths[link.id] = length
+            self._apply(link, length, 1)
+            self.version += 1
+
+    def remove(self, veza_id: int):
+        with self._lock:
+            old = self.links.pop(veza_id, None)
+            if old is None:
+                return
+            self._apply(old, self.lengths.pop(veza_id), -1)
+            for end in {old.a, old.b} - {None}:
+                self._adjacent[end].discard(veza_id)
+            self.version += 1
+
+    def upsert_site(self, site: Site):
+        with self._lock:
+            slot = self._slot(site.id)
+            self._alive[slot] = True
+            self._move(slot, site.id, _coordinate(site.latitude), _coordinate(site.longitude))
+            self.version += 1
+
+    def remove_site(self, lokacija_id: int):
+        with self._lock:
+            slot = self._slots.get(lokacija_id)
+            if slot is None:
+                return
+            self._alive[slot] = False
+            # veze koje i dalje pokazuju na obrisanu lokaciju ostaju bez duljine
+            self._move(slot, lokacija_id, np.nan, np.nan)
+            self.version += 1
+
+    def _move(self, slot: int, lokacija_id: int, lat: float, lon: float):
+        """Postavlja koordinate lokacije i preračunava duljine samo njenih veza."""
+        if _same(self._lat[slot], lat) and _same(self._lon[slot], lon):
+            return
+        self._lat[slot], self._lon[slot] = lat, lon
+        ids = list(self._adjacent.get(lokacija_id, ()))
+        if not ids:
+            return
+        links = [self.links[veza_id] for veza_id in ids]
+        slot_a = np.array([self._slots[link.a] if link.a is not None else -1 for link in links], np.int64)
+        slot_b = np.array([self._slots[link.b] if link.b is not None else -1 for link in links], np.int64)
+        lengths = haversine_km(self._lat[slot_a], self._lon[slot_a], self._lat[slot_b], self._lon[slot_b])
+        lengths[(slot_a < 0) | (slot_b < 0)] = np.nan
+        for link, length in zip(links, lengths.tolist()):
+            old = self.lengths[link.id]
+            delta = (0.0 if np.isnan(length) else length) - (0.0 if np.isnan(old) else old)
+            self.lengths[link.id] = length
+            status = self._status_index[link.status]
+            for end in {link.a, link.b} - {None}:
+                self.totals[self._slots[end], status, METRICS.index("duljina_km")] += delta
+
+    # --- upiti ---
+
+    def length(self, veza_id: int) -> Optional[float]:
+        with self._lock:
+            length = self.lengths.get(veza_id)
+        return None if length is None or np.isnan(length) else round(length, 3)
+
+    def capacity(self, lokacija_id: int) -> Optional[dict]:
+        """Zbrojevi veza lokacije, ukupno i po statusu; None ako lokacija ne postoji."""
+        with self._lock:
+            slot = self._slots.get(lokacija_id)
+            if slot is None or not self._alive[slot]:
+                return None
+            totals = self.totals[slot].copy()
+            statuses = list(self._statuses)
+        result = {"lokacija_id": lokacija_id, **_metrics(totals.sum(axis=0)), "po_statusu": {}}
+        for status, values in zip(statuses, totals):
+            if values[0] > 0:
+                result["po_statusu"][status] = _metrics(values)
+        return result
+
+
+def _metrics(values: np.ndarray) -> dict:
+    result = {name: int(round(value)) for name, value in zip(METRICS[:-1], values.tolist())}
+    result["duljina_km"] = round(max(float(values[-1]), 0.0), 3)
+    return result
@@ -0,0 +1,115 @@
+"""
+Hitronet EMS - group commit za upise iz više istovremenih zahtjeva
+Jedan writer thread skuplja operacije iz reda dok ne prođe prozor (par
+milisekundi) ili ih se ne skupi `max_ops`, izvrši ih u jednoj transakciji i
+svakom pozivatelju vrati njegov rezultat ili grešku.
+
+Svaka operacija ide u vlastiti SAVEPOINT, pa greška jedne (404, duplikat,
+neispravan FK) ne ruši ostale iz iste grupe. Ako padne sam COMMIT, grešku
+dobiju sve operacije iz grupe. Trošak commita (WAL zapis, fsync, write lock)
+tako se plaća jednom po grupi umjesto jednom po zahtjevu.
+"""
+
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger("hitronet.group_commit")
+
+
+class GroupCommitter:
+    """`submit(op)` izvršava `op(session)` u zajedničkoj transakciji i čeka commit.
+
+    Operacija mora vratiti vrijednost koja vrijedi i nakon zatvaranja sesije
+    (npr. Pydantic shemu), a ne ORM objekt.
+    """
+
+    def __init__(self, session_factory, window_seconds: float = 0.002, max_ops: int = 64):
+        self.session_factory = session_factory
+        self.window_seconds = window_seconds
+        self.max_ops = max_ops
+        self._queue: "queue.Queue[Tuple[Callable, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_size = 0
+        self.batches = 0
+        self.operations = 0
+
+    def submit(self, op: Callable):
+        future = Future()
+        self._ensure_started()
+        self._queue.put((op, future))
+        return future.result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[Callable, Future]]:
+        batch = [self._queue.get()]
+        # bez istovremenih pisaca (prošla grupa je imala jednu operaciju i red
+        # je prazan) prozor bi samo dodao latenciju, pa se ne čeka
+        wait = self._last_size > 1
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_ops:
+            try:
+                # što je već u redu uzima se odmah, na ostalo se čeka do kraja prozora
+                batch.append(self._queue.get_nowait())
+                wait = True
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if not wait or remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        self._last_size = len(batch)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._apply(batch)
+            except Exception as exc:  # ne smije ubiti writer thread
+                logger.exception("Group commit failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _apply(self, batch: List[Tuple[Callable, Future]]):
+        outcomes = []
+        session = self.session_factory()
+        try:
+            for op, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    with session.begin_nested():
+                        outcomes.append((future, op(session), None))
+                except Exception as exc:
+                    outcomes.append((future, None, exc))
+            session.commit()
+        except Exception as exc:
+            session.rollback()
+            outcomes = [(future, None, error or exc) for future, _, error in outcomes]
+        finally:
+            session.close()
+
+        self.batches += 1
+        self.operations += len(outcomes)
+        for future, value, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
@@ -0,0 +1,373 @@
+"""
+Hitronet EMS - analiza utjecaja kvarova
+Koji korisnici ostaju bez veze prema svim servisnim lokacijama kad veza ili lokacija padne.
+
+Indeks se gradi jednim DFS-om (Tarjan) nad grafom iz topology.Topology:
+mostovi, artikulacijske točke, DFS intervali podstabala i prefiksne sume
+servisnih lokacija. Upit je tada samo par aritmetičkih provjera i bisect po
+korisničkim lokacijama, bez obilaska grafa.
+
+Mostovi se nakon promjene ne mogu jeftino ažurirati, pa se indeks gradi
+iznova: u pozadini nakon promjene, a upit koji zatekne zastarjeli indeks
+pričeka izgradnju (istovremeni upiti čekaju istu), pa prvi upit nakon kvara
+već vidi kvar.
+
+Rezervna veza (ona s redundantna_veza_id) prenosi promet samo dok njena
+primarna veza ne radi; upit za kvar primarne veze ili lokacije računa s
+rezervama koje bi se tada uključile.
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from topology import ACTIVE_STATUSES, Edge
+
+logger = logging.getLogger("hitronet.impact")
+
+SERVISNA = "servisna"
+# ostatak komponente izvan odvojenih podstabala (vidi ImpactSnapshot._served)
+REST = "ostatak"
+NEAKTIVNA = "neaktivna"
+U_KVARU = "u_kvaru"
+# Odgoda (s) nakon promjene prije nego se indeks gradi u pozadini; niz promjena
+# tijekom "oluje" kvarova skupi se u jednu izgradnju. Sljedeća izgradnja ne
+# počinje prije nego prođe koliko je trajala prethodna.
+REBUILD_DELAY = 0.05
+
+
+def usable(edge: Edge, nodes) -> bool:
+    """Veza može prenositi promet: nije u kvaru i ne spaja neaktivnu lokaciju."""
+    if edge.status == U_KVARU:
+        return False
+    for end in (edge.a, edge.b):
+        node = nodes.get(end)
+        if node is not None and node.status == NEAKTIVNA:
+            return False
+    return True
+
+
+def carries_traffic(edge: Edge, nodes, edges) -> bool:
+    """Veza je u grafu ako je aktivna, ili je rezerva (redundantna_veza_id) čija primarna veza ne radi."""
+    if not usable(edge, nodes):
+        return False
+    if edge.status in ACTIVE_STATUSES:
+        return True
+    if edge.redundantna_veza_id is None:
+        return False
+    primary = edges.get(edge.redundantna_veza_id)
+    return primary is None or primary.status not in ACTIVE_STATUSES or not usable(primary, nodes)
+
+
+class ImpactSnapshot:
+    """Nepromjenjiv indeks izgrađen iz jedne kopije topologije; upiti ga samo čitaju.
+
+    `seq` je slijed baze iz kojeg je kopija uzeta, a `built_at` unix vrijeme izgradnje.
+    """
+
+    def __init__(self, edges: List[Edge], nodes, seq: Optional[int], requested: int):
+        self.seq = seq
+        self.requested = requested
+        self.built_at = time.time()
+        self._build(edges, nodes)
+
+    def _build(self, edges: List[Edge], nodes):
+        by_id = {edge.id: edge for edge in edges}
+        adjacency: Dict[int, List[Tuple[int, int]]] = {node_id: [] for node_id in nodes}
+        # sve veze po lokaciji, i one izvan prometa (za upite nad već palim lokacijama)
+        incident: Dict[int, List[Edge]] = {}
+        # primarna veza -> ispravne rezerve koje čekaju njen kvar
+        backups: Dict[int, List[Edge]] = {}
+        for edge in edges:
+            adjacency.setdefault(edge.a, [])
+            adjacency.setdefault(edge.b, [])
+            incident.setdefault(edge.a, []).append(edge)
+            incident.setdefault(edge.b, []).append(edge)
+            if carries_traffic(edge, nodes, by_id):
+                adjacency[edge.a].append((edge.b, edge.id))
+                adjacency[edge.b].append((edge.a, edge.id))
+            elif edge.redundantna_veza_id is not None and usable(edge, nodes):
+                backups.setdefault(edge.redundantna_veza_id, []).append(edge)
+
+        tin: Dict[int, int] = {}
+        low: Dict[int, int] = {}
+        tout: Dict[int, int] = {}
+        root_of: Dict[int, int] = {}
+        children: Dict[int, List[int]] = {}
+        bridge_child: Dict[int, int] = {}
+        order: List[int] = []
+
+        # iterativni Tarjan; tin su DFS brojevi, podstablo čvora v je [tin[v], tout[v]]
+        for root in sorted(adjacency):
+            if root in tin:
+                continue
+            tin[root] = low[root] = len(order)
+            order.append(root)
+            stack = [(root, None, iter(adjacency[root]))]
+            while stack:
+                v, parent_edge, neighbors = stack[-1]
+                for w, edge_id in neighbors:
+                    if edge_id == parent_edge:
+                        continue
+                    if w in tin:
+                        low[v] = min(low[v], tin[w])
+                        continue
+                    tin[w] = low[w] = len(order)
+                    order.append(w)
+                    children.setdefault(v, []).append(w)
+                    stack.append((w, edge_id, iter(adjacency[w])))
+                    break
+                else:
+                    stack.pop()
+                    tout[v] = len(order) - 1
+                    root_of[v] = root
+                    if stack:
+                        p = stack[-1][0]
+                        low[p] = min(low[p], low[v])
+                        if low[v] > tin[p]:
+                            bridge_child[parent_edge] = v
+
+        serving = [0]
+        for node_id in order:
+            node = nodes.get(node_id)
+            serves = node is not None and node.tip == SERVISNA and node.status != NEAKTIVNA
+            serving.append(serving[-1] + serves)
+
+        self.nodes = nodes
+        self.edges = by_id
+        self.incident = incident
+        self.backups = backups
+        self.tin, self.low, self.tout = tin, low, tout
+        self.root_of, self.children, self.bridge_child = root_of, children, bridge_child
+        self.order = order
+        self._serving = serving
+        self._customer_tins = [
+            i for i, node_id in enumerate(order)
+            if nodes.get(node_id) is not None and nodes[node_id].korisnik_id is not None
+        ]
+
+    # --- upiti ---
+
+    def _servisne(self, start: int, end: int) -> int:
+        """Broj servisnih lokacija s DFS brojem u [start, end]."""
+        return self._serving[end + 1] - self._serving[start]
+
+    def _customers(self, start: int, end: int, excluded=()) -> List[int]:
+        """Korisničke lokacije s DFS brojem u [start, end], osim isključenih intervala."""
+        tins = self._customer_tins[bisect_left(self._customer_tins, start):bisect_right(self._customer_tins, end)]
+        return [
+            self.order[i] for i in tins
+            if not any(lo <= i <= hi for lo, hi in excluded)
+        ]
+
+    def _component(self, node_id: int) -> Tuple[int, int]:
+        root = self.root_of[node_id]
+        return self.tin[root], self.tout[root]
+
+    def _unserved_components(self, node_ids) -> List[int]:
+        """Korisničke lokacije u komponentama zadanih čvorova koje nemaju servisnu lokaciju."""
+        cut, seen = [], set()
+        for node_id in node_ids:
+            if node_id not in self.root_of or self.root_of[node_id] in seen:
+                continue
+            seen.add(self.root_of[node_id])
+            start, end = self._component(node_id)
+            if self._servisne(start, end) == 0:
+                cut += self._customers(start, end)
+        return cut
+
+    def _region(self, node_id: int, start: int, end: int, separated):
+        """Regija čvora nakon kvara: indeks odvojenog podstabla, REST ili druga komponenta."""
+        t = self.tin[node_id]
+        if not start <= t <= end:
+            return ("komponenta", self.root_of[node_id])
+        for position, (lo, hi) in enumerate(separated):
+            if lo <= t <= hi:
+                return position
+        return REST
+
+    def _served(self, start: int, end: int, separated, backups, failed: Optional[int] = None):
+        """Vraća provjeru ima li regija nakon kvara servisnu lokaciju.
+
+        Kvar dijeli komponentu [start, end] na podstabla `separated` i ostatak
+        (bez palog čvora `failed`); rezerve iz `backups` koje se tada uključe
+        spajaju regije međusobno i s drugim komponentama.
+        """
+        failed_serves = failed is not None and self.nodes[failed].tip == SERVISNA
+
+        def count(key) -> int:
+            if key == REST:
+                return (self._servisne(start, end) - failed_serves
+                        - sum(self._servisne(*sub) for sub in separated))
+            if isinstance(key, int):
+                return self._servisne(*separated[key])
+            return self._servisne(*self._component(key[1]))
+
+        parent = {}
+
+        def find(key):
+            parent.setdefault(key, key)
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for edge in backups:
+            if failed in (edge.a, edge.b):
+                continue
+            parent[find(self._region(edge.a, start, end, separated))] = find(
+                self._region(edge.b, start, end, separated))
+        served_groups = {find(key) for key in list(parent) if count(key) > 0}
+        return lambda key: count(key) > 0 or find(key) in served_groups
+
+    def veza_impact(self, veza_id: int) -> Optional[dict]:
+        """Korisničke lokacije koje gube servis ako veza padne (ili su bez servisa jer je pala)."""
+        edge = self.edges.get(veza_id)
+        if edge is None:
+            return None
+        if not carries_traffic(edge, self.nodes, self.edges):
+            # veza je već izvan prometa: bez servisa su dijelovi koje bi ona spojila sa servisnim
+            ends = [edge.a, edge.b]
+            served = [self._servisne(*self._component(n)) > 0 for n in ends]
+            cut = self._unserved_components(ends) if any(served) else []
+            return {"most": False, "u_prometu": False, "lokacije": sorted(cut)}
+
+        child = self.bridge_child.get(veza_id)
+        if child is None:
+            return {"most": False, "u_prometu": True, "lokacije": []}
+        start, end = self._component(child)
+        cut = []
+        if self._servisne(start, end) > 0:
+            # komponenta se raspada na podstablo i ostatak; rezerve veze mogu ih opet spojiti
+            sub = (self.tin[child], self.tout[child])
+            served = self._served(start, end, [sub], self.backups.get(veza_id, ()))
+            if not served(0):
+                cut += self._customers(*sub)
+            if not served(REST):
+                cut += self._customers(start, end, excluded=[sub])
+        return {"most": True, "u_prometu": True, "lokacije": sorted(cut)}
+
+    def lokacija_impact(self, lokacija_id: int) -> Optional[dict]:
+        """Korisničke lokacije koje gube servis ako lokacija padne (ili su bez servisa jer je neaktivna)."""
+        node = self.nodes.get(lokacija_id)
+        if node is None:
+            return None
+        own = [lokacija_id] if node.korisnik_id is not None else []
+
+        if node.status == NEAKTIVNA:
+            # lokacija je već pala: bez servisa su susjedne komponente koje bi ona spojila
+            restored = {**self.nodes, lokacija_id: node._replace(status=None)}
+            neighbors = [
+                e.b if e.a == lokacija_id else e.a for e in self.incident.get(lokacija_id, ())
+                if carries_traffic(e, restored, self.edges)
+            ]
+            served = node.tip == SERVISNA or any(self._servisne(*self._component(n)) > 0 for n in neighbors)
+            cut = self._unserved_components(neighbors) if served else []
+            return {"artikulacija": False, "aktivna": False, "lokacije": sorted(set(own + cut))}
+
+        start, end = self._component(lokacija_id)
+        v = self.tin[lokacija_id]
+        is_root = self.root_of[lokacija_id] == lokacija_id
+        # podstabla djece koja bez ove lokacije ostaju odvojena od ostatka komponente
+        separated = [
+            (self.tin[c], self.tout[c]) for c in self.children.get(lokacija_id, ())
+            if is_root or self.low[c] >= v
+        ]
+        articulation = len(separated) > 1 if is_root else bool(separated)
+        if self._servisne(start, end) == 0:
+            # komponenta ionako nema servisnu lokaciju
+            return {"artikulacija": articulation, "aktivna": True, "lokacije": []}
+
+        cut = list(own)
+        # s lokacijom padaju i njene veze, pa se uključuju njihove rezerve
+        backups = [b for e in self.incident.get(lokacija_id, ()) for b in self.backups.get(e.id, ())]
+        served = self._served(start, end, separated, backups, failed=lokacija_id)
+        for position, sub in enumerate(separated):
+            if not served(position):
+                cut += self._customers(*sub)
+        if not served(REST):
+            cut += self._customers(start, end, excluded=separated + [(v, v)])
+        return {"artikulacija": articulation, "aktivna": True, "lokacije": sorted(set(cut))}
+
+
+class ImpactIndex:
+    """Drži zadnji potpuni ImpactSnapshot i gradi novi nakon promjena.
+
+    Promjena zakaže izgradnju u pozadini; upit koji stigne prije nje čeka
+    izgradnju u `current()`. `stale()` kaže je li topologija promijenjena nakon
+    kopije iz koje je snapshot izgrađen (moguće samo za promjenu usred upita).
+    `source()` vraća (seq, veze, lokacije) kao konzistentnu kopiju topologije.
+    """
+
+    def __init__(self, source: Callable[[], Tuple[Optional[int], List[Edge], dict]]):
+        self.source = source
+        self._snapshot: Optional[ImpactSnapshot] = None
+        # _schedule_lock je kratak (zove se iz puta upisa), _build_lock traje cijelu izgradnju
+        self._schedule_lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._requested = 0
+        self._not_before = 0.0
+        self.builds = 0
+
+    # --- održavanje ---
+
+    def schedule_rebuild(self):
+        """Poziva se nakon promjene topologije; ne čeka izgradnju koja je u tijeku."""
+        with self._schedule_lock:
+            self._requested += 1
+            self._start_timer(REBUILD_DELAY)
+
+    def _start_timer(self, delay: float):
+        if self._timer is None:
+            delay = max(delay, self._not_before - time.monotonic())
+            self._timer = threading.Timer(delay, self._background_rebuild)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _background_rebuild(self):
+        with self._schedule_lock:
+            self._timer = None
+        try:
+            with self._build_lock:
+                if self._snapshot is not None and self._snapshot.requested == self._requested:
+                    return
+                if time.monotonic() < self._not_before:
+                    with self._schedule_lock:
+                        self._start_timer(0.0)
+                    return
+                self._rebuild()
+        except Exception:
+            logger.exception("Impact index rebuild failed")
+
+    def _rebuild(self):
+        # zahtjev pročitan prije kopije: promjena između njih samo označi snapshot zastarjelim
+        requested = self._requested
+        seq, edges, nodes = self.source()
+        started = time.monotonic()
+        self._snapshot = ImpactSnapshot(edges, nodes, seq, requested)
+        self.builds += 1
+        # tijekom oluje promjena izgradnje ne zauzimaju više od pola jednog CPU-a
+        self._not_before = time.monotonic() + (time.monotonic() - started)
+
+    # --- upiti ---
+
+    def current(self) -> ImpactSnapshot:
+        """Snapshot sa svim dosad prijavljenim promjenama; ako ga nema, gradi ga.
+
+        Izgradnja ide kroz _build_lock, pa istovremeni upiti (i pozadinska
+        izgradnja) čekaju istu i ne grade svaki svoju.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self.stale(snapshot):
+            with self._build_lock:
+                if self._snapshot is None or self.stale(self._snapshot):
+                    self._rebuild()
+                snapshot = self._snapshot
+        return snapshot
+
+    def stale(self, snapshot: ImpactSnapshot) -> bool:
+        """Je li topologija promijenjena nakon kopije iz koje je snapshot izgrađen."""
+        return snapshot.requested != self._requested
@@ -4,7 +4,6 @@ Skripta za punjenje baze s test podatcima
 """
 
 import requests
-import json
 from datetime import datetime, timedelta
 import random
 
@@ -260,41 +259,24 @@ demo_oprema = [
 def insert_data():
     print("🚀 Početak unosa demo podataka...")
     
-    # Unos korisnika
-    print("\n📝 Unos korisnika...")
-    for korisnik in demo_korisnici:
-        response = requests.post(f"{BASE_URL}/korisnici", json=korisnik)
-        if response.status_code == 200:
-            print(f"  ✅ Dodan korisnik: {korisnik['naziv']}")
-        else:
-            print(f"  ❌ Greška za korisnika {korisnik['naziv']}: {response.text}")
-    
-    # Unos lokacija
-    print("\n📍 Unos lokacija...")
-    for lokacija in demo_lokacije:
-        response = requests.post(f"{BASE_URL}/lokacije", json=lokacija)
-        if response.status_code == 200:
-            print(f"  ✅ Dodana lokacija: {lokacija['naziv']}")
-        else:
-            print(f"  ❌ Greška za lokaciju {lokacija['naziv']}: {response.text}")
-    
-    # Unos veza
-    print("\n🔗 Unos veza...")
-    for i, veza in enumerate(demo_veze, 1):
-        response = requests.post(f"{BASE_URL}/veze", json=veza)
-        if response.status_code == 200:
-            print(f"  ✅ Dodana veza #{i}: Lokacija {veza['lokacija_a_id']} <-> Lokacija {veza['lokacija_b_id']}")
-        else:
-            print(f"  ❌ Greška za vezu #{i}: {response.text}")
-    
-    # Unos opreme
-    print("\n🔧 Unos opreme...")
-    for oprema in demo_oprema:
-        response = requests.post(f"{BASE_URL}/oprema", json=oprema)
-        if response.status_code == 200:
-            print(f"  ✅ Dodana oprema: {oprema['proizvodjac']} {oprema['model']}")
-        else:
-            print(f"  ❌ Greška za opremu {oprema['model']}: {response.text}")
+    # Svaki entitet šaljemo jednim bulk zahtjevom (jedna transakcija na serveru)
+    unos = [
+        ("korisnici", "📝 Unos korisnika...", demo_korisnici, lambda k: f"korisnik {k['naziv']}"),
+        ("lokacije", "📍 Unos lokacija...", demo_lokacije, lambda l: f"lokacija {l['naziv']}"),
+        ("veze", "🔗 Unos veza...", demo_veze, lambda v: f"veza Lokacija {v['lokacija_a_id']} <-> Lokacija {v['lokacija_b_id']}"),
+        ("oprema", "🔧 Unos opreme...", demo_oprema, lambda o: f"oprema {o['proizvodjac']} {o['model']}"),
+    ]
+    for entity, naslov, zapisi, opis in unos:
+        print(f"\n{naslov}")
+        response = requests.post(f"{BASE_URL}/{entity}/bulk", json=zapisi)
+        if response.status_code != 200:
+            print(f"  ❌ Greška za {entity}: {response.text}")
+            continue
+        result = response.json()
+        for row in result["ids"]:
+            print(f"  ✅ Dodano - {opis(zapisi[row['index']])}")
+        for row in result["errors"]:
+            print(f"  ❌ Greška - {opis(zapisi[row['index']])}: {row['error']}")
     
     # Prikaz statistike
     print("\n📊 Finalna statistika:")
@@ -0,0 +1,180 @@
+"""
+Hitronet EMS - pozadinski poslovi (exporti, izvještaji, preračunavanja)
+Posao se upiše u tablicu poslova u bazi, a scheduler thread ga preuzme i
+pokrene u ograničenom poolu procesa, pa dugi posao ne drži HTTP worker.
+Nema vanjskog brokera: red čekanja je sama tablica.
+
+Scheduler poštuje ukupan broj procesa i ograničenje po vrsti posla. Posao se
+preuzima atomskim UPDATE-om, pa ga ni više server procesa nad istom bazom ne
+može pokrenuti dvaput; posao procesa koji je umro (bez heartbeata) vraća se
+u red. Otkazivanje je kooperativno: posao pri javljanju napretka vidi da je
+otkazan i prekida se.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, NamedTuple, Optional, Set, Tuple
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+logger = logging.getLogger("hitronet.jobs")
+
+QUEUED = "na_cekanju"
+RUNNING = "u_tijeku"
+CANCELLING = "otkazivanje"
+DONE = "zavrsen"
+FAILED = "neuspio"
+CANCELLED = "otkazan"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobType(NamedTuple):
+    # handler(context, **parametri) se izvršava u procesu iz poola
+    handler: Callable
+    # najviše ovoliko poslova te vrste istovremeno
+    limit: int
+    # provjera parametara pri predaji; baca ValueError
+    validate: Callable[[dict], dict]
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """Predaje se handleru: putanja datoteke rezultata i javljanje napretka.
+
+    `report(napredak)` upisuje napredak i vraća trenutni status posla; zove se
+    najviše jednom u `interval` sekundi.
+    """
+
+    def __init__(self, job_id: int, path: str, report: Callable[[float], str], interval: float = 0.5):
+        self.job_id = job_id
+        self.path = path
+        self._report = report
+        self._interval = interval
+        self._last = 0.0
+
+    def progress(self, done: float, total: float):
+        """Javlja napredak (done od total); baca JobCancelled ako je posao otkazan."""
+        now = time.monotonic()
+        if now - self._last < self._interval:
+            return
+        self._last = now
+        fraction = min(max(done / total, 0.0), 1.0) if total else 0.0
+        if self._report(fraction) == CANCELLING:
+            raise JobCancelled()
+
+
+class JobRunner:
+    """Scheduler koji poslove iz tablice šalje u pool procesa.
+
+    `claim(puni_tipovi)` atomski prebacuje najstariji posao na čekanju (koji nije
+    jedne od punih vrsta) u izvođenje i vraća (id, tip) ili None. `execute(id)`
+    je funkcija modula koja se izvršava u procesu iz poola i sama upisuje
+    rezultat. `fail(id, poruka)` bilježi posao čiji je proces pukao, a
+    `heartbeat(aktivni_id)` obnavlja heartbeat aktivnih poslova i vraća u red
+    one čiji je proces nestao. `worker_env` se upisuje u okolinu servera prije
+    pokretanja procesa: spawn ih pokreće s okolinom roditelja, a glavni modul
+    (npr. kod `python main.py`) importaju već pri startu, prije initializera.
+    """
+
+    def __init__(self, claim: Callable[[Set[str]], Optional[Tuple[int, str]]], execute: Callable[[int], None],
+                 fail: Callable[[int, str], None], heartbeat: Callable[[Set[int]], None],
+                 limits: Dict[str, int], workers: int = 2, poll_seconds: float = 1.0,
+                 worker_env: Optional[Dict[str, str]] = None):
+        self.claim = claim
+        self.execute = execute
+        self.fail = fail
+        self.heartbeat = heartbeat
+        self.limits = limits
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.worker_env = worker_env or {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._running: Dict[int, str] = {}
+        self.started = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def wake(self):
+        """Pokreće scheduler ako ne radi i odmah provjerava red."""
+        self._ensure_started()
+        self._wake.set()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="jobs", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            try:
+                with self._lock:
+                    active = set(self._running)
+                self.heartbeat(active)
+                self._dispatch()
+            except Exception:
+                logger.exception("Job scheduler failed")
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if len(self._running) >= self.workers:
+                    return
+                counts: Dict[str, int] = {}
+                for tip in self._running.values():
+                    counts[tip] = counts.get(tip, 0) + 1
+            full = {tip for tip, limit in self.limits.items() if counts.get(tip, 0) >= limit}
+            job = self.claim(full)
+            if job is None:
+                return
+            job_id, tip = job
+            with self._lock:
+                self._running[job_id] = tip
+            try:
+                future = self._get_pool().submit(self.execute, job_id)
+            except Exception as e:
+                self._finish(job_id, e)
+                continue
+            self.started += 1
+            future.add_done_callback(lambda future, job_id=job_id: self._finish(job_id, future.exception()))
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: proces iz poola ne nasljeđuje konekcije i threadove servera
+            os.environ.update(self.worker_env)
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _finish(self, job_id: int, error: Optional[BaseException]):
+        if error is not None:
+            # iznimke handlera bilježi sam posao; ovdje stižu samo one izvan njega (npr. ubijen proces)
+            self.failed += 1
+            if isinstance(error, BrokenProcessPool):
+                with self._lock:
+                    pool, self._pool = self._pool, None
+                if pool is not None:
+                    pool.shutdown(wait=False)
+            try:
+                self.fail(job_id, f"{type(error).__name__}: {error}")
+            except Exception:
+                logger.exception("Could not mark job %s as failed", job_id)
+        with self._lock:
+            self._running.pop(job_id, None)
+        self._wake.set()
@@ -3,89 +3,913 @@ Hitronet EMS - Minimalni MVP CRUD Sustav
 Backend: FastAPI + SQLite + SQLAlchemy
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, DateTime, Text
-from sqlalchemy.orm import declarative_base, sessionmaker, Session, relationship
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from sqlalchemy import create_engine, event, select, text, update, Column, Integer, String, Float, ForeignKey, DateTime, Text, MetaData, Table, Index, and_, or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import IntegrityError, OperationalError, SQLAlchemyError
+from sqlalchemy.orm import declarative_base, sessionmaker, Session, relationship, joinedload, selectinload, RelationshipDirection
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Dict, List, Optional
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import asyncio
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import json
+import logging
+import math
+import orjson
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+from capacity import CapacityIndex, Link, Site
+from group_commit import GroupCommitter
+from jobs import CANCELLED, CANCELLING, DONE, FAILED, FINISHED, QUEUED, RUNNING, JobCancelled, JobContext, JobRunner, JobType
+from impact import ImpactIndex, ImpactSnapshot
+from metrics import Registry
+from reports import TABLES as REPORT_TABLES, Reports, check_columns
+from topology import ACTIVE_STATUSES, Edge, Node, Topology
+
+logger = logging.getLogger("hitronet")
 
 # === DATABASE SETUP ===
-SQLALCHEMY_DATABASE_URL = "sqlite:///./hitronet.db"
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+SQLALCHEMY_DATABASE_URL = os.environ.get("HITRONET_DB_URL", "sqlite:///./hitronet.db")
+DB_PROFILE = os.environ.get("HITRONET_DB_PROFILE", "production")
+
+DB_PROFILES = {
+    # Ponašanje prije uvođenja profila: rollback journal, zajednički pool za čitanje i pisanje
+    "legacy": {
+        "pragmas": {},
+        "pool_size": 5,
+        "max_overflow": 10,
+        "read_only_pool": False,
+        "single_writer": False,
+    },
+    # WAL: čitatelji rade nad snapshotom i nikad ne čekaju pisca;
+    # sve pisanje ide kroz jednu konekciju pa nema "database is locked"
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "cache_size": -64000,  # 64 MB
+            "mmap_size": 268435456,  # 256 MB
+            "busy_timeout": 5000,
+            "foreign_keys": "ON",
+            "temp_store": "MEMORY",
+        },
+        "pool_size": int(os.environ.get("HITRONET_DB_POOL_SIZE", 8)),
+        "max_overflow": 4,
+        "read_only_pool": True,
+        "single_writer": True,
+    },
+}
+
+def _read_only_url(url):
+    """Isti file otvoren preko SQLite URI-ja s mode=ro; None za in-memory baze."""
+    url = make_url(url)
+    if not url.database or url.database == ":memory:":
+        return None
+    return url.set(database=f"file:{url.database}?mode=ro", query={**url.query, "uri": "true"})
+
+def create_engines(url: str = SQLALCHEMY_DATABASE_URL, profile: str = DB_PROFILE, asynchronous: bool = False):
+    """Vraća (engine za pisanje, engine za čitanje) prema profilu iz DB_PROFILES.
+
+    S `asynchronous=True` vraća AsyncEngine-e (url tada treba koristiti
+    sqlite+aiosqlite driver); pragme i BEGIN se postavljaju isto.
+    """
+    settings = DB_PROFILES[profile]
+    pragmas = settings["pragmas"]
+    if asynchronous:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import AsyncAdaptedQueuePool
+        factory = lambda url, **kwargs: create_async_engine(url, poolclass=AsyncAdaptedQueuePool, **kwargs)
+    else:
+        factory = create_engine
+
+    def configure(engine, pragmas, begin):
+        target = engine.sync_engine if asynchronous else engine
+
+        # pysqlite sam odlučuje kada će poslati BEGIN, što lomi SAVEPOINT-e;
+        # transakcije zato otvaramo eksplicitno (preporuka iz SQLAlchemy dokumentacije)
+        @event.listens_for(target, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+        @event.listens_for(target, "begin")
+        def _on_begin(conn):
+            conn.exec_driver_sql(begin)
+        return engine
+
+    connect_args = {"check_same_thread": False}
+    if settings["single_writer"]:
+        # Jedna konekcija za pisanje: pisci čekaju na poolu, ne na SQLite locku,
+        # a BEGIN IMMEDIATE odmah uzima write lock pa nema deadlocka kod upgradea
+        write_engine = factory(url, connect_args=connect_args, pool_size=1, max_overflow=0, pool_timeout=30)
+        write_begin = "BEGIN IMMEDIATE"
+    else:
+        write_engine = factory(url, connect_args=connect_args,
+                               pool_size=settings["pool_size"], max_overflow=settings["max_overflow"])
+        write_begin = "BEGIN"
+    configure(write_engine, pragmas, write_begin)
+
+    read_url = _read_only_url(url) if settings["read_only_pool"] else None
+    if read_url is None:
+        return write_engine, write_engine
+    # journal_mode je svojstvo datoteke i read-only konekcija ga ne smije mijenjati
+    read_pragmas = {name: value for name, value in pragmas.items() if name != "journal_mode"}
+    read_engine = factory(read_url, connect_args=connect_args,
+                          pool_size=settings["pool_size"], max_overflow=settings["max_overflow"])
+    configure(read_engine, read_pragmas, "BEGIN")
+    return write_engine, read_engine
+
+engine, read_engine = create_engines()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 # === MODELS ===
 class Korisnik(Base):
     __tablename__ = "korisnici"
+    __table_args__ = (
+        # kombinirani filteri i "najnoviji po statusu" (vidi FILTER_FIELDS)
+        Index("ix_korisnici_tip_korisnika_status", "tip_korisnika", "status"),
+        Index("ix_korisnici_status_created_at", "status", "created_at"),
+        # filter + sort (vidi benchmarks.query_plans): bez njih rijetka vrijednost
+        # filtera prolazi cijeli indeks sortiranja
+        Index("ix_korisnici_status_naziv", "status", "naziv"),
+        Index("ix_korisnici_status_oib", "status", "oib"),
+        Index("ix_korisnici_tip_korisnika_created_at", "tip_korisnika", "created_at"),
+        Index("ix_korisnici_tip_korisnika_naziv", "tip_korisnika", "naziv"),
+        Index("ix_korisnici_tip_korisnika_oib", "tip_korisnika", "oib"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     oib = Column(String, unique=True, index=True)
     naziv = Column(String, index=True)
     adresa = Column(String)
-    tip_korisnika = Column(String)  # fizicki/pravni
+    tip_korisnika = Column(String, index=True)  # fizicki/pravni
     paket_usluga = Column(String)
-    status = Column(String)  # aktivan/neaktivan
+    status = Column(String, index=True)  # aktivan/neaktivan
     kontakt_admin = Column(String)
     kontakt_tehnika = Column(String)
     datum_ugovora = Column(DateTime, default=datetime.now)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    seq = Column(Integer, index=True)  # slijed zadnje promjene, postavlja trigger
     
     lokacije = relationship("Lokacija", back_populates="korisnik")
 
 class Lokacija(Base):
     __tablename__ = "lokacije"
+    __table_args__ = (
+        Index("ix_lokacije_tip_status", "tip", "status"),
+        Index("ix_lokacije_status_created_at", "status", "created_at"),
+        Index("ix_lokacije_status_naziv", "status", "naziv"),
+        Index("ix_lokacije_tip_created_at", "tip", "created_at"),
+        Index("ix_lokacije_tip_naziv", "tip", "naziv"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     naziv = Column(String, index=True)
-    tip = Column(String)  # korisnik/servisna/pomocna
+    tip = Column(String, index=True)  # korisnik/servisna/pomocna
     adresa = Column(String)
     latitude = Column(Float)
     longitude = Column(Float)
-    status = Column(String)  # planirana/aktivna/neaktivna
-    korisnik_id = Column(Integer, ForeignKey("korisnici.id"), nullable=True)
-    created_at = Column(DateTime, default=datetime.now)
+    status = Column(String, index=True)  # planirana/aktivna/neaktivna
+    korisnik_id = Column(Integer, ForeignKey("korisnici.id"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    seq = Column(Integer, index=True)  # slijed zadnje promjene, postavlja trigger
     
     korisnik = relationship("Korisnik", back_populates="lokacije")
     oprema = relationship("Oprema", back_populates="lokacija")
 
 class Veza(Base):
     __tablename__ = "veze"
+    __table_args__ = (
+        Index("ix_veze_tip_status", "tip", "status"),
+        Index("ix_veze_status_created_at", "status", "created_at"),
+        Index("ix_veze_tip_created_at", "tip", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    lokacija_a_id = Column(Integer, ForeignKey("lokacije.id"))
-    lokacija_b_id = Column(Integer, ForeignKey("lokacije.id"))
-    tip = Column(String)  # optika/bakar/wireless/P2P/P2MP
+    lokacija_a_id = Column(Integer, ForeignKey("lokacije.id"), index=True)
+    lokacija_b_id = Column(Integer, ForeignKey("lokacije.id"), index=True)
+    tip = Column(String, index=True)  # optika/bakar/wireless/P2P/P2MP
     kapacitet_vlakana = Column(Integer)
     kapacitet_parica = Column(Integer)
     brzina_mbps = Column(Integer)
-    status = Column(String)  # aktivan/planiran/u_kvaru
+    status = Column(String, index=True)  # aktivan/planiran/u_kvaru
     redundantna_veza_id = Column(Integer, ForeignKey("veze.id"), nullable=True)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    seq = Column(Integer, index=True)  # slijed zadnje promjene, postavlja trigger
     
     lokacija_a = relationship("Lokacija", foreign_keys=[lokacija_a_id])
     lokacija_b = relationship("Lokacija", foreign_keys=[lokacija_b_id])
 
 class Oprema(Base):
     __tablename__ = "oprema"
+    __table_args__ = (
+        Index("ix_oprema_tip_status", "tip", "status"),
+        Index("ix_oprema_status_created_at", "status", "created_at"),
+        Index("ix_oprema_tip_created_at", "tip", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    lokacija_id = Column(Integer, ForeignKey("lokacije.id"))
-    tip = Column(String)  # switch/router/ONT/antena
+    lokacija_id = Column(Integer, ForeignKey("lokacije.id"), index=True)
+    tip = Column(String, index=True)  # switch/router/ONT/antena
     proizvodjac = Column(String)
     model = Column(String)
     serijski_broj = Column(String, unique=True)
     inventurni_broj = Column(String)
-    status = Column(String)  # u_upotrebi/rezerva/otpisana
+    status = Column(String, index=True)  # u_upotrebi/rezerva/otpisana
     datum_instalacije = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.now)
+    created_at = Column(DateTime, default=datetime.now, index=True)
+    seq = Column(Integer, index=True)  # slijed zadnje promjene, postavlja trigger
     
     lokacija = relationship("Lokacija", back_populates="oprema")
 
-# Kreiraj tablice
-Base.metadata.create_all(bind=engine)
+class Brojac(Base):
+    """Brojači za /stats, održavaju ih SQLite triggeri (vidi ensure_stats_triggers).
+
+    Ukupan broj redaka entiteta zapisan je s praznim `polje` i `vrijednost`.
+    """
+    __tablename__ = "brojaci"
+
+    entitet = Column(String, primary_key=True)
+    polje = Column(String, primary_key=True)
+    vrijednost = Column(String, primary_key=True)
+    broj = Column(Integer, nullable=False, default=0)
+
+class Verzija(Base):
+    """Verzija tablice za HTTP cache; raste sa svakim upisanim retkom (vidi ensure_version_triggers)."""
+    __tablename__ = "verzije"
+
+    tablica = Column(String, primary_key=True)
+    verzija = Column(Integer, nullable=False, default=0)
+    promijenjeno = Column(Float)  # unix vrijeme zadnje promjene
+
+class Brisanje(Base):
+    """Tombstone obrisanog retka za /changes; upisuje ga trigger pri brisanju."""
+    __tablename__ = "brisanja"
+
+    tablica = Column(String, primary_key=True)
+    row_id = Column(Integer, primary_key=True)
+    seq = Column(Integer, nullable=False, index=True)
+
+class Povijest(Base):
+    """Povijest promjena redaka (vidi ensure_history_triggers); upisuju je triggeri.
+
+    `podaci` je JSON: cijeli redak za insert i snapshot, samo promijenjene
+    kolone za update, NULL za delete.
+    """
+    __tablename__ = "povijest"
+    __table_args__ = (
+        Index("ix_povijest_redak", "tablica", "row_id", "id"),
+        # zadnje puno stanje retka prije zadanog trenutka, za ?as_of=
+        Index("ix_povijest_stanja", "tablica", "row_id", "vrijeme", sqlite_where=text("operacija != 'update'")),
+        Index("ix_povijest_vrijeme", "vrijeme"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tablica = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    operacija = Column(String, nullable=False)  # insert/update/delete/snapshot
+    vrijeme = Column(Float, nullable=False)  # unix sekunde
+    podaci = Column(Text)
+
+class Posao(Base):
+    """Pozadinski posao (vidi jobs.py); tablica je ujedno i red čekanja."""
+    __tablename__ = "poslovi"
+    __table_args__ = (
+        # scheduler traži najstariji posao na čekanju
+        Index("ix_poslovi_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    tip = Column(String, nullable=False)
+    parametri = Column(Text, nullable=False, default="{}")  # JSON
+    status = Column(String, nullable=False, default=QUEUED)
+    napredak = Column(Float, nullable=False, default=0.0)  # 0-1
+    greska = Column(Text)
+    rezultat = Column(String)  # ime datoteke u JOBS_DIR
+    content_type = Column(String)
+    velicina = Column(Integer)
+    created_at = Column(DateTime, default=datetime.now)
+    pokrenut = Column(DateTime)
+    zavrsen = Column(DateTime)
+    azurirano = Column(Float)  # unix vrijeme zadnjeg heartbeata
+
+# === STATISTIKA ===
+# Kolone po kojima /stats daje raspodjelu, po tablici
+STATS_FIELDS = {
+    "korisnici": ("status", "tip_korisnika"),
+    "lokacije": ("status", "tip"),
+    "veze": ("status", "tip"),
+    "oprema": ("status", "tip"),
+}
+
+def _stats_values(table: str, row: str, delta: int, with_total: bool = True) -> str:
+    values = [f"('{table}', '', '', {delta})"] if with_total else []
+    values += [f"('{table}', '{field}', COALESCE({row}.{field}, ''), {delta})" for field in STATS_FIELDS[table]]
+    return (
+        "INSERT INTO brojaci (entitet, polje, vrijednost, broj) VALUES "
+        + ", ".join(values)
+        + " ON CONFLICT (entitet, polje, vrijednost) DO UPDATE SET broj = broj + excluded.broj;"
+    )
+
+def stats_trigger_ddl(table: str) -> List[str]:
+    fields = STATS_FIELDS[table]
+    changed = " OR ".join(f"OLD.{f} IS NOT NEW.{f}" for f in fields)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS brojaci_{table}_insert AFTER INSERT ON {table} BEGIN "
+        f"{_stats_values(table, 'NEW', 1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS brojaci_{table}_delete AFTER DELETE ON {table} BEGIN "
+        f"{_stats_values(table, 'OLD', -1)} END",
+        f"CREATE TRIGGER IF NOT EXISTS brojaci_{table}_update AFTER UPDATE OF {', '.join(fields)} ON {table} "
+        f"WHEN {changed} BEGIN "
+        f"{_stats_values(table, 'OLD', -1, with_total=False)} "
+        f"{_stats_values(table, 'NEW', 1, with_total=False)} END",
+    ]
+
+def rebuild_stats(connection):
+    """Puni brojače iz tablica jednim agregatnim upitom."""
+    parts = []
+    for table, fields in STATS_FIELDS.items():
+        parts.append(f"SELECT '{table}', '', '', COUNT(*) FROM {table}")
+        parts += [
+            f"SELECT '{table}', '{field}', COALESCE({field}, ''), COUNT(*) FROM {table} GROUP BY 3"
+            for field in fields
+        ]
+    connection.execute(text("DELETE FROM brojaci"))
+    connection.execute(text(
+        "INSERT INTO brojaci (entitet, polje, vrijednost, broj) " + " UNION ALL ".join(parts)
+    ))
+
+def ensure_stats_triggers(target_engine):
+    """Kreira triggere koji nedostaju; ako ih je trebalo kreirati, brojači se pune iznova."""
+    names = {f"brojaci_{table}_{op}" for table in STATS_FIELDS for op in ("insert", "delete", "update")}
+    with target_engine.begin() as connection:
+        existing = set(connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'brojaci_%'"
+        )).scalars())
+        if names <= existing:
+            return
+        for table in STATS_FIELDS:
+            for ddl in stats_trigger_ddl(table):
+                connection.execute(text(ddl))
+        rebuild_stats(connection)
+
+# === VERZIJE TABLICA ===
+# Svaki upisani redak dobiva `seq` iz globalnog slijeda promjena (redak '*' u
+# tablici verzije), a obrisani redak ostavlja tombstone u tablici brisanja.
+# Uz to raste verzija same tablice, koju koristi HTTP cache.
+VERSIONED_TABLES = ("korisnici", "lokacije", "veze", "oprema")
+SEQUENCE_ROW = "*"
+# trenutno vrijeme kao unix sekunde, s milisekundama
+SQL_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+# kolone podataka, bez id-a i seq-a; samo njihova promjena je promjena retka
+DATA_COLUMNS = {
+    table: tuple(column.name for column in model.__table__.columns if column.name not in ("id", "seq"))
+    for table, model in (("korisnici", Korisnik), ("lokacije", Lokacija), ("veze", Veza), ("oprema", Oprema))
+}
+_NEXT_SEQ = f"UPDATE verzije SET verzija = verzija + 1 WHERE tablica = '{SEQUENCE_ROW}';"
+_CURRENT_SEQ = f"(SELECT verzija FROM verzije WHERE tablica = '{SEQUENCE_ROW}')"
+
+def row_changed(table: str) -> str:
+    """WHEN uvjet triggera: UPDATE je promijenio barem jednu kolonu podataka."""
+    return "(" + " OR ".join(f"OLD.{c} IS NOT NEW.{c}" for c in DATA_COLUMNS[table]) + ")"
+
+def version_trigger_ddl(table: str) -> List[str]:
+    bump = (
+        f"UPDATE verzije SET verzija = verzija + 1, promijenjeno = {SQL_NOW} "
+        f"WHERE tablica = '{table}'; {_NEXT_SEQ}"
+    )
+    stamp = f"UPDATE {table} SET seq = {_CURRENT_SEQ} WHERE id = NEW.id;"
+    return [
+        f"CREATE TRIGGER verzije_{table}_insert AFTER INSERT ON {table} BEGIN {bump} {stamp} "
+        f"DELETE FROM brisanja WHERE tablica = '{table}' AND row_id = NEW.id; END",
+        # WHEN preskače UPDATE kojim sam trigger upisuje seq i izmjene bez stvarne promjene
+        # (npr. isti upsert ponovljen), pa one ne troše seq i ne poništavaju HTTP cache
+        f"CREATE TRIGGER verzije_{table}_update AFTER UPDATE ON {table} "
+        f"WHEN NEW.seq IS OLD.seq AND {row_changed(table)} BEGIN {bump} {stamp} END",
+        f"CREATE TRIGGER verzije_{table}_delete AFTER DELETE ON {table} BEGIN {bump} "
+        f"INSERT INTO brisanja (tablica, row_id, seq) VALUES ('{table}', OLD.id, {_CURRENT_SEQ}) "
+        "ON CONFLICT (tablica, row_id) DO UPDATE SET seq = excluded.seq; END",
+    ]
+
+def ensure_version_triggers(target_engine):
+    """Kreira triggere iznova (ne ovise o podacima) i daje seq recima koji ga nemaju."""
+    with target_engine.begin() as connection:
+        for table in (SEQUENCE_ROW,) + VERSIONED_TABLES:
+            connection.execute(text(
+                f"INSERT OR IGNORE INTO verzije (tablica, verzija, promijenjeno) VALUES ('{table}', 0, {SQL_NOW})"
+            ))
+        for table in VERSIONED_TABLES:
+            for op in ("insert", "update", "delete"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS verzije_{table}_{op}"))
+            # retci iz vremena prije slijeda dobivaju seq iza trenutnog kraja slijeda
+            connection.execute(text(
+                f"UPDATE {table} SET seq = id + {_CURRENT_SEQ} WHERE seq IS NULL"
+            ))
+            connection.execute(text(
+                f"UPDATE verzije SET verzija = (SELECT MAX(seq) FROM {table}) "
+                f"WHERE tablica = '{SEQUENCE_ROW}' AND verzija < (SELECT MAX(seq) FROM {table})"
+            ))
+            for ddl in version_trigger_ddl(table):
+                connection.execute(text(ddl))
+
+# === POVIJEST PROMJENA ===
+# Triggeri uz svaki upis dodaju redak u tablicu povijest: cijeli redak kod
+# unosa, samo promijenjene kolone kod izmjene i oznaku kod brisanja. Nakon
+# svakih HISTORY_SNAPSHOT_EVERY izmjena retka upisuje se i snapshot cijelog
+# retka, pa stanje u bilo kojem trenutku traži najviše toliko delta.
+# Redak bez povijesti (npr. iz bulk uvoza) pri prvoj izmjeni dobiva početni
+# snapshot sa starim vrijednostima, s vremenom iz created_at.
+HISTORY_SNAPSHOT_EVERY = 32
+HISTORY_RETENTION_DAYS = int(os.environ.get("HITRONET_HISTORY_RETENTION_DAYS", "365"))
+HISTORY_MAX_LIMIT = 1000
+HISTORY_COMPACT_BATCH = 500
+# created_at je lokalno vrijeme servera (datetime.now), a povijest je u UTC
+_SQL_LOCAL_TIME = "(julianday({}, 'utc') - 2440587.5) * 86400.0"
+
+def _history_state(table: str, row: str) -> str:
+    return "json_object(" + ", ".join(f"'{c}', {row}.{c}" for c in DATA_COLUMNS[table]) + ")"
+
+def _history_baseline(table: str) -> str:
+    """Početni snapshot za redak koji još nema povijest."""
+    return (
+        f"INSERT INTO povijest (tablica, row_id, operacija, vrijeme, podaci) "
+        f"SELECT '{table}', OLD.id, 'snapshot', COALESCE({_SQL_LOCAL_TIME.format('OLD.created_at')}, 0), "
+        f"{_history_state(table, 'OLD')} "
+        f"WHERE NOT EXISTS (SELECT 1 FROM povijest WHERE tablica = '{table}' AND row_id = OLD.id);"
+    )
+
+def history_trigger_ddl(table: str) -> List[str]:
+    columns = DATA_COLUMNS[table]
+    # json_remove izbacuje nepromijenjene kolone; '$._' ne postoji pa je no-op
+    diff = (
+        f"json_remove({_history_state(table, 'NEW')}, "
+        + ", ".join(f"CASE WHEN OLD.{c} IS NEW.{c} THEN '$.{c}' ELSE '$._' END" for c in columns)
+        + ")"
+    )
+    last_updates = (
+        f"(SELECT COUNT(*) FROM (SELECT operacija FROM povijest WHERE tablica = '{table}' AND row_id = NEW.id "
+        f"ORDER BY id DESC LIMIT {HISTORY_SNAPSHOT_EVERY}) WHERE operacija = 'update')"
+    )
+    return [
+        f"CREATE TRIGGER povijest_{table}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO povijest (tablica, row_id, operacija, vrijeme, podaci) "
+        f"VALUES ('{table}', NEW.id, 'insert', {SQL_NOW}, {_history_state(table, 'NEW')}); END",
+        # WHEN preskače UPDATE kojim trigger verzija upisuje seq
+        f"CREATE TRIGGER povijest_{table}_update AFTER UPDATE ON {table} WHEN {row_changed(table)} BEGIN "
+        f"{_history_baseline(table)} "
+        f"INSERT INTO povijest (tablica, row_id, operacija, vrijeme, podaci) "
+        f"VALUES ('{table}', NEW.id, 'update', {SQL_NOW}, {diff}); "
+        f"INSERT INTO povijest (tablica, row_id, operacija, vrijeme, podaci) "
+        f"SELECT '{table}', NEW.id, 'snapshot', {SQL_NOW}, {_history_state(table, 'NEW')} "
+        f"WHERE {last_updates} = {HISTORY_SNAPSHOT_EVERY}; END",
+        f"CREATE TRIGGER povijest_{table}_delete AFTER DELETE ON {table} BEGIN "
+        f"{_history_baseline(table)} "
+        f"INSERT INTO povijest (tablica, row_id, operacija, vrijeme, podaci) "
+        f"VALUES ('{table}', OLD.id, 'delete', {SQL_NOW}, NULL); END",
+    ]
+
+def ensure_history_triggers(target_engine):
+    """Kreira triggere iznova, jer ovise o kolonama modela (ne o podacima)."""
+    with target_engine.begin() as connection:
+        for table in DATA_COLUMNS:
+            for op in ("insert", "update", "delete"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS povijest_{table}_{op}"))
+            for ddl in history_trigger_ddl(table):
+                connection.execute(text(ddl))
+
+def fold_history(state: Optional[dict], operacija: str, podaci: Optional[str]) -> Optional[dict]:
+    """Stanje retka nakon jednog zapisa povijesti."""
+    if operacija == "delete":
+        return None
+    if operacija == "update":
+        return {**(state or {}), **json.loads(podaci)}
+    return json.loads(podaci)
+
+def history_state(connection, table: str, row_id: int, at: float):
+    """Stanje retka u trenutku `at` iz najbližeg punog stanja i delta nakon njega.
+
+    Vraća (postoji_povijest, stanje); stanje je None ako redak tada nije postojao.
+    """
+    full = connection.execute(text(
+        "SELECT id, operacija, podaci FROM povijest WHERE tablica = :table AND row_id = :row_id "
+        "AND operacija != 'update' AND vrijeme <= :at ORDER BY vrijeme DESC, id DESC LIMIT 1"
+    ), {"table": table, "row_id": row_id, "at": at}).first()
+    if full is None:
+        exists = connection.execute(text(
+            "SELECT 1 FROM povijest WHERE tablica = :table AND row_id = :row_id LIMIT 1"
+        ), {"table": table, "row_id": row_id}).first() is not None
+        return exists, None
+    state = fold_history(None, full.operacija, full.podaci)
+    deltas = connection.execute(text(
+        "SELECT operacija, vrijeme, podaci FROM povijest WHERE tablica = :table AND row_id = :row_id "
+        "AND id > :id ORDER BY id"
+    ), {"table": table, "row_id": row_id, "id": full.id})
+    for operacija, vrijeme, podaci in deltas:
+        # iza sljedećeg punog stanja ili trenutka `at` nema ništa što treba
+        if vrijeme > at or operacija != "update":
+            break
+        state = fold_history(state, operacija, podaci)
+    deltas.close()
+    return True, state
+
+def compact_history(connection, table: str, row_id: int, cutoff: float) -> int:
+    """Zapise starije od `cutoff` sažima u jedan snapshot stanja u tom trenutku; vraća broj obrisanih.
+
+    Snapshot zauzima mjesto zadnjeg starog zapisa, pa redoslijed ostaje isti.
+    Redak koji je prije `cutoff` obrisan gubi staru povijest potpuno.
+    """
+    old = connection.execute(text(
+        "SELECT id, operacija, podaci FROM povijest WHERE tablica = :table AND row_id = :row_id "
+        "AND vrijeme < :cutoff ORDER BY id"
+    ), {"table": table, "row_id": row_id, "cutoff": cutoff}).all()
+    if not old or (len(old) == 1 and old[0].operacija in ("insert", "snapshot")):
+        return 0
+    state = None
+    for entry in old:
+        state = fold_history(state, entry.operacija, entry.podaci)
+    last = old[-1].id
+    params = {"table": table, "row_id": row_id, "last": last}
+    if state is None:
+        connection.execute(text(
+            "DELETE FROM povijest WHERE tablica = :table AND row_id = :row_id AND id <= :last"
+        ), params)
+        return len(old)
+    connection.execute(text(
+        "UPDATE povijest SET operacija = 'snapshot', podaci = :podaci WHERE id = :last"
+    ), {**params, "podaci": json.dumps(state, ensure_ascii=False)})
+    connection.execute(text(
+        "DELETE FROM povijest WHERE tablica = :table AND row_id = :row_id AND id < :last"
+    ), params)
+    return len(old) - 1
+
+# === PROSTORNI INDEKS ===
+# R*Tree nad koordinatama lokacija; nije ORM model pa ga create_all ne dira.
+# R*Tree čuva 32-bitne floatove zaokružene prema van, pa rezultate uvijek
+# dodatno filtriramo po stvarnim latitude/longitude kolonama.
+lokacije_rtree = Table(
+    "lokacije_rtree", MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("min_lat", Float), Column("max_lat", Float),
+    Column("min_lon", Float), Column("max_lon", Float),
+)
+
+_RTREE_INSERT = (
+    "INSERT INTO lokacije_rtree (id, min_lat, max_lat, min_lon, max_lon) "
+    "SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude "
+    "WHERE NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL;"
+)
+SPATIAL_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lokacije_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    f"CREATE TRIGGER IF NOT EXISTS lokacije_rtree_insert AFTER INSERT ON lokacije BEGIN {_RTREE_INSERT} END",
+    "CREATE TRIGGER IF NOT EXISTS lokacije_rtree_update AFTER UPDATE OF latitude, longitude ON lokacije BEGIN "
+    f"DELETE FROM lokacije_rtree WHERE id = OLD.id; {_RTREE_INSERT} END",
+    "CREATE TRIGGER IF NOT EXISTS lokacije_rtree_delete AFTER DELETE ON lokacije BEGIN "
+    "DELETE FROM lokacije_rtree WHERE id = OLD.id; END",
+]
+
+def ensure_spatial_index(target_engine):
+    """Kreira R*Tree i triggere; novi indeks se puni iz postojećih lokacija."""
+    with target_engine.begin() as connection:
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'lokacije_rtree'"
+        )).first() is not None
+        for ddl in SPATIAL_DDL:
+            connection.execute(text(ddl))
+        if not exists:
+            connection.execute(text(
+                "INSERT INTO lokacije_rtree (id, min_lat, max_lat, min_lon, max_lon) "
+                "SELECT id, latitude, latitude, longitude, longitude FROM lokacije "
+                "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+            ))
+
+# === KARTA (GRID ZA TILEOVE) ===
+# Piramida ćelija u Web Mercator projekciji: za svaku razinu iz
+# GRID_LEVELS broj lokacija i suma koordinata po (ćelija, tip, status).
+# Tile z/x/y dijeli se na 2^TILE_CLUSTER_BITS x 2^TILE_CLUSTER_BITS ćelija
+# razine z + TILE_CLUSTER_BITS, pa je odgovor najviše 64 klastera. Grid
+# održavaju triggeri, kao brojače i R*Tree; dublje od TILE_CLUSTER_MAX_ZOOM
+# vraćaju se pojedinačne točke iz R*Tree-a.
+TILE_CLUSTER_BITS = 3
+TILE_CLUSTER_MAX_ZOOM = 15
+TILE_MAX_ZOOM = 22
+TILE_MAX_POINTS = 2000
+GRID_LEVELS = range(TILE_CLUSTER_BITS, TILE_CLUSTER_MAX_ZOOM + TILE_CLUSTER_BITS + 1)
+MERCATOR_MAX_LAT = 85.05112878
+
+lokacije_grid = Table(
+    "lokacije_grid", MetaData(),
+    Column("z", Integer, primary_key=True), Column("x", Integer, primary_key=True),
+    Column("y", Integer, primary_key=True), Column("tip", String, primary_key=True),
+    Column("status", String, primary_key=True), Column("broj", Integer),
+    Column("sum_lat", Float), Column("sum_lon", Float),
+)
+
+def grid_cell_sql(row: str) -> tuple:
+    """SQL izrazi za (x, y) ćelije razine `z` iz lokacije `row` (NEW, OLD ili tablica)."""
+    n = "(1 << z)"
+    lat = f"radians(max(min({row}.latitude, {MERCATOR_MAX_LAT}), -{MERCATOR_MAX_LAT}))"
+    x = f"min(CAST(({row}.longitude + 180.0) / 360.0 * {n} AS INTEGER), {n} - 1)"
+    y = f"min(max(CAST((1.0 - ln(tan({lat}) + 1.0 / cos({lat})) / pi()) / 2.0 * {n} AS INTEGER), 0), {n} - 1)"
+    return x, y
+
+def _grid_upsert(row: str, sign: int) -> str:
+    x, y = grid_cell_sql(row)
+    return (
+        "INSERT INTO lokacije_grid (z, x, y, tip, status, broj, sum_lat, sum_lon) "
+        f"SELECT z, {x}, {y}, COALESCE({row}.tip, ''), COALESCE({row}.status, ''), {sign}, "
+        f"{sign} * {row}.latitude, {sign} * {row}.longitude FROM lokacije_grid_razine "
+        f"WHERE {row}.latitude IS NOT NULL AND {row}.longitude IS NOT NULL "
+        "ON CONFLICT (z, x, y, tip, status) DO UPDATE SET broj = broj + excluded.broj, "
+        "sum_lat = sum_lat + excluded.sum_lat, sum_lon = sum_lon + excluded.sum_lon;"
+    )
+
+def _grid_cleanup(row: str) -> str:
+    # prazne ćelije ostale nakon brisanja ili pomaka lokacije
+    return (
+        f"DELETE FROM lokacije_grid WHERE broj <= 0 AND tip = COALESCE({row}.tip, '') "
+        f"AND status = COALESCE({row}.status, '');"
+    )
+
+GRID_DDL = [
+    "CREATE TABLE IF NOT EXISTS lokacije_grid_razine (z INTEGER PRIMARY KEY)",
+    "CREATE TABLE IF NOT EXISTS lokacije_grid (z INTEGER NOT NULL, x INTEGER NOT NULL, y INTEGER NOT NULL, "
+    "tip TEXT NOT NULL, status TEXT NOT NULL, broj INTEGER NOT NULL, sum_lat REAL NOT NULL, sum_lon REAL NOT NULL, "
+    "PRIMARY KEY (z, x, y, tip, status)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS ix_lokacije_grid_prazne ON lokacije_grid (tip, status) WHERE broj <= 0",
+    f"CREATE TRIGGER IF NOT EXISTS lokacije_grid_insert AFTER INSERT ON lokacije BEGIN {_grid_upsert('NEW', 1)} END",
+    "CREATE TRIGGER IF NOT EXISTS lokacije_grid_update AFTER UPDATE OF latitude, longitude, tip, status ON lokacije "
+    f"BEGIN {_grid_upsert('OLD', -1)} {_grid_upsert('NEW', 1)} {_grid_cleanup('OLD')} END",
+    "CREATE TRIGGER IF NOT EXISTS lokacije_grid_delete AFTER DELETE ON lokacije "
+    f"BEGIN {_grid_upsert('OLD', -1)} {_grid_cleanup('OLD')} END",
+]
+
+def rebuild_tile_grid(connection):
+    """Puni grid iz lokacija, jednim agregatnim upitom po razini."""
+    connection.execute(text("DELETE FROM lokacije_grid_razine"))
+    connection.execute(text("DELETE FROM lokacije_grid"))
+    connection.execute(text(
+        "INSERT INTO lokacije_grid_razine (z) VALUES " + ", ".join(f"({z})" for z in GRID_LEVELS)
+    ))
+    x, y = grid_cell_sql("l")
+    connection.execute(text(
+        "INSERT INTO lokacije_grid (z, x, y, tip, status, broj, sum_lat, sum_lon) "
+        f"SELECT z, {x}, {y}, COALESCE(l.tip, ''), COALESCE(l.status, ''), COUNT(*), SUM(l.latitude), "
+        "SUM(l.longitude) FROM lokacije AS l, lokacije_grid_razine "
+        "WHERE l.latitude IS NOT NULL AND l.longitude IS NOT NULL GROUP BY 1, 2, 3, 4, 5"
+    ))
+
+def ensure_tile_grid(target_engine):
+    """Kreira grid i triggere; puni se iznova ako je nov ili su se promijenile razine."""
+    with target_engine.begin() as connection:
+        exists = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'lokacije_grid_razine'"
+        )).first() is not None
+        levels = connection.execute(text("SELECT z FROM lokacije_grid_razine ORDER BY z")).scalars().all() \
+            if exists else []
+        if levels != list(GRID_LEVELS):
+            for name in ("insert", "update", "delete"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS lokacije_grid_{name}"))
+        for ddl in GRID_DDL:
+            connection.execute(text(ddl))
+        if levels != list(GRID_LEVELS):
+            rebuild_tile_grid(connection)
+
+# === PRETRAGA (FTS5) ===
+# External-content FTS5 tablice: tekst se ne duplicira, indeks drže triggeri.
+# remove_diacritics 2 pa "Črnomerec" nalazi i "crnomerec"; prefix indeksi
+# ubrzavaju upite "abc*" koje /search koristi za svaku riječ.
+FTS_COLUMNS = {
+    "korisnici": ("naziv", "adresa", "oib"),
+    "lokacije": ("naziv", "adresa"),
+    "oprema": ("serijski_broj", "inventurni_broj", "proizvodjac", "model"),
+}
+
+fts_tables = {
+    table: Table(
+        f"{table}_fts", MetaData(),
+        Column("rowid", Integer, primary_key=True),
+        Column(f"{table}_fts", String),  # skrivena kolona za MATCH
+        Column("rank", Float),
+        *(Column(name, String) for name in columns),
+    )
+    for table, columns in FTS_COLUMNS.items()
+}
+
+def fts_ddl(table: str) -> List[str]:
+    columns = FTS_COLUMNS[table]
+    names = ", ".join(columns)
+    new = ", ".join(f"NEW.{c}" for c in columns)
+    old = ", ".join(f"OLD.{c}" for c in columns)
+    fts = f"{table}_fts"
+    delete = f"INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.id, {old});"
+    insert = f"INSERT INTO {fts} (rowid, {names}) VALUES (NEW.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+def ensure_search_index(target_engine):
+    """Kreira FTS5 tablice i triggere; nova tablica se puni iz postojećih redaka."""
+    with target_engine.begin() as connection:
+        for table in FTS_COLUMNS:
+            exists = connection.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE name = :name"
+            ), {"name": f"{table}_fts"}).first() is not None
+            for ddl in fts_ddl(table):
+                connection.execute(text(ddl))
+            if not exists:
+                connection.execute(text(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')"))
+
+def add_missing_columns(target_engine):
+    """create_all ne mijenja postojeće tablice; nove kolone modela dodajemo s ALTER TABLE."""
+    with target_engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {row[1] for row in connection.execute(text(f"PRAGMA table_info({table.name})"))}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=target_engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+def init_db(target_engine):
+    """Kreira tablice, indekse i triggere koji nedostaju."""
+    Base.metadata.create_all(bind=target_engine)
+    add_missing_columns(target_engine)
+
+    # create_all preskače postojeće tablice, pa nove indekse dodajemo zasebno
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=target_engine, checkfirst=True)
+
+    ensure_stats_triggers(target_engine)
+    ensure_version_triggers(target_engine)
+    ensure_history_triggers(target_engine)
+    ensure_spatial_index(target_engine)
+    ensure_tile_grid(target_engine)
+    ensure_search_index(target_engine)
+
+def drop_derived_data(target_engine, tables):
+    """Briše triggere, sekundarne indekse i izvedene tablice za `tables`.
+
+    Za velike uvoze: retci se upisuju bez održavanja po retku, a init_db
+    nakon toga sve gradi iznova jednim prolazom. Ako uvoz pukne na pola,
+    isto napravi init_db pri sljedećem pokretanju servera.
+    """
+    names = []
+    for table in tables:
+        names += [f"brojaci_{table}_{op}" for op in ("insert", "delete", "update")]
+        names += [f"verzije_{table}_{op}" for op in ("insert", "update", "delete")]
+        # uvezeni retci nemaju zapis o unosu; povijest im počinje prvom izmjenom
+        names += [f"povijest_{table}_{op}" for op in ("insert", "update", "delete")]
+        if table in FTS_COLUMNS:
+            names += [f"{table}_fts_{op}" for op in ("insert", "delete", "update")]
+    if "lokacije" in tables:
+        names += [f"lokacije_{index}_{op}" for index in ("rtree", "grid") for op in ("insert", "update", "delete")]
+    with target_engine.begin() as connection:
+        for name in names:
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            # unique indeksi ostaju jer otkrivaju duplikate već pri upisu
+            for index in table.indexes:
+                if not index.unique:
+                    connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            if table.name in FTS_COLUMNS:
+                connection.execute(text(f"DROP TABLE IF EXISTS {table.name}_fts"))
+        if "lokacije" in tables:
+            for name in ("lokacije_rtree", "lokacije_grid_razine", "lokacije_grid"):
+                connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+
+# Kreiraj tablice. Procesi iz poola poslova dobivaju HITRONET_INIT_DB=0: shemu
+# je već postavio server, a init_db bi usred rada iznova stvarao triggere.
+if os.environ.get("HITRONET_INIT_DB", "1") != "0":
+    init_db(engine)
+
+# === OBAVIJESTI O PROMJENAMA ===
+# Listeneri se pozivaju tek nakon uspješnog commita u ovom procesu, s
+# (operacija, redak) za svaki zapis. In-memory indeksi ih ne koriste jer ne
+# vide upise drugih procesa (vidi IndexFeed).
+change_listeners = {}
+
+def on_change(table: str):
+    def register(listener):
+        change_listeners.setdefault(table, []).append(listener)
+        return listener
+    return register
+
+def row_dict(obj) -> dict:
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+def record_change(session: Session, table: str, op: str, row: dict):
+    """Bilježi promjenu koja nije prošla kroz ORM flush (npr. bulk insert)."""
+    session.info.setdefault("changes", []).append((table, op, row))
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty):
+        if obj.__tablename__ in change_listeners:
+            record_change(session, obj.__tablename__, "upsert", row_dict(obj))
+    for obj in session.deleted:
+        if obj.__tablename__ in change_listeners:
+            record_change(session, obj.__tablename__, "delete", {"id": obj.id})
+
+@event.listens_for(Session, "after_transaction_create")
+def _mark_savepoint(session, transaction):
+    # promjene zabilježene unutar SAVEPOINT-a koji se vrati ne smiju doći do listenera
+    if transaction.nested:
+        session.info.setdefault("savepoints", {})[transaction] = len(session.info.get("changes", ()))
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session):
+    session.info.pop("savepoints", None)
+    for table, op, row in session.info.pop("changes", ()):
+        for listener in change_listeners.get(table, ()):
+            try:
+                listener(op, row)
+            except Exception:
+                logger.exception("Change listener failed for %s", table)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop("changes", None)
+        session.info.pop("savepoints", None)
+    elif previous_transaction.nested:
+        mark = session.info.get("savepoints", {}).pop(previous_transaction, None)
+        if mark is not None:
+            del session.info.get("changes", [])[mark:]
+
+class ChangeWaiters:
+    """Budi long-poll i SSE klijente /changes nakon commita u ovom procesu.
+
+    Upise iz drugih procesa klijenti vide periodičnom provjerom
+    (CHANGES_POLL_INTERVAL), pa je ovo samo prečac do manje latencije.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}
+
+    def subscribe(self) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            self._waiters[future] = loop
+        return future
+
+    async def wait(self, future: asyncio.Future, timeout: float):
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.discard(future)
+
+    def discard(self, future: asyncio.Future):
+        with self._lock:
+            self._waiters.pop(future, None)
+
+    def notify(self, *_):
+        with self._lock:
+            waiters, self._waiters = self._waiters, {}
+        for future, loop in waiters.items():
+            loop.call_soon_threadsafe(_resolve, future)
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+change_waiters = ChangeWaiters()
+for _table in VERSIONED_TABLES:
+    on_change(_table)(change_waiters.notify)
 
 # === PYDANTIC SCHEMAS ===
 class KorisnikBase(BaseModel):
@@ -105,6 +929,7 @@ class KorisnikResponse(KorisnikBase):
     id: int
     datum_ugovora: datetime
     created_at: datetime
+    seq: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -124,10 +949,14 @@ class LokacijaCreate(LokacijaBase):
 class LokacijaResponse(LokacijaBase):
     id: int
     created_at: datetime
+    seq: Optional[int] = None
     
     class Config:
         from_attributes = True
 
+class LokacijaUdaljenost(LokacijaResponse):
+    udaljenost_km: float
+
 class VezaBase(BaseModel):
     lokacija_a_id: int
     lokacija_b_id: int
@@ -144,6 +973,7 @@ class VezaCreate(VezaBase):
 class VezaResponse(VezaBase):
     id: int
     created_at: datetime
+    seq: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -164,13 +994,391 @@ class OpremaCreate(OpremaBase):
 class OpremaResponse(OpremaBase):
     id: int
     created_at: datetime
+    seq: Optional[int] = None
     
     class Config:
         from_attributes = True
 
+class PromjeneResponse(BaseModel):
+    seq: int  # vrijednost za sljedeći ?since=
+    more: bool = False
+    korisnici: List[KorisnikResponse] = []
+    lokacije: List[LokacijaResponse] = []
+    veze: List[VezaResponse] = []
+    oprema: List[OpremaResponse] = []
+    obrisano: Dict[str, List[int]] = {}
+
+class BootstrapResponse(BaseModel):
+    seq: int  # početni ?since= za /changes
+    korisnici: List[KorisnikResponse]
+    lokacije: List[LokacijaResponse]
+    veze: List[VezaResponse]
+    oprema: List[OpremaResponse]
+    next_cursor: Dict[str, Optional[str]]  # cursor sljedeće stranice po entitetu, kao X-Next-Cursor
+    stats: dict
+
+class TileKlaster(BaseModel):
+    lat: float  # težište lokacija u ćeliji
+    lon: float
+    count: int
+    tip: Dict[str, int]
+    status: Dict[str, int]
+    id: Optional[int] = None  # samo za pojedinačne točke (zoom iznad TILE_CLUSTER_MAX_ZOOM)
+
+class TileResponse(BaseModel):
+    z: int
+    x: int
+    y: int
+    count: int
+    truncated: bool = False
+    clusters: List[TileKlaster]
+
+class PretragaResponse(BaseModel):
+    q: str
+    korisnici: List[KorisnikResponse] = []
+    lokacije: List[LokacijaResponse] = []
+    oprema: List[OpremaResponse] = []
+
+class PosaoCreate(BaseModel):
+    tip: str  # export/report/capacity/rebuild
+    parametri: dict = {}
+
+class PosaoResponse(BaseModel):
+    id: int
+    tip: str
+    parametri: dict
+    status: str
+    napredak: float
+    greska: Optional[str] = None
+    rezultat_url: Optional[str] = None
+    content_type: Optional[str] = None
+    velicina: Optional[int] = None
+    created_at: datetime
+    pokrenut: Optional[datetime] = None
+    zavrsen: Optional[datetime] = None
+
+# === METRIKE ===
+# Prometheus metrike po procesu, na /metrics. Bilježenje je par dict lookupa
+# pod lockom, pa metrike mogu ostati uključene u produkciji.
+metrike = Registry()
+HTTP_REQUESTS = metrike.counter(
+    "hitronet_http_requests_total", "HTTP zahtjevi po ruti i statusu", ("method", "route", "status"))
+HTTP_LATENCY = metrike.histogram(
+    "hitronet_http_request_duration_seconds", "Trajanje HTTP zahtjeva", ("method", "route"))
+HTTP_IN_FLIGHT = metrike.gauge("hitronet_http_requests_in_flight", "HTTP zahtjevi u obradi")
+DB_QUERIES = metrike.counter("hitronet_db_queries_total", "SQL naredbe po vrsti", ("operation",))
+DB_QUERY_LATENCY = metrike.histogram(
+    "hitronet_db_query_duration_seconds", "Trajanje SQL naredbi", ("operation",))
+DB_QUERIES_PER_REQUEST = metrike.histogram(
+    "hitronet_db_queries_per_request", "Broj SQL naredbi po HTTP zahtjevu", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 1000))
+DB_TIME_PER_REQUEST = metrike.histogram(
+    "hitronet_db_time_per_request_seconds", "Vrijeme u SQL-u po HTTP zahtjevu", ("method", "route"))
+DB_SLOW_QUERIES = metrike.counter("hitronet_db_slow_queries_total", "SQL naredbe sporije od praga")
+
+# HITRONET_SLOW_QUERY_MS=0 isključuje log sporih upita
+SLOW_QUERY_SECONDS = float(os.environ.get("HITRONET_SLOW_QUERY_MS", "250")) / 1000
+slow_query_logger = logging.getLogger("hitronet.slow_query")
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK",
+                  "SAVEPOINT", "RELEASE", "PRAGMA", "CREATE", "DROP", "ALTER"}
+EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+class RequestStats:
+    """SQL statistika jednog HTTP zahtjeva; puni je after_cursor_execute."""
+    __slots__ = ("method", "path", "queries", "seconds")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.queries = 0
+        self.seconds = 0.0
+
+# threadpool kopira kontekst, pa sync rute vide statistiku svog zahtjeva
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("hitronet_request", default=None)
+
+def _sql_operation(statement: str) -> str:
+    word = statement.lstrip()[:10].split(None, 1)
+    operation = word[0].upper() if word else ""
+    return operation if operation in SQL_OPERATIONS else "OTHER"
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._hitronet_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_hitronet_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    operation = _sql_operation(statement)
+    DB_QUERIES.inc(operation)
+    DB_QUERY_LATENCY.observe(elapsed, operation)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+    if SLOW_QUERY_SECONDS and elapsed >= SLOW_QUERY_SECONDS:
+        log_slow_query(cursor, statement, parameters, executemany, operation, elapsed, stats)
+
+def log_slow_query(cursor, statement, parameters, executemany, operation, elapsed, stats):
+    DB_SLOW_QUERIES.inc()
+    plan = ""
+    if operation in EXPLAINABLE:
+        try:
+            params = parameters[0] if executemany else parameters
+            # DBAPI konekcija direktno, da EXPLAIN ne prolazi kroz ove hookove
+            rows = cursor.connection.execute("EXPLAIN QUERY PLAN " + statement, params).fetchall()
+            plan = " | ".join(row[3] for row in rows)
+        except Exception as exc:
+            plan = f"nedostupan ({exc})"
+    slow_query_logger.warning(
+        "Spori upit %.1f ms%s: %s; parametri %r; plan: %s",
+        elapsed * 1000, f" ({stats.method} {stats.path})" if stats else "",
+        " ".join(statement.split()), parameters if not executemany else f"{len(parameters)} redaka", plan,
+    )
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        # odgovor iz cachea ne prolazi kroz router, pa rutu tražimo sami
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] is Match.FULL:
+                route = candidate
+                break
+    return route.path if route is not None else "unmatched"
+
+class MetricsMiddleware:
+    """ASGI middleware: latencija, statusi i zahtjevi u obradi po ruti, plus SQL po zahtjevu.
+
+    Ruta je predložak (npr. /korisnici/{korisnik_id}), ne stvarna putanja, pa
+    broj serija ostaje ograničen. Odgovor dobiva Server-Timing header s vremenom
+    i brojem SQL naredbi.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope["method"], scope["path"])
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing = f'db;dur={stats.seconds * 1000:.2f};desc="{stats.queries} queries"'
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            template = route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, template, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, template)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, method, template)
+            DB_TIME_PER_REQUEST.observe(stats.seconds, method, template)
+            current_request.reset(token)
+
+# === HTTP CACHE ===
+# Tablice o kojima ovise GET rute, po prvom segmentu putanje; "prvi/zadnji"
+# segment ima prednost za rute koje čitaju i druge tablice
+CACHE_DEPENDENCIES = {
+    "korisnici": ("korisnici",),
+    "lokacije": ("lokacije",),
+    "veze": ("veze",),
+    "oprema": ("oprema",),
+    "stats": VERSIONED_TABLES,
+    "bootstrap": VERSIONED_TABLES,
+    "search": ("korisnici", "lokacije", "oprema"),
+    "topology": ("lokacije", "veze"),
+    "impact": ("korisnici", "lokacije", "veze"),
+    "reports": VERSIONED_TABLES,
+    "lokacije/capacity": ("lokacije", "veze"),
+    "veze/length": ("lokacije", "veze"),
+    # povijest mijenja i sažimanje (bez nove verzije tablice), pa se ne cachea
+    **{f"{table}/history": None for table in VERSIONED_TABLES},
+}
+CACHE_MAX_ENTRIES = int(os.environ.get("HITRONET_CACHE_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.environ.get("HITRONET_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# zaglavlja odgovora koja se spremaju uz tijelo
+CACHED_HEADERS = ("content-type", "x-next-cursor")
+
+def read_versions() -> dict:
+    """Trenutne verzije tablica: tablica -> (verzija, promijenjeno)."""
+    with read_engine.connect() as connection:
+        rows = connection.execute(select(Verzija.tablica, Verzija.verzija, Verzija.promijenjeno))
+        return {tablica: (verzija, promijenjeno) for tablica, verzija, promijenjeno in rows}
+
+class ResponseCache:
+    """LRU serijaliziranih odgovora, ograničen brojem unosa i ukupnom veličinom.
+
+    Koristi se samo iz event loopa, pa ne treba lock.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, body: bytes, headers: dict):
+        if self.max_entries <= 0 or len(body) > self.max_bytes // 4:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old[0])
+        self._entries[key] = (body, headers)
+        self.size += len(body)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+response_cache = ResponseCache()
+CACHE_REQUESTS = metrike.counter(
+    "hitronet_response_cache_requests_total", "GET zahtjevi kroz HTTP cache po ishodu", ("result",))
+metrike.gauge("hitronet_response_cache_entries", "Odgovori u cacheu",
+              callback=lambda: len(response_cache._entries))
+metrike.gauge("hitronet_response_cache_bytes", "Veličina odgovora u cacheu",
+              callback=lambda: response_cache.size)
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match koristi slabu usporedbu, pa se W/ prefiks zanemaruje
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+def _not_modified_since(header: str, modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP datum ima rezoluciju sekunde
+    return int(modified) <= since.timestamp()
+
+def cache_dependencies(path: str):
+    segments = path.strip("/").split("/")
+    return CACHE_DEPENDENCIES.get(f"{segments[0]}/{segments[-1]}", CACHE_DEPENDENCIES.get(segments[0]))
+
+async def read_versions_threadpool() -> dict:
+    return await run_in_threadpool(read_versions)
+
+class ConditionalGetMiddleware:
+    """ASGI middleware: ETag/Last-Modified i cache odgovora za GET rute iz CACHE_DEPENDENCIES.
+
+    ETag je hash rute, parametara i verzija tablica o kojima ruta ovisi. Svaki
+    upis podiže verziju tablice, pa se stari ETag više ne poklapa, a ključ
+    starog unosa u cacheu više nitko ne traži i on s vremenom ispadne iz LRU-a.
+
+    `versions` je korutina koja vraća isto što i read_versions(); sinkroni app
+    čita verzije kroz threadpool, a main_async kroz AsyncEngine. Kao čisti ASGI
+    middleware u memoriju sprema samo JSON odgovore koje i cachea.
+    """
+
+    def __init__(self, app, versions=read_versions_threadpool):
+        self.app = app
+        self.versions = versions
+
+    async def __call__(self, scope, receive, send):
+        tables = cache_dependencies(scope["path"]) if scope["type"] == "http" else None
+        if tables is None or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        request = Request(scope)
+        if "as_of" in request.query_params:
+            # čita povijest, koju sažimanje mijenja bez nove verzije tablice (kao /history)
+            return await self.app(scope, receive, send)
+        if "expand" in request.query_params:
+            # ugniježđeni zapisi dolaze i iz drugih tablica
+            tables = VERSIONED_TABLES
+
+        versions = await self.versions()
+        state = tuple(versions.get(table, (0, None))[0] for table in tables)
+        params = tuple(sorted(request.query_params.multi_items()))
+        key = (request.url.path, params, state)
+        etag = '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+        modified = max((versions.get(table, (0, None))[1] or 0.0) for table in tables)
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(datetime.fromtimestamp(int(modified), timezone.utc), usegmt=True),
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, etag)
+        else:
+            since = request.headers.get("if-modified-since")
+            not_modified = since is not None and _not_modified_since(since, modified)
+        if not_modified:
+            CACHE_REQUESTS.inc("not_modified")
+            return await Response(status_code=304, headers=headers)(scope, receive, send)
+
+        cached = response_cache.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.inc("hit")
+            body, stored = cached
+            return await Response(body, headers={**stored, **headers})(scope, receive, send)
+
+        CACHE_REQUESTS.inc("miss")
+        start = None
+        chunks = []
+
+        async def send_cached(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", []))
+                response_headers = MutableHeaders(raw=message["headers"])
+                if message["status"] != 200 or "no-store" in response_headers.get("cache-control", ""):
+                    # ruta je sama označila odgovor kao privremen (npr. iz zastarjelog indeksa)
+                    return await send(message)
+                for name, value in headers.items():
+                    response_headers[name] = value
+                if response_headers.get("content-type") != "application/json":
+                    # exporti se streamaju i ne drže u memoriji, ali ETag vrijedi i za njih
+                    return await send(message)
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                return await send(message)
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            response_headers = MutableHeaders(raw=start["headers"])
+            stored = {name: response_headers[name] for name in CACHED_HEADERS if name in response_headers}
+            response_cache.put(key, body, stored)
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_cached)
+
 # === FastAPI APP ===
 app = FastAPI(title="Hitronet EMS - MVP", version="0.1.0")
 
+# Cache mora biti unutar CORS-a, jer CORS zaglavlja ovise o Originu zahtjeva
+app.add_middleware(ConditionalGetMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -178,8 +1386,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+# Metrike su izvan svih ostalih middlewarea, pa mjere i cache pogotke i CORS
+app.add_middleware(MetricsMiddleware)
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -188,6 +1400,1211 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Sesija nad read-only poolom; koriste je GET endpointi."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@app.exception_handler(IntegrityError)
+async def integrity_error_handler(request: Request, exc: IntegrityError):
+    # npr. strani ključ na nepostojeći zapis ili brisanje zapisa na koji se drugi referenciraju
+    return JSONResponse(status_code=409, content={"detail": str(exc.orig)})
+
+# === PAGINATION ===
+# Kolone po kojima lista smije sortirati; id je uvijek tiebreaker.
+# Sve su indeksirane (SQLite indeks implicitno sadrži rowid = id),
+# pa keyset upit ide direktno po indeksu bez obzira na dubinu stranice.
+SORT_FIELDS = {
+    Korisnik: ("id", "naziv", "oib", "created_at"),
+    Lokacija: ("id", "naziv", "created_at"),
+    Veza: ("id", "created_at"),
+    Oprema: ("id", "created_at"),
+}
+
+# Kolone po kojima lista smije filtrirati (jednakost); svaka ima vlastiti indeks,
+# a česte kombinacije i kompozitni (vidi __table_args__ modela).
+FILTER_FIELDS = {
+    Korisnik: ("status", "tip_korisnika"),
+    Lokacija: ("status", "tip", "korisnik_id"),
+    Veza: ("status", "tip", "lokacija_a_id", "lokacija_b_id"),
+    Oprema: ("status", "tip", "lokacija_id"),
+}
+
+def encode_cursor(sort: str, value, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _cursor_value(value, column):
+    """Vrijednost iz cursora mora biti skalar tipa kolone; cursor dolazi od klijenta."""
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        if not isinstance(value, str):
+            raise ValueError
+        return datetime.fromisoformat(value)
+    expected = column.type.python_type
+    if isinstance(value, bool) or not isinstance(value, int if expected is int else expected):
+        raise ValueError
+    return value
+
+def decode_cursor(cursor: str, sort: str, column):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        decoded = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(decoded, list):
+            raise ValueError
+        cursor_sort, value, row_id = decoded
+        if cursor_sort != sort or not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise ValueError
+        value = _cursor_value(value, column)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, row_id
+
+def apply_filters(stmt, model, filters: Optional[dict]):
+    """Dodaje uvjete jednakosti nad FILTER_FIELDS; None vrijednosti se preskaču."""
+    for name, value in (filters or {}).items():
+        if name not in FILTER_FIELDS[model]:
+            raise HTTPException(status_code=400, detail=f"Invalid filter field: {name}")
+        if value is not None:
+            stmt = stmt.where(getattr(model, name) == value)
+    return stmt
+
+def page_statement(model, skip: int, limit: int, sort: str, cursor: Optional[str], filters: Optional[dict] = None,
+                   columns=None):
+    """SELECT za jednu stranicu (plus jedan redak viška za provjeru postoji li sljedeća).
+
+    S `cursor` parametrom koristi se keyset (WHERE sort > zadnja vrijednost)
+    umjesto OFFSET-a, pa je latencija ista za prvu i milijuntu stranicu.
+    S `columns` vraća retke s tim kolonama umjesto ORM objekata.
+    """
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    if field not in SORT_FIELDS[model]:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {field}")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be positive")
+
+    column = getattr(model, field)
+    tiebreaker = [] if field == "id" else [model.id]
+    stmt = apply_filters(select(*columns) if columns else select(model), model, filters)
+
+    if cursor is not None:
+        value, last_id = decode_cursor(cursor, sort, column)
+        if field == "id":
+            condition = column < last_id if descending else column > last_id
+        elif descending:
+            # SQLite u DESC poretku stavlja NULL na kraj
+            if value is None:
+                condition = and_(column.is_(None), model.id < last_id)
+            else:
+                condition = or_(column < value, column.is_(None), and_(column == value, model.id < last_id))
+        else:
+            # ... a u ASC poretku na početak
+            if value is None:
+                condition = or_(column.isnot(None), and_(column.is_(None), model.id > last_id))
+            else:
+                condition = or_(column > value, and_(column == value, model.id > last_id))
+        stmt = stmt.where(condition)
+        skip = 0
+
+    order = [c.desc() if descending else c.asc() for c in [column] + tiebreaker]
+    return stmt.order_by(*order).offset(skip).limit(limit + 1)
+
+def finish_page(rows, response: Response, limit: int, sort: str):
+    """Odbacuje redak viška i postavlja X-Next-Cursor header ako postoji sljedeća stranica."""
+    field = sort.lstrip("-")
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(sort, getattr(last, field), last.id)
+    return rows
+
+# === BRZA SERIJALIZACIJA ===
+# Liste i detalji čitaju samo kolone iz Response sheme (kao tuple, bez ORM
+# objekata) i serijaliziraju ih orjsonom. Podaci dolaze iz naše baze pa ih ne
+# validiramo ponovo; response_model na ruti ostaje radi OpenAPI sheme.
+RESPONSE_SCHEMAS = {
+    Korisnik: KorisnikResponse,
+    Lokacija: LokacijaResponse,
+    Veza: VezaResponse,
+    Oprema: OpremaResponse,
+}
+# kolone modela redom polja Response sheme
+RESPONSE_COLUMNS = {
+    model: tuple(getattr(model, field) for field in schema.model_fields)
+    for model, schema in RESPONSE_SCHEMAS.items()
+}
+RESPONSE_FIELDS = {model: tuple(schema.model_fields) for model, schema in RESPONSE_SCHEMAS.items()}
+# HITRONET_VALIDATE_RESPONSES=1 ipak validira svaki redak (za razvoj i testove)
+VALIDATE_RESPONSES = os.environ.get("HITRONET_VALIDATE_RESPONSES") == "1"
+RESPONSE_ADAPTERS = {model: TypeAdapter(List[schema]) for model, schema in RESPONSE_SCHEMAS.items()}
+
+def rows_payload(model, rows) -> list:
+    fields = RESPONSE_FIELDS[model]
+    payload = [dict(zip(fields, row)) for row in rows]
+    if VALIDATE_RESPONSES:
+        RESPONSE_ADAPTERS[model].validate_python(payload)
+    return payload
+
+def json_page(db: Session, model, response: Response, skip: int, limit: int, sort: str, cursor: Optional[str],
+              filters: Optional[dict] = None, ids: Optional[str] = None, expand: Optional[str] = None) -> ORJSONResponse:
+    tree = parse_expand(model, expand)
+    if tree:
+        stmt = batch_statement(model, ids, filters) if ids is not None else \
+            page_statement(model, skip, limit, sort, cursor, filters)
+        rows = db.scalars(stmt.options(*expand_options(model, tree))).all()
+        if ids is None:
+            rows = finish_page(rows, response, limit, sort)
+        payload = [expanded_payload(model, row, tree) for row in rows]
+        return ORJSONResponse(payload, headers=dict(response.headers))
+    if ids is not None:
+        return json_batch(db, model, ids, filters)
+    stmt = page_statement(model, skip, limit, sort, cursor, filters, RESPONSE_COLUMNS[model])
+    # Core izvršavanje preko konekcije sesije preskače ORM sloj za retke
+    rows = finish_page(db.connection().execute(stmt).all(), response, limit, sort)
+    # ruta vraća Response direktno, pa headere (X-Next-Cursor) prenosimo ručno
+    return ORJSONResponse(rows_payload(model, rows), headers=dict(response.headers))
+
+def json_row(db: Session, model, row_id: int, expand: Optional[str] = None,
+             as_of: Optional[str] = None) -> ORJSONResponse:
+    if as_of is not None:
+        if expand:
+            raise HTTPException(status_code=400, detail="as_of cannot be combined with expand")
+        return json_row_as_of(db, model, row_id, as_of)
+    tree = parse_expand(model, expand)
+    if tree:
+        obj = db.scalars(select(model).where(model.id == row_id).options(*expand_options(model, tree))).first()
+        if obj is None:
+            raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+        return ORJSONResponse(expanded_payload(model, obj, tree))
+    row = db.connection().execute(select(*RESPONSE_COLUMNS[model]).where(model.id == row_id)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    return ORJSONResponse(rows_payload(model, [row])[0])
+
+BATCH_MAX_IDS = 1000
+
+def parse_ids(ids: str) -> List[int]:
+    try:
+        values = sorted({int(value) for value in ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(values) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per request")
+    return values
+
+def batch_statement(model, ids: str, filters: Optional[dict] = None, columns=None):
+    """SELECT redaka s id-evima iz `?ids=1,2,3` jednim IN upitom, poredanih po id."""
+    stmt = select(*columns) if columns else select(model)
+    stmt = apply_filters(stmt.where(model.id.in_(parse_ids(ids))), model, filters)
+    return stmt.order_by(model.id)
+
+def json_batch(db: Session, model, ids: str, filters: Optional[dict] = None) -> ORJSONResponse:
+    # id-evi koji ne postoje (ili ne prolaze filtere) se izostavljaju, bez 404
+    rows = db.connection().execute(batch_statement(model, ids, filters, RESPONSE_COLUMNS[model])).all()
+    return ORJSONResponse(rows_payload(model, rows))
+
+# === PROŠIRENI PRIKAZ (?expand=) ===
+# `?expand=lokacije.oprema` ugnježđuje povezane zapise u odgovor. Veze prema
+# jednom zapisu učitavaju se JOIN-om u istom upitu (joinedload), kolekcije
+# jednim IN upitom po razini (selectinload), pa broj upita ovisi o dubini
+# expanda, a ne o broju djece.
+EXPAND_RELATIONS = {
+    Korisnik: ("lokacije",),
+    Lokacija: ("korisnik", "oprema"),
+    Veza: ("lokacija_a", "lokacija_b"),
+    Oprema: ("lokacija",),
+}
+EXPAND_MAX_DEPTH = 3
+
+def parse_expand(model, expand: Optional[str]) -> dict:
+    """`lokacije.oprema,lokacije.korisnik` -> {"lokacije": {"oprema": {}, "korisnik": {}}}"""
+    tree = {}
+    for path in (expand or "").split(","):
+        if not path.strip():
+            continue
+        names = [name.strip() for name in path.split(".")]
+        if len(names) > EXPAND_MAX_DEPTH:
+            raise HTTPException(status_code=400, detail=f"Expand depth is limited to {EXPAND_MAX_DEPTH}")
+        node, current = tree, model
+        for name in names:
+            if name not in EXPAND_RELATIONS[current]:
+                raise HTTPException(status_code=400, detail=f"Invalid expand path: {path.strip()}")
+            node = node.setdefault(name, {})
+            current = getattr(current, name).property.mapper.class_
+    return tree
+
+def expand_options(model, tree: dict, parent=None) -> list:
+    options = []
+    for name, children in tree.items():
+        attribute = getattr(model, name)
+        if attribute.property.direction is RelationshipDirection.MANYTOONE:
+            option = parent.joinedload(attribute) if parent is not None else joinedload(attribute)
+        else:
+            option = parent.selectinload(attribute) if parent is not None else selectinload(attribute)
+        options += expand_options(attribute.property.mapper.class_, children, option) or [option]
+    return options
+
+def expanded_payload(model, obj, tree: dict) -> dict:
+    row = {field: getattr(obj, field) for field in RESPONSE_FIELDS[model]}
+    for name, children in tree.items():
+        related = getattr(model, name).property.mapper.class_
+        value = getattr(obj, name)
+        if isinstance(value, list):
+            row[name] = [expanded_payload(related, item, children) for item in sorted(value, key=lambda item: item.id)]
+        else:
+            row[name] = None if value is None else expanded_payload(related, value, children)
+    return row
+
+# === GEO ===
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bbox_statement(min_lat: float, max_lat: float, min_lon: float, max_lon: float, *columns):
+    """Lokacije unutar pravokutnika: kandidati iz R*Tree-a, pa točna provjera koordinata."""
+    r = lokacije_rtree.c
+    return (
+        select(*(columns or (Lokacija,)))
+        .select_from(Lokacija)
+        .join(lokacije_rtree, r.id == Lokacija.id)
+        .where(r.max_lat >= min_lat, r.min_lat <= max_lat, r.max_lon >= min_lon, r.min_lon <= max_lon)
+        .where(Lokacija.latitude.between(min_lat, max_lat), Lokacija.longitude.between(min_lon, max_lon))
+    )
+
+# pravokutnik se malo proširuje da zaokruživanje ne izbaci točku s ruba kruga
+RADIUS_BBOX_PAD = 1e-9
+
+def radius_bbox(lat: float, lon: float, radius_km: float):
+    """Pravokutnik koji sigurno sadrži krug zadanog radijusa.
+
+    Računa se na istoj sferi kao haversine_km. Najveći raspon dužine kruga je
+    na geografskoj širini bližoj polu od središta, pa dlon nije samo
+    radijus / cos(lat), nego asin(sin(r) / cos(lat)).
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle) + RADIUS_BBOX_PAD
+    min_lat, max_lat = lat - dlat, lat + dlat
+    ratio = math.sin(angle) / math.cos(math.radians(lat)) if abs(lat) < 90.0 and angle < math.pi / 2 else math.inf
+    dlon = math.degrees(math.asin(ratio)) + RADIUS_BBOX_PAD if ratio < 1.0 else math.inf
+    if min_lat <= -90.0 or max_lat >= 90.0 or lon - dlon < -180.0 or lon + dlon > 180.0:
+        # krug prelazi pol ili antimeridijan: sve dužine
+        return max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
+
+def within_radius(db: Session, lat: float, lon: float, radius_km: float, limit: Optional[int] = None):
+    """Lokacije unutar radijusa, sortirane po udaljenosti, kao (udaljenost, lokacija).
+
+    Udaljenosti se računaju nad (id, lat, lon) tuple-ovima; ORM objekti se
+    učitavaju samo za retke koji ulaze u rezultat.
+    """
+    candidates = db.execute(bbox_statement(
+        *radius_bbox(lat, lon, radius_km), Lokacija.id, Lokacija.latitude, Lokacija.longitude
+    ))
+    hits = sorted(
+        (d, row_id) for d, row_id in
+        ((haversine_km(lat, lon, row_lat, row_lon), row_id) for row_id, row_lat, row_lon in candidates)
+        if d <= radius_km
+    )[:limit]
+    if not hits:
+        return []
+    by_id = {l.id: l for l in db.execute(select(Lokacija).where(Lokacija.id.in_([i for _, i in hits]))).scalars()}
+    return [(d, by_id[row_id]) for d, row_id in hits]
+
+def nearest(db: Session, lat: float, lon: float, k: int, start_km: float = 1.0):
+    """k najbližih lokacija.
+
+    Radijus se udvostručuje dok pravokutnik ne sadrži barem k točaka (R*Tree
+    upit s LIMIT k, staje čim ih nađe). Najdalja od tih k točaka daje radijus
+    unutar kojeg sigurno leži svih k najbližih, pa se samo on pretražuje.
+    """
+    radius_km = start_km
+    max_radius_km = math.pi * EARTH_RADIUS_KM
+    while True:
+        sample = db.execute(bbox_statement(
+            *radius_bbox(lat, lon, radius_km), Lokacija.latitude, Lokacija.longitude
+        ).limit(k)).all()
+        if len(sample) >= k or radius_km >= max_radius_km:
+            break
+        radius_km *= 2
+    if not sample:
+        return []
+    bound_km = max(haversine_km(lat, lon, row_lat, row_lon) for row_lat, row_lon in sample)
+    return within_radius(db, lat, lon, bound_km, limit=k)
+
+def tile_bounds(z: int, x: int, y: int):
+    """(min_lat, max_lat, min_lon, max_lon) slippy-map tilea."""
+    n = 1 << z
+    lat = lambda row: math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return lat(y + 1), lat(y), x / n * 360.0 - 180.0, (x + 1) / n * 360.0 - 180.0
+
+def tile_clusters(db: Session, z: int, x: int, y: int, filters: dict) -> dict:
+    """Klasteri iz grida: ćelije razine z + TILE_CLUSTER_BITS unutar tilea."""
+    g = lokacije_grid.c
+    side = 1 << TILE_CLUSTER_BITS
+    stmt = select(g.x, g.y, g.tip, g.status, g.broj, g.sum_lat, g.sum_lon).where(
+        g.z == z + TILE_CLUSTER_BITS, g.x.between(x * side, x * side + side - 1),
+        g.y.between(y * side, y * side + side - 1), g.broj > 0,
+    )
+    for field, value in filters.items():
+        if value is not None:
+            stmt = stmt.where(g[field] == value)
+    cells = {}
+    for cell_x, cell_y, tip, status, broj, sum_lat, sum_lon in db.execute(stmt):
+        cell = cells.setdefault((cell_x, cell_y), {"lat": 0.0, "lon": 0.0, "count": 0, "tip": {}, "status": {}})
+        cell["lat"] += sum_lat
+        cell["lon"] += sum_lon
+        cell["count"] += broj
+        cell["tip"][tip] = cell["tip"].get(tip, 0) + broj
+        cell["status"][status] = cell["status"].get(status, 0) + broj
+    for cell in cells.values():
+        cell["lat"] = round(cell["lat"] / cell["count"], 6)
+        cell["lon"] = round(cell["lon"] / cell["count"], 6)
+    clusters = [cells[key] for key in sorted(cells)]
+    return {"z": z, "x": x, "y": y, "count": sum(c["count"] for c in clusters), "clusters": clusters}
+
+def tile_points(db: Session, z: int, x: int, y: int, filters: dict) -> dict:
+    """Pojedinačne lokacije tilea iz R*Tree-a, za zoom na kojem više nema smisla klasterirati."""
+    stmt = bbox_statement(*tile_bounds(z, x, y), Lokacija.id, Lokacija.latitude, Lokacija.longitude,
+                          Lokacija.tip, Lokacija.status)
+    stmt = apply_filters(stmt, Lokacija, filters).order_by(Lokacija.id).limit(TILE_MAX_POINTS + 1)
+    rows = db.execute(stmt).all()
+    clusters = [
+        {"lat": lat, "lon": lon, "count": 1, "tip": {tip or "": 1}, "status": {status or "": 1}, "id": row_id}
+        for row_id, lat, lon, tip, status in rows[:TILE_MAX_POINTS]
+    ]
+    return {"z": z, "x": x, "y": y, "count": len(clusters), "truncated": len(rows) > TILE_MAX_POINTS,
+            "clusters": clusters}
+
+def with_distance(hits):
+    return [
+        LokacijaUdaljenost(**LokacijaResponse.model_validate(l).model_dump(), udaljenost_km=round(d, 3))
+        for d, l in hits
+    ]
+
+# === SINKRONIZACIJA INDEKSA ===
+# In-memory indeksi (topologija, kapaciteti, izvještaji) ne prate commite
+# ovog procesa, nego slijed promjena u bazi: prije upita dostignu retke i
+# tombstone sa seq većim od onog do kojeg su usklađeni. Tako vide i upise
+# drugih worker procesa, main_async, bulk_import.py i ručnog SQL-a, a stanje
+# im uvijek odgovara jednom snapshotu baze.
+# Ako je promjena više od ovoga, brže je učitati indeks iznova
+INDEX_CATCH_UP_MAX_ROWS = int(os.environ.get("HITRONET_INDEX_CATCH_UP_ROWS", "50000"))
+INDEX_SYNCS = metrike.counter("hitronet_index_sync_total", "Usklađivanja in-memory indeksa s bazom",
+                              ("index", "result"))
+
+class IndexFeed:
+    """Usklađuje in-memory indeks s bazom preko seq-a.
+
+    `sources` je {tablica: kolone} bez id-a. `load(retci)` puni indeks iznova iz
+    {tablica: (id, kolone...) retci}, a `apply(tablica, id, redak)` primjenjuje
+    jednu promjenu; redak je None za obrisani.
+    """
+
+    def __init__(self, name: str, sources: Dict[str, tuple], load, apply):
+        self.name = name
+        self.sources = sources
+        self._load = load
+        self._apply = apply
+        self.lock = threading.Lock()
+        self.seq: Optional[int] = None
+
+    def sync(self, connection) -> int:
+        """Dostiže bazu u snapshotu `connection`; vraća seq do kojeg je indeks usklađen.
+
+        Upit sa starijim snapshotom od indeksa dobiva noviji indeks; seq nikad ne ide unatrag.
+        """
+        head = connection.scalar(select(Verzija.verzija).where(Verzija.tablica == SEQUENCE_ROW)) or 0
+        if self.seq is not None and head <= self.seq:
+            return self.seq
+        with self.lock:
+            if self.seq is not None and head <= self.seq:
+                return self.seq
+            changes = None if self.seq is None else self._changes(connection, self.seq)
+            if changes is None:
+                self._load({
+                    table: connection.exec_driver_sql(f"SELECT id, {', '.join(columns)} FROM {table}")
+                    for table, columns in self.sources.items()
+                })
+                INDEX_SYNCS.inc(self.name, "reload")
+            else:
+                for _, table, row_id, row in changes:
+                    self._apply(table, row_id, row)
+                INDEX_SYNCS.inc(self.name, "catch_up")
+            self.seq = head
+            return head
+
+    def _changes(self, connection, since: int) -> Optional[list]:
+        """Promjene sa seq > since redom slijeda; None ako ih je previše za dostizanje."""
+        limit = INDEX_CATCH_UP_MAX_ROWS + 1
+        changes = []
+        for table, columns in self.sources.items():
+            rows = connection.exec_driver_sql(
+                f"SELECT seq, id, {', '.join(columns)} FROM {table} WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit),
+            ).all()
+            changes += [(row[0], table, row[1], dict(zip(("id",) + columns, row[1:]))) for row in rows]
+        tombstones = connection.execute(
+            select(Brisanje.seq, Brisanje.tablica, Brisanje.row_id)
+            .where(Brisanje.seq > since, Brisanje.tablica.in_(self.sources)).limit(limit)
+        ).all()
+        changes += [(seq, tablica, row_id, None) for seq, tablica, row_id in tombstones]
+        if len(changes) > INDEX_CATCH_UP_MAX_ROWS:
+            return None
+        changes.sort(key=lambda change: change[0])
+        return changes
+
+# === TOPOLOGIJA ===
+topologija = Topology()
+
+def _topology_copy():
+    """Kopija grafa za analizu utjecaja, uz seq do kojeg je usklađen (ne usred dostizanja)."""
+    with topologija_feed.lock, topologija._lock:
+        return topologija_feed.seq, list(topologija.edges.values()), dict(topologija.nodes)
+
+utjecaj = ImpactIndex(_topology_copy)
+EDGE_COLUMNS = ("lokacija_a_id", "lokacija_b_id", "brzina_mbps", "status", "redundantna_veza_id")
+NODE_COLUMNS = ("tip", "status", "korisnik_id")
+
+def _load_topology(rows: dict):
+    topologija.invalidate()
+    topologija.load(lambda: (Edge(*row) for row in rows["veze"]), lambda: (Node(*row) for row in rows["lokacije"]))
+    utjecaj.schedule_rebuild()
+
+def _apply_topology(table: str, row_id: int, row: Optional[dict]):
+    if table == "veze":
+        if row is None:
+            topologija.remove(row_id)
+        else:
+            topologija.upsert(Edge(row_id, *(row[column] for column in EDGE_COLUMNS)))
+    elif row is None:
+        topologija.remove_node(row_id)
+    else:
+        topologija.upsert_node(Node(row_id, *(row[column] for column in NODE_COLUMNS)))
+    utjecaj.schedule_rebuild()
+
+topologija_feed = IndexFeed("topologija", {"veze": EDGE_COLUMNS, "lokacije": NODE_COLUMNS},
+                            _load_topology, _apply_topology)
+
+def get_topology(db: Session) -> Topology:
+    """Graf se gradi iz baze pri prvom upitu, a prije svakog sljedećeg dostiže promjene."""
+    topologija_feed.sync(db.connection())
+    return topologija
+
+def impact_result(db: Session, analyse, row_id: int, name: str, in_topology) -> dict:
+    """Analiza nad indeksom utjecaja, dopunjena korisnicima pogođenih lokacija.
+
+    Graf se prvo uskladi sa slijedom promjena; ako indeks zaostaje za njim,
+    zahtjev čeka izgradnju. `seq` i `zastarjelo` kažu iz kojeg je stanja baze.
+    """
+    get_topology(db)
+    snapshot = utjecaj.current()
+    result = analyse(snapshot, row_id)
+    if result is None:
+        if in_topology(row_id):
+            # zapis je noviji od indeksa koji se upravo gradi
+            raise HTTPException(status_code=503, detail="Impact index is being rebuilt", headers={"Retry-After": "1"})
+        raise HTTPException(status_code=404, detail=f"{name} not found")
+    korisnik_ids = {snapshot.nodes[l].korisnik_id for l in result["lokacije"] if l in snapshot.nodes}
+    korisnici = db.execute(select(Korisnik).where(Korisnik.id.in_(korisnik_ids)).order_by(Korisnik.id)).scalars()
+    return {
+        **result,
+        "korisnici": [KorisnikResponse.model_validate(k) for k in korisnici],
+        "seq": snapshot.seq,
+        "izgradjeno": datetime.fromtimestamp(snapshot.built_at, timezone.utc).isoformat(),
+        "zastarjelo": utjecaj.stale(snapshot),
+    }
+
+def impact_response(result: dict) -> ORJSONResponse:
+    # odgovor iz zastarjelog indeksa ne smije ostati u HTTP cacheu pod trenutnim verzijama tablica
+    headers = {"Cache-Control": "no-store"} if result["zastarjelo"] else None
+    return ORJSONResponse(jsonable_encoder(result), headers=headers)
+
+# === KAPACITETI ===
+LINK_COLUMNS = ("lokacija_a_id", "lokacija_b_id", "status", "kapacitet_vlakana", "kapacitet_parica", "brzina_mbps")
+SITE_COLUMNS = ("latitude", "longitude")
+
+def capacity_feed(index: CapacityIndex) -> IndexFeed:
+    def load(rows: dict):
+        index.invalidate()
+        index.load(lambda: (Link(*row) for row in rows["veze"]), lambda: (Site(*row) for row in rows["lokacije"]))
+
+    def apply(table: str, row_id: int, row: Optional[dict]):
+        if table == "veze":
+            if row is None:
+                index.remove(row_id)
+            else:
+                index.upsert(Link(row_id, *(row[column] for column in LINK_COLUMNS)))
+        elif row is None:
+            index.remove_site(row_id)
+        else:
+            index.upsert_site(Site(row_id, *(row[column] for column in SITE_COLUMNS)))
+
+    return IndexFeed("kapaciteti", {"veze": LINK_COLUMNS, "lokacije": SITE_COLUMNS}, load, apply)
+
+kapaciteti = CapacityIndex()
+kapaciteti_feed = capacity_feed(kapaciteti)
+
+def get_capacity(db: Session) -> CapacityIndex:
+    """Duljine veza i zbrojevi po lokaciji računaju se pri prvom upitu, a dalje dostižu promjene."""
+    kapaciteti_feed.sync(db.connection())
+    return kapaciteti
+
+# === IZVJEŠTAJI ===
+izvjestaji = Reports()
+
+def _load_reports(rows: dict):
+    izvjestaji.invalidate()
+    izvjestaji.load({table: (lambda rows=rows[table]: rows) for table in REPORT_TABLES})
+
+def _apply_report(table: str, row_id: int, row: Optional[dict]):
+    if row is None:
+        izvjestaji.remove(table, row_id)
+    else:
+        izvjestaji.upsert(table, row)
+
+izvjestaji_feed = IndexFeed("izvjestaji", {table: tuple(columns) for table, columns in REPORT_TABLES.items()},
+                            _load_reports, _apply_report)
+
+def get_reports(db: Session) -> Reports:
+    """Stupčani snapshot se puni iz baze pri prvom izvještaju, a prije svakog sljedećeg dostiže promjene."""
+    izvjestaji_feed.sync(db.connection())
+    return izvjestaji
+
+# === POVIJEST (UPITI) ===
+HISTORY_MODELS = {model.__tablename__: model for model in RESPONSE_SCHEMAS}
+
+def parse_as_of(value: str) -> float:
+    """`?as_of=` kao unix vrijeme ili ISO 8601; vrijeme bez zone je UTC."""
+    try:
+        at = float(value)
+    except ValueError:
+        pass
+    else:
+        if not math.isfinite(at):
+            raise HTTPException(status_code=400, detail="as_of must be a finite timestamp")
+        return at
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="as_of must be an ISO 8601 datetime or a unix timestamp")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+def json_row_as_of(db: Session, model, row_id: int, as_of: str) -> ORJSONResponse:
+    """Redak kakav je bio u trenutku `as_of`, iz povijesti promjena."""
+    at = parse_as_of(as_of)
+    connection = db.connection()
+    exists, state = history_state(connection, model.__tablename__, row_id, at)
+    if not exists:
+        # bez povijesti redak se nije mijenjao od unosa (npr. bulk uvoz)
+        row = connection.execute(
+            select(*RESPONSE_COLUMNS[model], model.created_at).where(model.id == row_id)
+        ).first()
+        # created_at je naivno lokalno vrijeme servera; timestamp() ga tako i tumači
+        if row is not None and (row.created_at is None or row.created_at.timestamp() <= at):
+            state = dict(zip(RESPONSE_FIELDS[model], row))
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found at {as_of}")
+    # JSON iz triggera ima datume kao tekst; shema ih vraća u isti oblik kao obično čitanje
+    payload = RESPONSE_SCHEMAS[model].model_validate({**state, "id": row_id}).model_dump()
+    # sažimanje povijesti može ga kasnije promijeniti, a verzija tablice ostaje ista
+    return ORJSONResponse(payload, headers={"Cache-Control": "no-store"})
+
+def history_entry(entry) -> dict:
+    return {
+        "id": entry.id,
+        "operacija": entry.operacija,
+        "vrijeme": datetime.fromtimestamp(entry.vrijeme, timezone.utc).isoformat(),
+        "podaci": json.loads(entry.podaci) if entry.podaci is not None else None,
+    }
+
+def history_page(db: Session, table: str, row_id: int, limit: int, before: Optional[int],
+                 polje: Optional[str], snapshots: bool) -> dict:
+    """Zapisi povijesti retka od najnovijeg; `next_before` je kursor za sljedeću stranicu."""
+    conditions = ["tablica = :table", "row_id = :row_id"]
+    params = {"table": table, "row_id": row_id, "limit": limit + 1}
+    if before is not None:
+        conditions.append("id < :before")
+        params["before"] = before
+    if not snapshots:
+        conditions.append("operacija != 'snapshot'")
+    if polje is not None:
+        if polje not in DATA_COLUMNS[table]:
+            raise HTTPException(status_code=400, detail=f"Invalid field: {polje}")
+        # izmjene u kojima se polje promijenilo, uz unos i brisanje
+        conditions.append("(operacija != 'update' OR json_type(podaci, :path) IS NOT NULL)")
+        params["path"] = f"$.{polje}"
+    connection = db.connection()
+    entries = connection.execute(text(
+        f"SELECT id, operacija, vrijeme, podaci FROM povijest WHERE {' AND '.join(conditions)} "
+        f"ORDER BY id DESC LIMIT :limit"
+    ), params).all()
+    if not entries and before is None:
+        model = HISTORY_MODELS[table]
+        if connection.execute(select(model.id).where(model.id == row_id)).first() is None:
+            raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    more = len(entries) > limit
+    entries = entries[:limit]
+    return {
+        "entitet": table,
+        "id": row_id,
+        "entries": [history_entry(entry) for entry in entries],
+        "next_before": entries[-1].id if more else None,
+    }
+
+# === BULK ===
+BULK_CHUNK_SIZE = 1000
+# NDJSON upload iznad ove veličine spoola se na disk
+BULK_SPOOL_BYTES = 8 * 1024 * 1024
+# Prirodni ključevi za upsert; tablice bez ključa se samo dodaju
+BULK_CONFLICT_KEYS = {
+    Korisnik: "oib",
+    Oprema: "serijski_broj",
+}
+
+async def read_bulk_payload(request: Request):
+    """Čita cijelo tijelo i vraća iterator (index, objekt) parova iz JSON polja ili NDJSON-a.
+
+    Upis počinje tek kad je upload gotov, pa spor klijent ne drži jedinu
+    konekciju za pisanje. NDJSON se sprema u SpooledTemporaryFile (iznad
+    BULK_SPOOL_BYTES na disk) i parsira redak po redak tek pri upisu, pa memorija
+    ne raste s veličinom uploada. Neispravan redak vraća se kao ValueError i
+    završi u `errors`.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        spool = tempfile.SpooledTemporaryFile(max_size=BULK_SPOOL_BYTES)
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        return _iter_ndjson(spool)
+
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    return enumerate(payload)
+
+def _iter_ndjson(spool):
+    with spool:
+        lines = (line for line in spool if line.strip())
+        for index, line in enumerate(lines):
+            yield index, _parse_ndjson_line(line)
+
+def _parse_ndjson_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+
+def bulk_statement(model, schema):
+    stmt = sqlite_insert(model)
+    key = BULK_CONFLICT_KEYS.get(model)
+    if key is not None:
+        # Kod konflikta se ažuriraju samo polja iz *Create sheme, ne id i datumi kreiranja
+        fields = [name for name in schema.model_fields if name != key]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={name: stmt.excluded[name] for name in fields},
+        )
+    return stmt.returning(model.id, sort_by_parameter_order=True)
+
+def write_bulk_chunk(db: Session, model, schema, chunk, result: dict):
+    """Validira i upisuje jedan chunk unutar SAVEPOINT-a.
+
+    Ako chunk padne na bazi, ponavlja se redak po redak kako bi greška
+    ostala vezana uz točno jedan redak, a ostatak batcha prošao.
+    """
+    valid = []
+    for index, item in chunk:
+        if isinstance(item, ValueError):
+            result["errors"].append({"index": index, "error": str(item)})
+            continue
+        try:
+            valid.append((index, schema.model_validate(item).model_dump()))
+        except ValidationError as e:
+            result["errors"].append({"index": index, "error": jsonable_encoder(e.errors(include_url=False))})
+    if not valid:
+        return
+
+    stmt = bulk_statement(model, schema)
+    try:
+        with db.begin_nested():
+            ids = db.execute(stmt, [row for _, row in valid]).scalars().all()
+        for (index, row), row_id in zip(valid, ids):
+            result["ids"].append({"index": index, "id": row_id})
+            record_change(db, model.__tablename__, "upsert", {**row, "id": row_id})
+        return
+    except SQLAlchemyError:
+        pass
+
+    for index, row in valid:
+        try:
+            with db.begin_nested():
+                row_id = db.execute(stmt, [row]).scalar_one()
+            result["ids"].append({"index": index, "id": row_id})
+            record_change(db, model.__tablename__, "upsert", {**row, "id": row_id})
+        except SQLAlchemyError as e:
+            result["errors"].append({"index": index, "error": str(getattr(e, "orig", e))})
+
+def write_bulk(db: Session, model, schema, items) -> dict:
+    result = {"ids": [], "errors": []}
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            write_bulk_chunk(db, model, schema, chunk, result)
+            chunk = []
+    if chunk:
+        write_bulk_chunk(db, model, schema, chunk, result)
+    db.commit()
+    result["written"] = len(result["ids"])
+    result["failed"] = len(result["errors"])
+    return result
+
+async def bulk_write(request: Request, db: Session, model, schema):
+    items = await read_bulk_payload(request)
+    return await run_in_threadpool(write_bulk, db, model, schema, items)
+
+# === EXPORT ===
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def iter_export(model, schema, format: str, filters: Optional[dict]):
+    """Generira export u serijama od EXPORT_BATCH_SIZE redaka.
+
+    Retci se čitaju kao tuple kursorom (yield_per), bez ORM objekata i Pydantic
+    validacije, pa memorija ne ovisi o veličini tablice. Cijeli export je jedna
+    read transakcija, tj. konzistentan snapshot.
+    """
+    fields = list(schema.model_fields)
+    stmt = apply_filters(select(*RESPONSE_COLUMNS[model]), model, filters).order_by(model.id)
+    with read_engine.connect() as connection:
+        result = connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(stmt)
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(fields)
+            for rows in result.partitions():
+                writer.writerows([_export_value(v) for v in row] for row in rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue().encode()
+        else:
+            for rows in result.partitions():
+                yield b"".join(orjson.dumps(dict(zip(fields, row)), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+def export_response(model, schema, format: str, filters: Optional[dict]) -> StreamingResponse:
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {format}")
+    # filteri se provjeravaju prije početka streama, da greška bude 400 a ne prekinut odgovor
+    apply_filters(select(model), model, filters)
+    return StreamingResponse(
+        iter_export(model, schema, format, filters),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{model.__tablename__}.{format}"'},
+    )
+
+# === GROUP COMMIT ===
+# S HITRONET_GROUP_COMMIT=1 pojedinačni POST/PUT/DELETE iz istovremenih
+# zahtjeva dijele jednu transakciju (group_commit.py): writer thread skuplja
+# ih HITRONET_GROUP_COMMIT_MS milisekundi ili do HITRONET_GROUP_COMMIT_OPS
+# operacija. Bez toga svaki zahtjev commita sam, kao i prije.
+GROUP_COMMIT = os.environ.get("HITRONET_GROUP_COMMIT") == "1"
+GROUP_COMMIT_WINDOW = float(os.environ.get("HITRONET_GROUP_COMMIT_MS", "2")) / 1000
+GROUP_COMMIT_MAX_OPS = int(os.environ.get("HITRONET_GROUP_COMMIT_OPS", "64"))
+
+group_committer = GroupCommitter(SessionLocal, GROUP_COMMIT_WINDOW, GROUP_COMMIT_MAX_OPS) if GROUP_COMMIT else None
+if group_committer is not None:
+    metrike.gauge("hitronet_group_commit_batches", "Transakcije group commita",
+                  callback=lambda: group_committer.batches)
+    metrike.gauge("hitronet_group_commit_operations", "Operacije izvršene kroz group commit",
+                  callback=lambda: group_committer.operations)
+
+def run_write(db: Session, op):
+    """Izvršava `op(session)` i commita, samostalno ili u grupi s drugim zahtjevima.
+
+    Operacija vraća Response shemu, ne ORM objekt, jer se kod group commita
+    sesija zatvara prije nego što ruta serijalizira odgovor.
+    """
+    if group_committer is not None:
+        return group_committer.submit(op)
+    result = op(db)
+    db.commit()
+    return result
+
+def get_row_or_404(db: Session, model, row_id: int):
+    obj = db.query(model).filter(model.id == row_id).first()
+    if obj is None:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    return obj
+
+def create_row(db: Session, model, data: BaseModel):
+    def op(session: Session):
+        obj = model(**data.model_dump())
+        session.add(obj)
+        session.flush()
+        session.refresh(obj)  # seq postavlja trigger
+        return RESPONSE_SCHEMAS[model].model_validate(obj)
+    return run_write(db, op)
+
+def update_row(db: Session, model, row_id: int, data: BaseModel):
+    def op(session: Session):
+        obj = get_row_or_404(session, model, row_id)
+        for key, value in data.model_dump().items():
+            setattr(obj, key, value)
+        session.flush()
+        session.refresh(obj)
+        return RESPONSE_SCHEMAS[model].model_validate(obj)
+    return run_write(db, op)
+
+def referencing_tables(model) -> List[str]:
+    """Tablice sa stranim ključem na `model` (uključujući samu tablicu)."""
+    return sorted({
+        table.name for table in Base.metadata.sorted_tables
+        for fk in table.foreign_keys if fk.column.table is model.__table__
+    })
+
+def referenced_conflict(model) -> HTTPException:
+    """409 za brisanje zapisa na koji se drugi još referenciraju (foreign_keys=ON); dijeli ga main_async."""
+    return HTTPException(status_code=409, detail=(
+        f"{model.__name__} is still referenced by {', '.join(referencing_tables(model))}; "
+        "delete or reassign those records first"))
+
+def delete_row(db: Session, model, row_id: int):
+    def op(session: Session):
+        session.delete(get_row_or_404(session, model, row_id))
+        try:
+            session.flush()
+        except IntegrityError:
+            # foreign_keys=ON: zapis na koji se drugi referenciraju ne briše se kaskadno
+            raise referenced_conflict(model)
+        return {"message": f"{model.__name__} deleted successfully"}
+    return run_write(db, op)
+
+# === POSLOVI ===
+# Dugi poslovi (exporti cijelih tablica, izvještaji za cijelu mrežu,
+# preračunavanje izvedenih podataka) izvršavaju se u poolu procesa, a rezultat
+# ide u datoteku u JOBS_DIR koja se preuzima s /jobs/{id}/result.
+JOBS_DIR = os.path.abspath(os.environ.get("HITRONET_JOBS_DIR", "poslovi"))
+JOB_WORKERS = int(os.environ.get("HITRONET_JOB_WORKERS", "2"))
+# posao bez heartbeata dulje od ovoga smatra se napuštenim i vraća u red
+JOB_STALE_SECONDS = float(os.environ.get("HITRONET_JOB_STALE_SECONDS", "30"))
+JOB_PROGRESS_ROWS = 10000
+JOB_EXTENSIONS = {"application/x-ndjson": "ndjson", EXPORT_FORMATS["csv"]: "csv", "application/json": "json"}
+JOB_MODELS = {model.__tablename__: model for model in RESPONSE_SCHEMAS}
+
+def _job_params(params: dict, allowed: tuple) -> dict:
+    unknown = set(params) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    return params
+
+def validate_export_job(params: dict) -> dict:
+    params = _job_params(params, ("entitet", "format", "filters"))
+    model = JOB_MODELS.get(params.get("entitet"))
+    if model is None:
+        raise ValueError(f"entitet must be one of {', '.join(JOB_MODELS)}")
+    if params.setdefault("format", "ndjson") not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format: {params['format']}")
+    for name in params.setdefault("filters", {}) or {}:
+        if name not in FILTER_FIELDS[model]:
+            raise ValueError(f"Invalid filter field: {name}")
+    return params
+
+def validate_report_job(params: dict) -> dict:
+    params = _job_params(params, ("entitet", "by", "sum", "filters", "sort"))
+    if params.get("entitet") not in REPORT_TABLES:
+        raise ValueError(f"entitet must be one of {', '.join(REPORT_TABLES)}")
+    if params.setdefault("sort", "count") not in ("count", "key"):
+        raise ValueError("sort must be 'count' or 'key'")
+    check_columns(params["entitet"], params.setdefault("by", []), params.setdefault("sum", []),
+                  params.setdefault("filters", {}))
+    return params
+
+def validate_no_params(params: dict) -> dict:
+    return _job_params(params, ())
+
+def job_export(context: JobContext, entitet: str, format: str, filters: dict) -> str:
+    """Export tablice u datoteku, istim generatorom kao /{entitet}/export."""
+    model = JOB_MODELS[entitet]
+    with ReadSessionLocal() as db:
+        total = db.scalar(select(Brojac.broj).where(Brojac.entitet == entitet, Brojac.polje == "")) or 0
+    rows = 0
+    with open(context.path, "wb") as output:
+        for chunk in iter_export(model, RESPONSE_SCHEMAS[model], format, filters):
+            output.write(chunk)
+            rows += chunk.count(b"\n")
+            context.progress(rows, total)
+    return EXPORT_FORMATS[format]
+
+def job_report(context: JobContext, entitet: str, by: list, sum: list, filters: dict, sort: str) -> str:
+    """Sve grupe izvještaja (bez limita /reports rute) kao NDJSON, iz vlastitog snapshota procesa."""
+    snapshot = Reports({entitet: REPORT_TABLES[entitet]})
+    with ReadSessionLocal() as db:
+        total = db.scalar(select(Brojac.broj).where(Brojac.entitet == entitet, Brojac.polje == "")) or 0
+        connection = db.connection()
+        sql = f"SELECT id, {', '.join(REPORT_TABLES[entitet])} FROM {entitet}"
+
+        def fetch():
+            # učitavanje je pola posla; otkazivanje se vidi i usred njega
+            for done, row in enumerate(connection.exec_driver_sql(sql), 1):
+                if done % JOB_PROGRESS_ROWS == 0:
+                    context.progress(done, 2 * total)
+                yield row
+
+        snapshot.load({entitet: fetch})
+    context.progress(1, 2)
+    result = snapshot.group(entitet, by, sum, filters, sort, limit=sys.maxsize)
+    with open(context.path, "wb") as output:
+        for start in range(0, len(result["rows"]), JOB_PROGRESS_ROWS):
+            rows = result["rows"][start:start + JOB_PROGRESS_ROWS]
+            output.write(b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows))
+            context.progress(len(result["rows"]) + start, 2 * len(result["rows"]))
+    return "application/x-ndjson"
+
+def job_capacity(context: JobContext) -> str:
+    """Kapaciteti svih lokacija kao NDJSON (isto što /lokacije/{id}/capacity za svaku)."""
+    index = CapacityIndex()
+    with ReadSessionLocal() as db:
+        capacity_feed(index).sync(db.connection())
+        ids = db.execute(select(Lokacija.id).order_by(Lokacija.id)).scalars().all()
+    with open(context.path, "wb") as output:
+        for start in range(0, len(ids), JOB_PROGRESS_ROWS):
+            rows = (index.capacity(lokacija_id) for lokacija_id in ids[start:start + JOB_PROGRESS_ROWS])
+            output.write(b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows if row))
+            context.progress(start, len(ids))
+    return "application/x-ndjson"
+
+def validate_history_job(params: dict) -> dict:
+    params = _job_params(params, ("retention_days",))
+    days = params.setdefault("retention_days", HISTORY_RETENTION_DAYS)
+    if not isinstance(days, (int, float)) or isinstance(days, bool) or days <= 0:
+        raise ValueError("retention_days must be a positive number")
+    return params
+
+def job_compact_history(context: JobContext, retention_days: float) -> str:
+    """Povijest stariju od `retention_days` sažima u jedan snapshot po retku.
+
+    Stanje za as_of unutar retencije ostaje isto; ranije od toga više se ne zna.
+    """
+    cutoff = time.time() - retention_days * 86400
+    with read_engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT DISTINCT tablica, row_id FROM povijest WHERE vrijeme < :cutoff"
+        ), {"cutoff": cutoff}).all()
+    removed = 0
+    for start in range(0, len(rows), HISTORY_COMPACT_BATCH):
+        context.progress(start, len(rows))
+        # kratke transakcije, da upisi API-ja ne čekaju cijelo sažimanje
+        with engine.begin() as connection:
+            for tablica, row_id in rows[start:start + HISTORY_COMPACT_BATCH]:
+                removed += compact_history(connection, tablica, row_id, cutoff)
+    with open(context.path, "wb") as output:
+        output.write(orjson.dumps({
+            "do": datetime.fromtimestamp(cutoff, timezone.utc).isoformat(),
+            "retci": len(rows),
+            "obrisano": removed,
+        }))
+    return "application/json"
+
+def job_rebuild(context: JobContext) -> str:
+    """Puni brojače, grid karte i FTS indekse iznova (npr. nakon ručnih izmjena baze).
+
+    Svaki korak je zasebna transakcija, jer upisi drugih čekaju dok traje.
+    """
+    steps = [("brojaci", rebuild_stats), ("lokacije_grid", rebuild_tile_grid)]
+    steps += [(f"{table}_fts", lambda connection, table=table: connection.execute(
+        text(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')"))) for table in FTS_COLUMNS]
+    timings = {}
+    for done, (name, rebuild) in enumerate(steps):
+        context.progress(done, len(steps))
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            rebuild(connection)
+        timings[name] = round(time.perf_counter() - start, 3)
+    with open(context.path, "wb") as output:
+        output.write(orjson.dumps({"seconds": timings}))
+    return "application/json"
+
+JOB_TYPES = {
+    "export": JobType(job_export, limit=2, validate=validate_export_job),
+    "report": JobType(job_report, limit=1, validate=validate_report_job),
+    "capacity": JobType(job_capacity, limit=1, validate=validate_no_params),
+    "rebuild": JobType(job_rebuild, limit=1, validate=validate_no_params),
+    "compact_history": JobType(job_compact_history, limit=1, validate=validate_history_job),
+}
+
+def update_job(job_id: int, *conditions, **values):
+    with engine.begin() as connection:
+        return connection.execute(update(Posao).where(Posao.id == job_id, *conditions).values(**values)).rowcount
+
+def report_job_progress(job_id: int, fraction: float) -> Optional[str]:
+    with engine.begin() as connection:
+        return connection.execute(
+            update(Posao).where(Posao.id == job_id).values(napredak=fraction).returning(Posao.status)
+        ).scalar()
+
+def run_job(job_id: int):
+    """Izvršava posao u procesu iz poola i upisuje rezultat, grešku ili otkazivanje."""
+    with SessionLocal() as db:
+        posao = db.get(Posao, job_id)
+        tip, parametri = posao.tip, json.loads(posao.parametri)
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    path = os.path.join(JOBS_DIR, f"{job_id}.part")
+    context = JobContext(job_id, path, lambda fraction: report_job_progress(job_id, fraction))
+    try:
+        content_type = JOB_TYPES[tip].handler(context, **parametri)
+        name = f"{job_id}.{JOB_EXTENSIONS[content_type]}"
+        os.replace(path, os.path.join(JOBS_DIR, name))
+        values = {"status": DONE, "napredak": 1.0, "rezultat": name, "content_type": content_type,
+                  "velicina": os.path.getsize(os.path.join(JOBS_DIR, name))}
+    except JobCancelled:
+        values = {"status": CANCELLED}
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job_id, tip)
+        values = {"status": FAILED, "greska": f"{type(e).__name__}: {e}"}
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    update_job(job_id, zavrsen=datetime.now(), azurirano=time.time(), **values)
+
+def claim_job(full: set) -> Optional[tuple]:
+    """Atomski preuzima najstariji posao na čekanju čija vrsta nije popunjena.
+
+    Dok dugi upis (npr. posao rebuild) drži bazu, scheduler preskače krug.
+    """
+    candidate = select(Posao.id).where(Posao.status == QUEUED)
+    if full:
+        candidate = candidate.where(Posao.tip.not_in(full))
+    # provjera bez write locka; red je gotovo uvijek prazan
+    with read_engine.connect() as connection:
+        if connection.execute(candidate.limit(1)).first() is None:
+            return None
+    try:
+        with engine.begin() as connection:
+            row = connection.execute(
+                update(Posao)
+                .where(Posao.id == candidate.order_by(Posao.id).limit(1).scalar_subquery())
+                .values(status=RUNNING, pokrenut=datetime.now(), azurirano=time.time())
+                .returning(Posao.id, Posao.tip)
+            ).first()
+    except OperationalError:
+        return None
+    return tuple(row) if row else None
+
+def fail_job(job_id: int, message: str):
+    update_job(job_id, Posao.status.in_((RUNNING, CANCELLING)),
+               status=FAILED, greska=message, zavrsen=datetime.now(), azurirano=time.time())
+
+def heartbeat_jobs(active: set):
+    """Obnavlja heartbeat poslova ovog procesa; napuštene poslove vraća u red (ili otkazuje)."""
+    now = time.time()
+    stale = and_(Posao.status.in_((RUNNING, CANCELLING)), Posao.azurirano < now - JOB_STALE_SECONDS,
+                 Posao.id.not_in(active))
+    try:
+        if active:
+            with engine.begin() as connection:
+                connection.execute(update(Posao).where(Posao.id.in_(active)).values(azurirano=now))
+        with read_engine.connect() as connection:
+            if connection.execute(select(Posao.id).where(stale).limit(1)).first() is None:
+                return
+        with engine.begin() as connection:
+            connection.execute(update(Posao).where(stale, Posao.status == RUNNING)
+                               .values(status=QUEUED, napredak=0.0, pokrenut=None))
+            connection.execute(update(Posao).where(stale, Posao.status == CANCELLING)
+                               .values(status=CANCELLED, zavrsen=datetime.now()))
+    except OperationalError:
+        # baza je zaključana dugim upisom; ponavlja se u sljedećem krugu
+        pass
+
+job_runner = JobRunner(claim_job, run_job, fail_job, heartbeat_jobs,
+                       {name: job_type.limit for name, job_type in JOB_TYPES.items()}, JOB_WORKERS,
+                       worker_env={"HITRONET_INIT_DB": "0"})
+metrike.gauge("hitronet_jobs_running", "Poslovi koji se izvršavaju u ovom procesu",
+              callback=lambda: job_runner.running)
+metrike.gauge("hitronet_jobs_started", "Poslovi pokrenuti iz ovog procesa", callback=lambda: job_runner.started)
+
+def posao_response(posao: Posao) -> PosaoResponse:
+    return PosaoResponse(
+        id=posao.id, tip=posao.tip, parametri=json.loads(posao.parametri), status=posao.status,
+        napredak=posao.napredak, greska=posao.greska, content_type=posao.content_type, velicina=posao.velicina,
+        rezultat_url=f"/jobs/{posao.id}/result" if posao.rezultat else None,
+        created_at=posao.created_at, pokrenut=posao.pokrenut, zavrsen=posao.zavrsen,
+    )
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple]:
+    """(početak, kraj) uključivo iz `Range: bytes=...`; None za cijelu datoteku.
+
+    Neispravan ili višestruki raspon se ignorira (šalje se cijela datoteka, kako
+    RFC 9110 dopušta); raspon izvan datoteke baca ValueError (416).
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # sufiks: zadnjih N bajtova
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+def iter_file(path: str, start: int, length: int):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+def file_response(path: str, media_type: str, filename: str, range_header: Optional[str]) -> Response:
+    """Datoteka kao stream, s podrškom za jedan byte range (nastavak prekinutog preuzimanja)."""
+    size = os.path.getsize(path)
+    # content-type ide kao header jer bi ga media_type za text/* dopunio drugim charsetom
+    headers = {"Accept-Ranges": "bytes", "Content-Type": media_type,
+               "Content-Disposition": f'attachment; filename="{filename}"'}
+    try:
+        requested = parse_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if requested is None:
+        return StreamingResponse(iter_file(path, 0, size), headers={**headers, "Content-Length": str(size)})
+    start, end = requested
+    headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(iter_file(path, start, end - start + 1), status_code=206, headers=headers)
+
 # === API ENDPOINTS ===
 
 # ROOT
@@ -207,191 +2624,566 @@ def read_root():
 # KORISNICI CRUD
 @app.post("/korisnici", response_model=KorisnikResponse)
 def create_korisnik(korisnik: KorisnikCreate, db: Session = Depends(get_db)):
-    db_korisnik = Korisnik(**korisnik.dict())
-    db.add(db_korisnik)
-    db.commit()
-    db.refresh(db_korisnik)
-    return db_korisnik
+    return create_row(db, Korisnik, korisnik)
+
+@app.post("/korisnici/bulk")
+async def bulk_korisnici(request: Request, db: Session = Depends(get_db)):
+    return await bulk_write(request, db, Korisnik, KorisnikCreate)
+
+@app.get("/korisnici/export")
+def export_korisnici(format: str = "ndjson", status: Optional[str] = None, tip_korisnika: Optional[str] = None):
+    return export_response(Korisnik, KorisnikResponse, format, {"status": status, "tip_korisnika": tip_korisnika})
 
 @app.get("/korisnici", response_model=List[KorisnikResponse])
-def read_korisnici(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    korisnici = db.query(Korisnik).offset(skip).limit(limit).all()
-    return korisnici
+def read_korisnici(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+                   cursor: Optional[str] = None, status: Optional[str] = None,
+                   tip_korisnika: Optional[str] = None, ids: Optional[str] = None,
+                   expand: Optional[str] = None, db: Session = Depends(get_read_db)):
+    filters = {"status": status, "tip_korisnika": tip_korisnika}
+    return json_page(db, Korisnik, response, skip, limit, sort, cursor, filters, ids, expand)
 
 @app.get("/korisnici/{korisnik_id}", response_model=KorisnikResponse)
-def read_korisnik(korisnik_id: int, db: Session = Depends(get_db)):
-    korisnik = db.query(Korisnik).filter(Korisnik.id == korisnik_id).first()
-    if korisnik is None:
-        raise HTTPException(status_code=404, detail="Korisnik not found")
-    return korisnik
+def read_korisnik(korisnik_id: int, expand: Optional[str] = None, as_of: Optional[str] = None,
+                  db: Session = Depends(get_read_db)):
+    return json_row(db, Korisnik, korisnik_id, expand, as_of)
 
 @app.put("/korisnici/{korisnik_id}", response_model=KorisnikResponse)
 def update_korisnik(korisnik_id: int, korisnik: KorisnikCreate, db: Session = Depends(get_db)):
-    db_korisnik = db.query(Korisnik).filter(Korisnik.id == korisnik_id).first()
-    if db_korisnik is None:
-        raise HTTPException(status_code=404, detail="Korisnik not found")
-    
-    for key, value in korisnik.dict().items():
-        setattr(db_korisnik, key, value)
-    
-    db.commit()
-    db.refresh(db_korisnik)
-    return db_korisnik
+    return update_row(db, Korisnik, korisnik_id, korisnik)
 
 @app.delete("/korisnici/{korisnik_id}")
 def delete_korisnik(korisnik_id: int, db: Session = Depends(get_db)):
-    db_korisnik = db.query(Korisnik).filter(Korisnik.id == korisnik_id).first()
-    if db_korisnik is None:
-        raise HTTPException(status_code=404, detail="Korisnik not found")
-    
-    db.delete(db_korisnik)
-    db.commit()
-    return {"message": "Korisnik deleted successfully"}
+    return delete_row(db, Korisnik, korisnik_id)
 
 # LOKACIJE CRUD
 @app.post("/lokacije", response_model=LokacijaResponse)
 def create_lokacija(lokacija: LokacijaCreate, db: Session = Depends(get_db)):
-    db_lokacija = Lokacija(**lokacija.dict())
-    db.add(db_lokacija)
-    db.commit()
-    db.refresh(db_lokacija)
-    return db_lokacija
+    return create_row(db, Lokacija, lokacija)
+
+@app.post("/lokacije/bulk")
+async def bulk_lokacije(request: Request, db: Session = Depends(get_db)):
+    return await bulk_write(request, db, Lokacija, LokacijaCreate)
+
+@app.get("/lokacije/export")
+def export_lokacije(format: str = "ndjson", status: Optional[str] = None, tip: Optional[str] = None,
+                    korisnik_id: Optional[int] = None):
+    return export_response(Lokacija, LokacijaResponse, format,
+                           {"status": status, "tip": tip, "korisnik_id": korisnik_id})
 
 @app.get("/lokacije", response_model=List[LokacijaResponse])
-def read_lokacije(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    lokacije = db.query(Lokacija).offset(skip).limit(limit).all()
-    return lokacije
+def read_lokacije(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+                  cursor: Optional[str] = None, status: Optional[str] = None, tip: Optional[str] = None,
+                  korisnik_id: Optional[int] = None, ids: Optional[str] = None,
+                  expand: Optional[str] = None, db: Session = Depends(get_read_db)):
+    filters = {"status": status, "tip": tip, "korisnik_id": korisnik_id}
+    return json_page(db, Lokacija, response, skip, limit, sort, cursor, filters, ids, expand)
+
+# Geo upiti moraju biti prije /lokacije/{lokacija_id}
+@app.get("/lokacije/bbox", response_model=List[LokacijaResponse])
+def read_lokacije_bbox(min_lat: float, max_lat: float, min_lon: float, max_lon: float,
+                       limit: int = 1000, db: Session = Depends(get_read_db)):
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    return db.execute(bbox_statement(min_lat, max_lat, min_lon, max_lon).limit(limit)).scalars().all()
+
+@app.get("/lokacije/tiles/{z}/{x}/{y}", response_model=TileResponse)
+def read_lokacije_tile(z: int, x: int, y: int, tip: Optional[str] = None, status: Optional[str] = None,
+                       db: Session = Depends(get_read_db)):
+    """Lokacije slippy-map tilea z/x/y, grupirane u klastere s brojem po tipu i statusu."""
+    if not 0 <= z <= TILE_MAX_ZOOM or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+        raise HTTPException(status_code=400, detail="Invalid tile")
+    filters = {"tip": tip, "status": status}
+    if z > TILE_CLUSTER_MAX_ZOOM:
+        return ORJSONResponse(tile_points(db, z, x, y, filters))
+    return ORJSONResponse(tile_clusters(db, z, x, y, filters))
+
+@app.get("/lokacije/nearest", response_model=List[LokacijaUdaljenost])
+def read_lokacije_nearest(lat: float, lon: float, k: int = 10, db: Session = Depends(get_read_db)):
+    if not 1 <= k <= 1000:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 1000")
+    return with_distance(nearest(db, lat, lon, k))
+
+@app.get("/lokacije/radius", response_model=List[LokacijaUdaljenost])
+def read_lokacije_radius(lat: float, lon: float, radius_km: float, limit: int = 1000,
+                         db: Session = Depends(get_read_db)):
+    if radius_km <= 0:
+        raise HTTPException(status_code=400, detail="radius_km must be positive")
+    return with_distance(within_radius(db, lat, lon, radius_km, limit=limit))
+
+@app.get("/lokacije/capacity")
+def read_lokacije_capacity(ids: str, db: Session = Depends(get_read_db)):
+    """Kapaciteti više lokacija odjednom (`?ids=1,2,3`); nepostojeće se izostavljaju."""
+    index = get_capacity(db)
+    results = (index.capacity(lokacija_id) for lokacija_id in parse_ids(ids))
+    return [result for result in results if result is not None]
 
 @app.get("/lokacije/{lokacija_id}", response_model=LokacijaResponse)
-def read_lokacija(lokacija_id: int, db: Session = Depends(get_db)):
-    lokacija = db.query(Lokacija).filter(Lokacija.id == lokacija_id).first()
-    if lokacija is None:
+def read_lokacija(lokacija_id: int, expand: Optional[str] = None, as_of: Optional[str] = None,
+                  db: Session = Depends(get_read_db)):
+    return json_row(db, Lokacija, lokacija_id, expand, as_of)
+
+@app.get("/lokacije/{lokacija_id}/capacity")
+def read_lokacija_capacity(lokacija_id: int, db: Session = Depends(get_read_db)):
+    """Broj veza, vlakna, parice, brzina i duljina veza lokacije, ukupno i po statusu veze."""
+    result = get_capacity(db).capacity(lokacija_id)
+    if result is None:
         raise HTTPException(status_code=404, detail="Lokacija not found")
-    return lokacija
+    return result
 
 @app.put("/lokacije/{lokacija_id}", response_model=LokacijaResponse)
 def update_lokacija(lokacija_id: int, lokacija: LokacijaCreate, db: Session = Depends(get_db)):
-    db_lokacija = db.query(Lokacija).filter(Lokacija.id == lokacija_id).first()
-    if db_lokacija is None:
-        raise HTTPException(status_code=404, detail="Lokacija not found")
-    
-    for key, value in lokacija.dict().items():
-        setattr(db_lokacija, key, value)
-    
-    db.commit()
-    db.refresh(db_lokacija)
-    return db_lokacija
+    return update_row(db, Lokacija, lokacija_id, lokacija)
 
 @app.delete("/lokacije/{lokacija_id}")
 def delete_lokacija(lokacija_id: int, db: Session = Depends(get_db)):
-    db_lokacija = db.query(Lokacija).filter(Lokacija.id == lokacija_id).first()
-    if db_lokacija is None:
-        raise HTTPException(status_code=404, detail="Lokacija not found")
-    
-    db.delete(db_lokacija)
-    db.commit()
-    return {"message": "Lokacija deleted successfully"}
+    return delete_row(db, Lokacija, lokacija_id)
 
 # VEZE CRUD
 @app.post("/veze", response_model=VezaResponse)
 def create_veza(veza: VezaCreate, db: Session = Depends(get_db)):
-    db_veza = Veza(**veza.dict())
-    db.add(db_veza)
-    db.commit()
-    db.refresh(db_veza)
-    return db_veza
+    return create_row(db, Veza, veza)
+
+@app.post("/veze/bulk")
+async def bulk_veze(request: Request, db: Session = Depends(get_db)):
+    return await bulk_write(request, db, Veza, VezaCreate)
+
+@app.get("/veze/export")
+def export_veze(format: str = "ndjson", status: Optional[str] = None, tip: Optional[str] = None,
+                lokacija_a_id: Optional[int] = None, lokacija_b_id: Optional[int] = None):
+    return export_response(Veza, VezaResponse, format, {
+        "status": status, "tip": tip, "lokacija_a_id": lokacija_a_id, "lokacija_b_id": lokacija_b_id,
+    })
 
 @app.get("/veze", response_model=List[VezaResponse])
-def read_veze(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    veze = db.query(Veza).offset(skip).limit(limit).all()
-    return veze
+def read_veze(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+              cursor: Optional[str] = None, status: Optional[str] = None, tip: Optional[str] = None,
+              lokacija_a_id: Optional[int] = None, lokacija_b_id: Optional[int] = None,
+              ids: Optional[str] = None, expand: Optional[str] = None, db: Session = Depends(get_read_db)):
+    filters = {"status": status, "tip": tip, "lokacija_a_id": lokacija_a_id, "lokacija_b_id": lokacija_b_id}
+    return json_page(db, Veza, response, skip, limit, sort, cursor, filters, ids, expand)
 
 @app.get("/veze/{veza_id}", response_model=VezaResponse)
-def read_veza(veza_id: int, db: Session = Depends(get_db)):
-    veza = db.query(Veza).filter(Veza.id == veza_id).first()
-    if veza is None:
+def read_veza(veza_id: int, expand: Optional[str] = None, as_of: Optional[str] = None,
+              db: Session = Depends(get_read_db)):
+    return json_row(db, Veza, veza_id, expand, as_of)
+
+@app.get("/veze/{veza_id}/length")
+def read_veza_length(veza_id: int, db: Session = Depends(get_read_db)):
+    """Duljina veze po velikoj kružnici između krajnjih lokacija; null ako nekoj nedostaju koordinate."""
+    index = get_capacity(db)
+    if veza_id not in index.links:
         raise HTTPException(status_code=404, detail="Veza not found")
-    return veza
+    return {"veza_id": veza_id, "duljina_km": index.length(veza_id)}
 
 @app.put("/veze/{veza_id}", response_model=VezaResponse)
 def update_veza(veza_id: int, veza: VezaCreate, db: Session = Depends(get_db)):
-    db_veza = db.query(Veza).filter(Veza.id == veza_id).first()
-    if db_veza is None:
-        raise HTTPException(status_code=404, detail="Veza not found")
-    
-    for key, value in veza.dict().items():
-        setattr(db_veza, key, value)
-    
-    db.commit()
-    db.refresh(db_veza)
-    return db_veza
+    return update_row(db, Veza, veza_id, veza)
 
 @app.delete("/veze/{veza_id}")
 def delete_veza(veza_id: int, db: Session = Depends(get_db)):
-    db_veza = db.query(Veza).filter(Veza.id == veza_id).first()
-    if db_veza is None:
-        raise HTTPException(status_code=404, detail="Veza not found")
-    
-    db.delete(db_veza)
-    db.commit()
-    return {"message": "Veza deleted successfully"}
+    return delete_row(db, Veza, veza_id)
 
 # OPREMA CRUD
 @app.post("/oprema", response_model=OpremaResponse)
 def create_oprema(oprema: OpremaCreate, db: Session = Depends(get_db)):
-    db_oprema = Oprema(**oprema.dict())
-    db.add(db_oprema)
-    db.commit()
-    db.refresh(db_oprema)
-    return db_oprema
+    return create_row(db, Oprema, oprema)
+
+@app.post("/oprema/bulk")
+async def bulk_oprema(request: Request, db: Session = Depends(get_db)):
+    return await bulk_write(request, db, Oprema, OpremaCreate)
+
+@app.get("/oprema/export")
+def export_oprema(format: str = "ndjson", status: Optional[str] = None, tip: Optional[str] = None,
+                  lokacija_id: Optional[int] = None):
+    return export_response(Oprema, OpremaResponse, format, {"status": status, "tip": tip, "lokacija_id": lokacija_id})
 
 @app.get("/oprema", response_model=List[OpremaResponse])
-def read_oprema(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    oprema = db.query(Oprema).offset(skip).limit(limit).all()
-    return oprema
+def read_oprema(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+                cursor: Optional[str] = None, status: Optional[str] = None, tip: Optional[str] = None,
+                lokacija_id: Optional[int] = None, ids: Optional[str] = None,
+                expand: Optional[str] = None, db: Session = Depends(get_read_db)):
+    filters = {"status": status, "tip": tip, "lokacija_id": lokacija_id}
+    return json_page(db, Oprema, response, skip, limit, sort, cursor, filters, ids, expand)
 
 @app.get("/oprema/{oprema_id}", response_model=OpremaResponse)
-def read_oprema_single(oprema_id: int, db: Session = Depends(get_db)):
-    oprema = db.query(Oprema).filter(Oprema.id == oprema_id).first()
-    if oprema is None:
-        raise HTTPException(status_code=404, detail="Oprema not found")
-    return oprema
+def read_oprema_single(oprema_id: int, expand: Optional[str] = None, as_of: Optional[str] = None,
+                       db: Session = Depends(get_read_db)):
+    return json_row(db, Oprema, oprema_id, expand, as_of)
 
 @app.put("/oprema/{oprema_id}", response_model=OpremaResponse)
 def update_oprema(oprema_id: int, oprema: OpremaCreate, db: Session = Depends(get_db)):
-    db_oprema = db.query(Oprema).filter(Oprema.id == oprema_id).first()
-    if db_oprema is None:
-        raise HTTPException(status_code=404, detail="Oprema not found")
-    
-    for key, value in oprema.dict().items():
-        setattr(db_oprema, key, value)
-    
-    db.commit()
-    db.refresh(db_oprema)
-    return db_oprema
+    return update_row(db, Oprema, oprema_id, oprema)
 
 @app.delete("/oprema/{oprema_id}")
 def delete_oprema(oprema_id: int, db: Session = Depends(get_db)):
-    db_oprema = db.query(Oprema).filter(Oprema.id == oprema_id).first()
-    if db_oprema is None:
-        raise HTTPException(status_code=404, detail="Oprema not found")
-    
-    db.delete(db_oprema)
-    db.commit()
-    return {"message": "Oprema deleted successfully"}
+    return delete_row(db, Oprema, oprema_id)
+
+# PRETRAGA
+SEARCH_MODELS = {"korisnici": Korisnik, "lokacije": Lokacija, "oprema": Oprema}
+
+def fts_query(q: str) -> str:
+    """Svaka riječ postaje prefiks upit ("rijec"*); sve riječi moraju biti pronađene."""
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", q))
+
+@app.get("/search", response_model=PretragaResponse)
+def search(q: str, limit: int = 10, entiteti: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """Pretraga po nazivu, adresi, OIB-u, serijskom i inventurnom broju, proizvođaču i modelu.
+
+    Rezultati su grupirani po entitetu i sortirani po bm25 relevantnosti.
+    """
+    match = fts_query(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Query must contain at least one word")
+    if not 1 <= limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+    wanted = entiteti.split(",") if entiteti else list(SEARCH_MODELS)
+    unknown = set(wanted) - set(SEARCH_MODELS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown entity: {', '.join(sorted(unknown))}")
+
+    result = {"q": q}
+    for table in wanted:
+        model, fts = SEARCH_MODELS[table], fts_tables[table]
+        stmt = (
+            select(model)
+            .join(fts, fts.c.rowid == model.id)
+            .where(fts.c[f"{table}_fts"].match(match))
+            .order_by(fts.c.rank)
+            .limit(limit)
+        )
+        result[table] = db.execute(stmt).scalars().all()
+    return result
+
+# TOPOLOGIJA
+@app.get("/topology/path")
+def read_topology_path(from_: int = Query(alias="from"), to: int = Query(), weight: str = "hops",
+                       all_links: bool = False, db: Session = Depends(get_read_db)):
+    """Najkraći put između dvije lokacije po broju skokova ili inverznoj propusnosti.
+
+    Bez `all_links` koriste se samo aktivne veze.
+    """
+    if weight not in ("hops", "bandwidth"):
+        raise HTTPException(status_code=400, detail="weight must be 'hops' or 'bandwidth'")
+    statuses = None if all_links else ACTIVE_STATUSES
+    path = get_topology(db).shortest_path(from_, to, weight, statuses)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Path not found")
+    return {
+        "from": from_,
+        "to": to,
+        "weight": weight,
+        "lokacije": path.lokacije,
+        "veze": path.veze,
+        "hops": len(path.veze),
+        "cost": round(path.cost, 6),
+    }
+
+@app.get("/topology/components")
+def read_topology_components(min_size: int = 1, all_links: bool = False, db: Session = Depends(get_read_db)):
+    components = get_topology(db).components(None if all_links else ACTIVE_STATUSES)
+    return {
+        "count": len(components),
+        "components": [{"size": len(c), "lokacije": c} for c in components if len(c) >= min_size],
+    }
+
+# ANALIZA UTJECAJA KVAROVA
+@app.get("/impact/veza/{veza_id}")
+def read_impact_veza(veza_id: int, db: Session = Depends(get_read_db)):
+    """Korisnici koji gube vezu prema svim servisnim lokacijama ako veza padne.
+
+    Za vezu koja je već u kvaru vraća korisnike koji su zbog nje trenutno bez servisa.
+    """
+    result = impact_result(db, ImpactSnapshot.veza_impact, veza_id, "Veza", topologija.edges.__contains__)
+    return impact_response({"veza_id": veza_id, **result})
+
+@app.get("/impact/lokacija/{lokacija_id}")
+def read_impact_lokacija(lokacija_id: int, db: Session = Depends(get_read_db)):
+    """Korisnici koji gube servis ako lokacija postane neaktivna (ili su bez servisa jer jest)."""
+    result = impact_result(db, ImpactSnapshot.lokacija_impact, lokacija_id, "Lokacija", topologija.nodes.__contains__)
+    return impact_response({"lokacija_id": lokacija_id, **result})
+
+# IZVJEŠTAJI
+REPORT_PARAMS = {"by", "sum", "sort", "limit", "rows", "columns"}
+REPORT_MAX_LIMIT = 10000
+
+def report_filters(request: Request) -> dict:
+    """Ostali query parametri su filteri jednakosti po koloni snapshota (npr. `status=aktivan`)."""
+    return {name: value for name, value in request.query_params.items() if name not in REPORT_PARAMS}
+
+def split_columns(value: Optional[str]) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()] if value else []
+
+@app.get("/reports/{entitet}/group")
+def read_report_group(entitet: str, request: Request, by: Optional[str] = None, sum: Optional[str] = None,
+                      sort: str = "count", limit: int = Query(default=1000, ge=1, le=REPORT_MAX_LIMIT),
+                      db: Session = Depends(get_read_db)):
+    """Broj redaka (i sume brojčanih kolona) po kombinaciji vrijednosti kolona `by`.
+
+    Npr. `/reports/oprema/group?by=lokacija_id,proizvodjac,status` ili
+    `/reports/veze/group?by=tip&sum=brzina_mbps`. Datumi se grupiraju po mjesecu.
+    """
+    if entitet not in REPORT_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown entity")
+    if sort not in ("count", "key"):
+        raise HTTPException(status_code=400, detail="sort must be 'count' or 'key'")
+    try:
+        return get_reports(db).group(entitet, split_columns(by), split_columns(sum), report_filters(request),
+                                     sort, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/reports/{entitet}/pivot")
+def read_report_pivot(entitet: str, request: Request, rows: str, columns: str, sum: Optional[str] = None,
+                      limit: int = Query(default=1000, ge=1, le=REPORT_MAX_LIMIT),
+                      db: Session = Depends(get_read_db)):
+    """Matrica `rows` x `columns` s brojem redaka ili sumom kolone `sum` u ćelijama."""
+    if entitet not in REPORT_TABLES:
+        raise HTTPException(status_code=404, detail="Unknown entity")
+    try:
+        return get_reports(db).pivot(entitet, rows, columns, sum, report_filters(request), limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# PROMJENE (DELTA SYNC)
+CHANGE_MODELS = {"korisnici": Korisnik, "lokacije": Lokacija, "veze": Veza, "oprema": Oprema}
+CHANGES_MAX_LIMIT = 10000
+CHANGES_MAX_WAIT = 60.0
+# koliko često long-poll/SSE provjeravaju bazu zbog upisa iz drugih procesa
+CHANGES_POLL_INTERVAL = 1.0
+SSE_HEARTBEAT = 15.0
+
+def load_changes(since: Optional[int], limit: int) -> PromjeneResponse:
+    """Retci i tombstoni sa seq > since, najviše `limit`, poredani po seq.
+
+    Bez `since` vraća samo trenutni kraj slijeda, od kojeg klijent kreće.
+    Sve se čita u jednoj read transakciji, pa je rezultat konzistentan snapshot.
+    """
+    with ReadSessionLocal() as db:
+        head = db.scalar(select(Verzija.verzija).where(Verzija.tablica == SEQUENCE_ROW)) or 0
+        if since is None:
+            return PromjeneResponse(seq=head)
+        # svaki izvor daje svojih limit + 1 najmanjih, pa je globalnih `limit` sigurno među njima
+        candidates = []
+        for table, model in CHANGE_MODELS.items():
+            rows = db.scalars(select(model).where(model.seq > since).order_by(model.seq).limit(limit + 1))
+            candidates += [(row.seq, table, row, row.id) for row in rows]
+        tombstones = db.execute(
+            select(Brisanje.seq, Brisanje.tablica, Brisanje.row_id)
+            .where(Brisanje.seq > since).order_by(Brisanje.seq).limit(limit + 1)
+        )
+        candidates += [(seq, tablica, None, row_id) for seq, tablica, row_id in tombstones]
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        more = len(candidates) > limit
+        batch = candidates[:limit]
+        result = {"seq": batch[-1][0] if more else head, "more": more, "obrisano": {}}
+        for seq, table, row, row_id in batch:
+            if row is None:
+                result["obrisano"].setdefault(table, []).append(row_id)
+            else:
+                result.setdefault(table, []).append(row)
+        return PromjeneResponse.model_validate(result, from_attributes=True)
+
+def has_changes(result: PromjeneResponse) -> bool:
+    return result.more or bool(result.obrisano) or any(getattr(result, table) for table in CHANGE_MODELS)
+
+def check_changes_params(limit: int, wait: float):
+    if not 1 <= limit <= CHANGES_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {CHANGES_MAX_LIMIT}")
+    if not 0 <= wait <= CHANGES_MAX_WAIT:
+        raise HTTPException(status_code=400, detail=f"wait must be between 0 and {CHANGES_MAX_WAIT:g}")
+
+@app.get("/changes", response_model=PromjeneResponse)
+async def read_changes(since: Optional[int] = None, limit: int = 1000, wait: float = 0):
+    """Promjene od `since`; s `wait` > 0 čeka (long-poll) dok se nešto ne promijeni."""
+    check_changes_params(limit, wait)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        # pretplata prije čitanja, da commit između čitanja i čekanja ne promakne
+        future = change_waiters.subscribe()
+        result = await run_in_threadpool(load_changes, since, limit)
+        remaining = deadline - loop.time()
+        if since is None or has_changes(result) or remaining <= 0:
+            change_waiters.discard(future)
+            return result
+        await change_waiters.wait(future, min(remaining, CHANGES_POLL_INTERVAL))
+
+@app.get("/changes/stream")
+async def stream_changes(request: Request, since: Optional[int] = None, limit: int = 1000):
+    """Server-Sent Events: događaj `changes` za svaku seriju promjena, `id` je seq.
+
+    Nakon prekida EventSource šalje Last-Event-ID pa se nastavlja gdje je stao.
+    """
+    check_changes_params(limit, 0)
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id is not None:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    async def events():
+        position = since
+        if position is None:
+            position = (await run_in_threadpool(load_changes, None, limit)).seq
+        idle = 0.0
+        while not await request.is_disconnected():
+            future = change_waiters.subscribe()
+            result = await run_in_threadpool(load_changes, position, limit)
+            if has_changes(result):
+                position, idle = result.seq, 0.0
+                yield f"id: {result.seq}\nevent: changes\ndata: {result.model_dump_json()}\n\n"
+                if result.more:
+                    change_waiters.discard(future)
+                    continue
+            elif idle >= SSE_HEARTBEAT:
+                idle = 0.0
+                yield ": ping\n\n"
+            started = asyncio.get_running_loop().time()
+            await change_waiters.wait(future, CHANGES_POLL_INTERVAL)
+            idle += asyncio.get_running_loop().time() - started
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 # STATISTICS ENDPOINT
-@app.get("/stats")
-def get_statistics(db: Session = Depends(get_db)):
+def stats_response(brojaci):
+    counts = {table: 0 for table in STATS_FIELDS}
+    detalji = {table: {field: {} for field in fields} for table, fields in STATS_FIELDS.items()}
+    for brojac in brojaci:
+        if brojac.polje == "":
+            counts[brojac.entitet] = brojac.broj
+        elif brojac.entitet in detalji and brojac.polje in detalji[brojac.entitet]:
+            detalji[brojac.entitet][brojac.polje][brojac.vrijednost] = brojac.broj
     return {
-        "korisnici": db.query(Korisnik).count(),
-        "lokacije": db.query(Lokacija).count(),
-        "veze": db.query(Veza).count(),
-        "oprema": db.query(Oprema).count(),
-        "aktivni_korisnici": db.query(Korisnik).filter(Korisnik.status == "aktivan").count(),
-        "aktivne_lokacije": db.query(Lokacija).filter(Lokacija.status == "aktivna").count()
+        **counts,
+        "aktivni_korisnici": detalji["korisnici"]["status"].get("aktivan", 0),
+        "aktivne_lokacije": detalji["lokacije"]["status"].get("aktivna", 0),
+        "veze_u_kvaru": detalji["veze"]["status"].get("u_kvaru", 0),
+        "oprema_rezerva": detalji["oprema"]["status"].get("rezerva", 0),
+        "detalji": detalji,
     }
 
+@app.get("/stats")
+def get_statistics(db: Session = Depends(get_read_db)):
+    # Brojači su materijalizirani, pa je ovo jedan upit nad par desetaka redaka
+    return stats_response(db.query(Brojac).filter(Brojac.broj != 0))
+
+# BOOTSTRAP
+@app.get("/bootstrap", response_model=BootstrapResponse)
+def read_bootstrap(limit: int = 100, db: Session = Depends(get_read_db)):
+    """Prva stranica svakog entiteta, statistika i trenutni seq u jednom zahtjevu.
+
+    Sve se čita u jednoj read transakciji, pa su liste, brojači i seq isti
+    snapshot; klijent od vraćenog seq nastavlja preko /changes.
+    """
+    connection = db.connection()
+    payload = {"seq": connection.scalar(select(Verzija.verzija).where(Verzija.tablica == SEQUENCE_ROW)) or 0,
+               "next_cursor": {}}
+    for table, model in CHANGE_MODELS.items():
+        page = Response()
+        stmt = page_statement(model, 0, limit, "id", None, columns=RESPONSE_COLUMNS[model])
+        rows = finish_page(connection.execute(stmt).all(), page, limit, "id")
+        payload[table] = rows_payload(model, rows)
+        payload["next_cursor"][table] = page.headers.get("x-next-cursor")
+    payload["stats"] = stats_response(db.query(Brojac).filter(Brojac.broj != 0))
+    return ORJSONResponse(payload)
+
+# POVIJEST
+@app.get("/{entitet}/{row_id}/history")
+def read_history(entitet: str, row_id: int, limit: int = Query(default=100, ge=1, le=HISTORY_MAX_LIMIT),
+                 before: Optional[int] = None, polje: Optional[str] = None, snapshots: bool = False,
+                 db: Session = Depends(get_read_db)):
+    """Promjene retka od najnovije: unos, izmjene (samo promijenjene kolone) i brisanje.
+
+    `polje` ograničava izmjene na one koje mijenjaju to polje, `before` je kursor
+    (`next_before` prethodne stranice), a `snapshots=true` uključuje i puna stanja.
+    """
+    if entitet not in HISTORY_MODELS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return ORJSONResponse(history_page(db, entitet, row_id, limit, before, polje, snapshots))
+
+# POSLOVI
+@app.post("/jobs", response_model=PosaoResponse, status_code=202)
+def create_job(posao: PosaoCreate, db: Session = Depends(get_db)):
+    """Predaje pozadinski posao; stanje i napredak prate se na /jobs/{id}."""
+    job_type = JOB_TYPES.get(posao.tip)
+    if job_type is None:
+        raise HTTPException(status_code=400, detail=f"tip must be one of {', '.join(JOB_TYPES)}")
+    try:
+        parametri = job_type.validate(dict(posao.parametri))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def op(session: Session):
+        obj = Posao(tip=posao.tip, parametri=json.dumps(parametri), status=QUEUED, napredak=0.0)
+        session.add(obj)
+        session.flush()
+        return posao_response(obj)
+    result = run_write(db, op)
+    job_runner.wake()
+    return result
+
+@app.get("/jobs", response_model=List[PosaoResponse])
+def read_jobs(status: Optional[str] = None, tip: Optional[str] = None, limit: int = Query(default=100, ge=1, le=1000),
+              db: Session = Depends(get_read_db)):
+    job_runner.wake()
+    stmt = select(Posao).order_by(Posao.id.desc()).limit(limit)
+    if status is not None:
+        stmt = stmt.where(Posao.status == status)
+    if tip is not None:
+        stmt = stmt.where(Posao.tip == tip)
+    return [posao_response(posao) for posao in db.execute(stmt).scalars()]
+
+@app.get("/jobs/{job_id}", response_model=PosaoResponse)
+def read_job(job_id: int, db: Session = Depends(get_read_db)):
+    # scheduler se pokreće lijeno; nakon restarta ga pokrene prvo praćenje posla
+    job_runner.wake()
+    return posao_response(get_row_or_404(db, Posao, job_id))
+
+@app.post("/jobs/{job_id}/cancel", response_model=PosaoResponse)
+def cancel_job(job_id: int, db: Session = Depends(get_db)):
+    """Posao na čekanju odmah se otkazuje, a posao u tijeku pri sljedećem javljanju napretka."""
+    def op(session: Session):
+        posao = get_row_or_404(session, Posao, job_id)
+        if posao.status in FINISHED:
+            raise HTTPException(status_code=409, detail=f"Job already {posao.status}")
+        if posao.status == QUEUED:
+            posao.status, posao.zavrsen = CANCELLED, datetime.now()
+        else:
+            posao.status = CANCELLING
+        session.flush()
+        return posao_response(posao)
+    return run_write(db, op)
+
+@app.delete("/jobs/{job_id}")
+def delete_job(job_id: int, db: Session = Depends(get_db)):
+    """Briše završen posao i datoteku rezultata."""
+    def op(session: Session):
+        posao = get_row_or_404(session, Posao, job_id)
+        if posao.status not in FINISHED:
+            raise HTTPException(status_code=409, detail="Job is still running; cancel it first")
+        session.delete(posao)
+        return posao.rezultat
+    rezultat = run_write(db, op)
+    if rezultat and os.path.exists(os.path.join(JOBS_DIR, rezultat)):
+        os.remove(os.path.join(JOBS_DIR, rezultat))
+    return {"message": "Job deleted"}
+
+@app.get("/jobs/{job_id}/result")
+def read_job_result(job_id: int, request: Request, db: Session = Depends(get_read_db)):
+    """Datoteka rezultata; `Range: bytes=...` vraća dio (206) za nastavak preuzimanja."""
+    posao = get_row_or_404(db, Posao, job_id)
+    path = os.path.join(JOBS_DIR, posao.rezultat) if posao.rezultat else None
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Result not available")
+    return file_response(path, posao.content_type, f"{posao.tip}-{posao.rezultat}", request.headers.get("range"))
+
+# METRIKE
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(metrike.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,283 @@
+"""
+Hitronet EMS - asinkrona varijanta API-ja
+Isti modeli i sheme kao main.py, ali nad AsyncEngine/AsyncSession (aiosqlite),
+pa jedan worker može držati tisuće istovremenih konekcija bez threadpoola.
+Od ruta su tu CRUD za četiri entiteta, /stats, /bootstrap i /metrics; ostale
+(povijest, geo, topologija, izvještaji, bulk, exporti...) su samo u main.py.
+
+Pokretanje: uvicorn main_async:app
+"""
+
+from fastapi import FastAPI, HTTPException, Depends, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import inspect, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import RelationshipDirection, selectinload
+from typing import List, Optional
+
+from main import (
+    SQLALCHEMY_DATABASE_URL, DB_PROFILE, create_engines, integrity_error_handler, referenced_conflict,
+    ConditionalGetMiddleware, MetricsMiddleware, metrike,
+    page_statement, finish_page, batch_statement, stats_response, RESPONSE_COLUMNS, rows_payload,
+    parse_expand, expand_options, expanded_payload,
+    Korisnik, Lokacija, Veza, Oprema, Brojac, Verzija, SEQUENCE_ROW, CHANGE_MODELS, BootstrapResponse,
+    KorisnikCreate, KorisnikResponse, LokacijaCreate, LokacijaResponse,
+    VezaCreate, VezaResponse, OpremaCreate, OpremaResponse,
+)
+
+# === DATABASE SETUP ===
+# Shemu kreira main.py pri importu; ovdje samo otvaramo async poolove nad istom bazom
+ASYNC_DATABASE_URL = make_url(SQLALCHEMY_DATABASE_URL).set(drivername="sqlite+aiosqlite")
+async_engine, async_read_engine = create_engines(ASYNC_DATABASE_URL, DB_PROFILE, asynchronous=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+async def read_versions() -> dict:
+    """Kao main.read_versions, ali kroz AsyncEngine, bez threadpoola."""
+    async with async_read_engine.connect() as connection:
+        rows = await connection.execute(select(Verzija.tablica, Verzija.verzija, Verzija.promijenjeno))
+        return {tablica: (verzija, promijenjeno) for tablica, verzija, promijenjeno in rows}
+
+# === FastAPI APP ===
+app = FastAPI(title="Hitronet EMS - MVP (async)", version="0.1.0")
+
+app.add_middleware(ConditionalGetMiddleware, versions=read_versions)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Za produkciju specificirati domene
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
+)
+app.add_middleware(MetricsMiddleware)
+app.add_exception_handler(IntegrityError, integrity_error_handler)
+
+# Dependency
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+# === HELPERS ===
+async def get_or_404(db: AsyncSession, model, row_id: int, options=()):
+    obj = await db.get(model, row_id, options=options)
+    if obj is None:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    return obj
+
+async def create_row(db: AsyncSession, model, data):
+    obj = model(**data.model_dump())
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+async def update_row(db: AsyncSession, model, row_id: int, data):
+    obj = await get_or_404(db, model, row_id)
+    for key, value in data.model_dump().items():
+        setattr(obj, key, value)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+async def delete_row(db: AsyncSession, model, row_id: int):
+    # ORM kod brisanja roditelja postavlja FK djece na NULL; u async sesiji
+    # djeca moraju biti učitana unaprijed jer lazy load nije dozvoljen
+    children = [
+        selectinload(rel) for rel in inspect(model).relationships
+        if rel.direction is RelationshipDirection.ONETOMANY
+    ]
+    obj = await get_or_404(db, model, row_id, options=children)
+    await db.delete(obj)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # isti 409 kao main.delete_row umjesto sirove SQLite poruke
+        await db.rollback()
+        raise referenced_conflict(model)
+    await db.commit()
+    return {"message": f"{model.__name__} deleted successfully"}
+
+async def read_row(db: AsyncSession, model, row_id: int, expand: Optional[str] = None):
+    tree = parse_expand(model, expand)
+    if tree:
+        obj = (await db.scalars(select(model).where(model.id == row_id).options(*expand_options(model, tree)))).first()
+        if obj is None:
+            raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+        return ORJSONResponse(expanded_payload(model, obj, tree))
+    row = (await db.execute(select(*RESPONSE_COLUMNS[model]).where(model.id == row_id))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"{model.__name__} not found")
+    return ORJSONResponse(rows_payload(model, [row])[0])
+
+async def read_page(db: AsyncSession, model, response: Response, skip: int, limit: int, sort: str, cursor: Optional[str],
+                    filters: Optional[dict] = None, ids: Optional[str] = None, expand: Optional[str] = None):
+    # isti brzi put kao json_page u main.py: kolone umjesto ORM objekata, orjson
+    tree = parse_expand(model, expand)
+    if tree:
+        stmt = batch_statement(model, ids, filters) if ids is not None else \
+            page_statement(model, skip, limit, sort, cursor, filters)
+        rows = (await db.scalars(stmt.options(*expand_options(model, tree)))).all()
+        if ids is None:
+            rows = finish_page(rows, response, limit, sort)
+        payload = [expanded_payload(model, row, tree) for row in rows]
+        return ORJSONResponse(payload, headers=dict(response.headers))
+    if ids is not None:
+        rows = (await db.execute(batch_statement(model, ids, filters, RESPONSE_COLUMNS[model]))).all()
+        return ORJSONResponse(rows_payload(model, rows))
+    stmt = page_statement(model, skip, limit, sort, cursor, filters, RESPONSE_COLUMNS[model])
+    rows = finish_page((await db.execute(stmt)).all(), response, limit, sort)
+    return ORJSONResponse(rows_payload(model, rows), headers=dict(response.headers))
+
+# === API ENDPOINTS ===
+
+# ROOT
+@app.get("/")
+async def read_root():
+    return {
+        "message": "Hitronet EMS MVP API (async)",
+        "version": "0.1.0",
+        "endpoints": {
+            "korisnici": "/korisnici",
+            "lokacije": "/lokacije",
+            "veze": "/veze",
+            "oprema": "/oprema"
+        }
+    }
+
+# KORISNICI CRUD
+@app.post("/korisnici", response_model=KorisnikResponse)
+async def create_korisnik(korisnik: KorisnikCreate, db: AsyncSession = Depends(get_db)):
+    return await create_row(db, Korisnik, korisnik)
+
+@app.get("/korisnici", response_model=List[KorisnikResponse])
+async def read_korisnici(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+                         cursor: Optional[str] = None, status: Optional[str] = None,
+                         tip_korisnika: Optional[str] = None, ids: Optional[str] = None,
+                         expand: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    filters = {"status": status, "tip_korisnika": tip_korisnika}
+    return await read_page(db, Korisnik, response, skip, limit, sort, cursor, filters, ids, expand)
+
+@app.get("/korisnici/{korisnik_id}", response_model=KorisnikResponse)
+async def read_korisnik(korisnik_id: int, expand: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    return await read_row(db, Korisnik, korisnik_id, expand)
+
+@app.put("/korisnici/{korisnik_id}", response_model=KorisnikResponse)
+async def update_korisnik(korisnik_id: int, korisnik: KorisnikCreate, db: AsyncSession = Depends(get_db)):
+    return await update_row(db, Korisnik, korisnik_id, korisnik)
+
+@app.delete("/korisnici/{korisnik_id}")
+async def delete_korisnik(korisnik_id: int, db: AsyncSession = Depends(get_db)):
+    return await delete_row(db, Korisnik, korisnik_id)
+
+# LOKACIJE CRUD
+@app.post("/lokacije", response_model=LokacijaResponse)
+async def create_lokacija(lokacija: LokacijaCreate, db: AsyncSession = Depends(get_db)):
+    return await create_row(db, Lokacija, lokacija)
+
+@app.get("/lokacije", response_model=List[LokacijaResponse])
+async def read_lokacije(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+                        cursor: Optional[str] = None, status: Optional[str] = None, tip: Optional[str] = None,
+                        korisnik_id: Optional[int] = None, ids: Optional[str] = None,
+                        expand: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    filters = {"status": status, "tip": tip, "korisnik_id": korisnik_id}
+    return await read_page(db, Lokacija, response, skip, limit, sort, cursor, filters, ids, expand)
+
+@app.get("/lokacije/{lokacija_id}", response_model=LokacijaResponse)
+async def read_lokacija(lokacija_id: int, expand: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    return await read_row(db, Lokacija, lokacija_id, expand)
+
+@app.put("/lokacije/{lokacija_id}", response_model=LokacijaResponse)
+async def update_lokacija(lokacija_id: int, lokacija: LokacijaCreate, db: AsyncSession = Depends(get_db)):
+    return await update_row(db, Lokacija, lokacija_id, lokacija)
+
+@app.delete("/lokacije/{lokacija_id}")
+async def delete_lokacija(lokacija_id: int, db: AsyncSession = Depends(get_db)):
+    return await delete_row(db, Lokacija, lokacija_id)
+
+# VEZE CRUD
+@app.post("/veze", response_model=VezaResponse)
+async def create_veza(veza: VezaCreate, db: AsyncSession = Depends(get_db)):
+    return await create_row(db, Veza, veza)
+
+@app.get("/veze", response_model=List[VezaResponse])
+async def read_veze(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+                    cursor: Optional[str] = None, status: Optional[str] = None, tip: Optional[str] = None,
+                    lokacija_a_id: Optional[int] = None, lokacija_b_id: Optional[int] = None,
+                    ids: Optional[str] = None, expand: Optional[str] = None,
+                    db: AsyncSession = Depends(get_read_db)):
+    filters = {"status": status, "tip": tip, "lokacija_a_id": lokacija_a_id, "lokacija_b_id": lokacija_b_id}
+    return await read_page(db, Veza, response, skip, limit, sort, cursor, filters, ids, expand)
+
+@app.get("/veze/{veza_id}", response_model=VezaResponse)
+async def read_veza(veza_id: int, expand: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    return await read_row(db, Veza, veza_id, expand)
+
+@app.put("/veze/{veza_id}", response_model=VezaResponse)
+async def update_veza(veza_id: int, veza: VezaCreate, db: AsyncSession = Depends(get_db)):
+    return await update_row(db, Veza, veza_id, veza)
+
+@app.delete("/veze/{veza_id}")
+async def delete_veza(veza_id: int, db: AsyncSession = Depends(get_db)):
+    return await delete_row(db, Veza, veza_id)
+
+# OPREMA CRUD
+@app.post("/oprema", response_model=OpremaResponse)
+async def create_oprema(oprema: OpremaCreate, db: AsyncSession = Depends(get_db)):
+    return await create_row(db, Oprema, oprema)
+
+@app.get("/oprema", response_model=List[OpremaResponse])
+async def read_oprema(response: Response, skip: int = 0, limit: int = 100, sort: str = "id",
+                      cursor: Optional[str] = None, status: Optional[str] = None, tip: Optional[str] = None,
+                      lokacija_id: Optional[int] = None, ids: Optional[str] = None,
+                      expand: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    filters = {"status": status, "tip": tip, "lokacija_id": lokacija_id}
+    return await read_page(db, Oprema, response, skip, limit, sort, cursor, filters, ids, expand)
+
+@app.get("/oprema/{oprema_id}", response_model=OpremaResponse)
+async def read_oprema_single(oprema_id: int, expand: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
+    return await read_row(db, Oprema, oprema_id, expand)
+
+@app.put("/oprema/{oprema_id}", response_model=OpremaResponse)
+async def update_oprema(oprema_id: int, oprema: OpremaCreate, db: AsyncSession = Depends(get_db)):
+    return await update_row(db, Oprema, oprema_id, oprema)
+
+@app.delete("/oprema/{oprema_id}")
+async def delete_oprema(oprema_id: int, db: AsyncSession = Depends(get_db)):
+    return await delete_row(db, Oprema, oprema_id)
+
+# STATISTICS ENDPOINT
+@app.get("/stats")
+async def get_statistics(db: AsyncSession = Depends(get_read_db)):
+    return stats_response((await db.execute(select(Brojac).where(Brojac.broj != 0))).scalars())
+
+# BOOTSTRAP
+@app.get("/bootstrap", response_model=BootstrapResponse)
+async def read_bootstrap(limit: int = 100, db: AsyncSession = Depends(get_read_db)):
+    # kao u main.py: sve iz jedne read transakcije
+    payload = {"seq": await db.scalar(select(Verzija.verzija).where(Verzija.tablica == SEQUENCE_ROW)) or 0,
+               "next_cursor": {}}
+    for table, model in CHANGE_MODELS.items():
+        page = Response()
+        stmt = page_statement(model, 0, limit, "id", None, columns=RESPONSE_COLUMNS[model])
+        rows = finish_page((await db.execute(stmt)).all(), page, limit, "id")
+        payload[table] = rows_payload(model, rows)
+        payload["next_cursor"][table] = page.headers.get("x-next-cursor")
+    payload["stats"] = stats_response((await db.execute(select(Brojac).where(Brojac.broj != 0))).scalars())
+    return ORJSONResponse(payload)
+
+# METRIKE
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return Response(metrike.render(), media_type="text/plain; version=0.0.4")
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run("main_async:app", host="0.0.0.0", port=8000, reload=True)
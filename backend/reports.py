@@ -0,0 +1,341 @@
+"""
+Hitronet EMS - izvještaji nad stupčanim snapshotom inventara
+Sve četiri tablice drže se u memoriji po stupcima (NumPy polja), a group-by i
+pivot računaju se vektorski: kodovi grupa se spoje u jedan int64 ključ, a
+brojevi i sume dobiju jednim bincountom.
+
+Tekstualni stupci su rječnički kodirani (kod 0 je NULL), datumi su mjeseci
+(kod 0 je NULL), strani ključevi id-evi (0 je NULL), a brojevi float64 s NaN
+za NULL. Snapshot se puni jednom iz baze i dalje se održava promjenama
+redak po redak, pa izvještaj ne dira SQLite.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import threading
+
+import numpy as np
+
+CATEGORY = "category"
+REF = "ref"
+MONTH = "month"
+NUMBER = "number"
+
+# stupci snapshota po tablici; id se drži uvijek
+TABLES = {
+    "korisnici": {
+        "tip_korisnika": CATEGORY, "paket_usluga": CATEGORY, "status": CATEGORY,
+        "datum_ugovora": MONTH, "created_at": MONTH,
+    },
+    "lokacije": {
+        "tip": CATEGORY, "status": CATEGORY, "korisnik_id": REF, "created_at": MONTH,
+    },
+    "veze": {
+        "tip": CATEGORY, "status": CATEGORY, "lokacija_a_id": REF, "lokacija_b_id": REF,
+        "brzina_mbps": NUMBER, "kapacitet_vlakana": NUMBER, "kapacitet_parica": NUMBER, "created_at": MONTH,
+    },
+    "oprema": {
+        "lokacija_id": REF, "tip": CATEGORY, "proizvodjac": CATEGORY, "model": CATEGORY, "status": CATEGORY,
+        "datum_instalacije": MONTH, "created_at": MONTH,
+    },
+}
+GROUPABLE = (CATEGORY, REF, MONTH)
+DTYPES = {CATEGORY: np.int32, REF: np.int64, MONTH: np.int32, NUMBER: np.float64}
+# do ovoliko mogućih kombinacija grupe se broje gustim bincountom, iznad toga preko np.unique
+DENSE_GROUPS = 1 << 22
+MAX_GROUP_COLUMNS = 4
+INITIAL_CAPACITY = 1024
+
+
+def month_code(value) -> int:
+    """Mjeseci od 0000-01, +1 (0 je NULL); prima datetime ili SQLite tekst ("2024-03-15 ...").
+
+    Baza je godina 0 da i stari datumi (prije 1970.) dobiju pozitivan kod;
+    aggregate() ionako grupira po rasponu kodova, ne od nule.
+    """
+    if value is None or value == "":
+        return 0
+    if isinstance(value, str):
+        year, month = int(value[:4]), int(value[5:7])
+    else:
+        year, month = value.year, value.month
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {value}")
+    return year * 12 + month
+
+
+def month_label(code: int) -> Optional[str]:
+    if code == 0:
+        return None
+    year, month = divmod(code - 1, 12)
+    return f"{year:04d}-{month + 1:02d}"
+
+
+def check_columns(table: str, by: Sequence[str], sums: Sequence[str] = (), filters: Optional[dict] = None,
+                  kinds: Optional[Dict[str, str]] = None):
+    """Baca ValueError ako se kolona ne smije koristiti za grupiranje, sumu ili filter."""
+    kinds = TABLES[table] if kinds is None else kinds
+    for names, allowed, what in ((by, GROUPABLE, "grouping"), (sums, (NUMBER,), "sum"),
+                                 (filters or {}, GROUPABLE, "filtering")):
+        for name in names:
+            if kinds.get(name) not in allowed:
+                raise ValueError(f"Column '{name}' cannot be used for {what} in {table}")
+    if len(by) > MAX_GROUP_COLUMNS:
+        raise ValueError(f"At most {MAX_GROUP_COLUMNS} group columns")
+
+
+class ColumnTable:
+    """Stupci jedne tablice; slot retka se pamti po id-u, obrisani slotovi se ponovno koriste."""
+
+    def __init__(self, name: str, columns: Dict[str, str]):
+        self.name = name
+        self.kinds = dict(columns)
+        self.size = 0
+        self.rows = 0
+        self._slots: Dict[int, int] = {}
+        self._free: List[int] = []
+        self.ids = np.zeros(0, np.int64)
+        self.alive = np.zeros(0, bool)
+        self.data = {name: np.zeros(0, DTYPES[kind]) for name, kind in columns.items()}
+        # rječnici tekstualnih stupaca: kod -> vrijednost i obrnuto
+        self.values = {name: [None] for name, kind in columns.items() if kind == CATEGORY}
+        self.codes = {name: {} for name in self.values}
+
+    def _encode(self, name: str, value):
+        kind = self.kinds[name]
+        if kind == CATEGORY:
+            if value is None:
+                return 0
+            code = self.codes[name].get(value)
+            if code is None:
+                code = len(self.values[name])
+                self.codes[name][value] = code
+                self.values[name].append(value)
+            return code
+        if kind == REF:
+            return value or 0
+        if kind == MONTH:
+            return month_code(value)
+        return np.nan if value is None else value
+
+    def lookup(self, name: str, value) -> int:
+        """Kod vrijednosti filtera iz query stringa, bez dodavanja u rječnik; -1 ako je nema."""
+        kind = self.kinds[name]
+        if kind == CATEGORY:
+            return self.codes[name].get(value, -1)
+        if kind == MONTH:
+            return month_code(value)
+        return int(value)
+
+    def order(self, name: str, codes: np.ndarray) -> np.ndarray:
+        """Ključ za sortiranje kodova; tekstualni kodovi su u redoslijedu dodavanja, pa se rangiraju po vrijednosti."""
+        if self.kinds[name] != CATEGORY:
+            return codes
+        values = self.values[name]
+        ranks = np.empty(len(values), np.int64)
+        ranks[sorted(range(len(values)), key=lambda code: (values[code] is not None, values[code] or ""))] = \
+            np.arange(len(values))
+        return ranks[codes]
+
+    def decode(self, name: str, code: int):
+        kind = self.kinds[name]
+        if kind == CATEGORY:
+            return self.values[name][code]
+        if kind == MONTH:
+            return month_label(code)
+        return code or None
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self.ids):
+            return
+        capacity = max(capacity, 2 * len(self.ids), INITIAL_CAPACITY)
+        self.ids = np.resize(self.ids, capacity)
+        self.alive = np.concatenate([self.alive, np.zeros(capacity - len(self.alive), bool)])
+        for name, column in self.data.items():
+            self.data[name] = np.resize(column, capacity)
+
+    def load(self, rows: Iterable[Sequence]):
+        """Puni tablicu iz (id, stupci...) redaka u redoslijedu self.kinds."""
+        names = list(self.kinds)
+        encoded = [[] for _ in names]
+        ids = []
+        for row in rows:
+            ids.append(row[0])
+            for position, name in enumerate(names):
+                encoded[position].append(self._encode(name, row[position + 1]))
+        n = len(ids)
+        self.ids = np.array(ids, np.int64)
+        self.alive = np.ones(n, bool)
+        for position, name in enumerate(names):
+            self.data[name] = np.array(encoded[position], DTYPES[self.kinds[name]])
+        self._slots = {row_id: slot for slot, row_id in enumerate(ids)}
+        self._free = []
+        self.size = self.rows = n
+
+    def upsert(self, row: dict):
+        slot = self._slots.get(row["id"])
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = self.size
+                self._reserve(slot + 1)
+                self.size += 1
+            self._slots[row["id"]] = slot
+            self.ids[slot] = row["id"]
+            self.alive[slot] = True
+            self.rows += 1
+        for name in self.kinds:
+            self.data[name][slot] = self._encode(name, row[name])
+
+    def remove(self, row_id: int):
+        slot = self._slots.pop(row_id, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self._free.append(slot)
+        self.rows -= 1
+
+
+class Reports:
+    def __init__(self, tables: Dict[str, Dict[str, str]] = TABLES):
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.version = 0
+        self.tables = {name: ColumnTable(name, columns) for name, columns in tables.items()}
+
+    # --- održavanje ---
+
+    def load(self, fetch: Dict[str, Callable[[], Iterable[Sequence]]]):
+        """Puni snapshot iz baze, jednom (do invalidate()); ostali pozivatelji čekaju prvo učitavanje.
+
+        `fetch[tablica]()` vraća (id, stupci...) retke u redoslijedu TABLES.
+        Kasnije promjene dolaze kroz upsert/remove (vidi IndexFeed u main.py).
+        """
+        with self._load_lock:
+            if self.loaded:
+                return
+            fresh = {name: ColumnTable(name, table.kinds) for name, table in self.tables.items()}
+            for name, table in fresh.items():
+                table.load(fetch[name]())
+            with self._lock:
+                self.tables = fresh
+                self.version += 1
+                self.loaded = True
+
+    def invalidate(self):
+        """Sljedeći load() gradi indeks iznova (npr. kad je u bazi previše promjena za dostizanje)."""
+        with self._load_lock:
+            self.loaded = False
+
+    def upsert(self, table: str, row: dict):
+        """Novi ili promijenjeni redak, sa svim kolonama tablice."""
+        with self._lock:
+            self.tables[table].upsert(row)
+            self.version += 1
+
+    def remove(self, table: str, row_id: int):
+        with self._lock:
+            self.tables[table].remove(row_id)
+            self.version += 1
+
+    # --- upiti ---
+
+    def _select(self, table: str, by: Sequence[str], sums: Sequence[str], filters: Optional[dict]):
+        """Pod lockom kopira kodove grupa i vrijednosti za sume za retke koji prolaze filtere."""
+        check_columns(table, by, sums, filters, self.tables[table].kinds)
+        data = self.tables[table]
+        mask = data.alive[:data.size].copy()
+        for name, value in (filters or {}).items():
+            mask &= data.data[name][:data.size] == data.lookup(name, value)
+        rows = np.flatnonzero(mask)
+        keys = [data.data[name][rows].astype(np.int64) for name in by]
+        values = [np.nan_to_num(data.data[name][rows]) for name in sums]
+        return data, len(rows), keys, values
+
+    def aggregate(self, table: str, by: Sequence[str], sums: Sequence[str] = (), filters: Optional[dict] = None):
+        """Grupira retke po `by` i vraća (kodovi po stupcu, broj, sume po stupcu) za neprazne grupe."""
+        with self._lock:
+            data, selected, keys, values = self._select(table, by, sums, filters)
+        # ključevi se pomiču na najmanji prisutni kod, pa gusti bincount ne ovisi o bazi kodova
+        lows = [int(key.min()) if selected else 0 for key in keys]
+        radices = [int(key.max()) - low + 1 if selected else 1 for key, low in zip(keys, lows)]
+        groups = 1
+        for radix in radices:
+            groups *= radix
+        if groups >= 1 << 62:
+            raise ValueError("Too many group combinations")
+
+        # bez `by` svi odabrani retci padaju u jednu grupu s ključem 0
+        combined = np.zeros(selected, np.int64)
+        for key, low, radix in zip(keys, lows, radices):
+            combined = combined * radix + (key - low)
+        if groups <= DENSE_GROUPS:
+            counts = np.bincount(combined, minlength=groups)
+            present = np.flatnonzero(counts)
+            counts = counts[present]
+            totals = [np.bincount(combined, weights=value, minlength=groups)[present] for value in values]
+        else:
+            present, inverse = np.unique(combined, return_inverse=True)
+            counts = np.bincount(inverse)
+            totals = [np.bincount(inverse, weights=value) for value in values]
+
+        codes = []
+        for low, radix in zip(reversed(lows), reversed(radices)):
+            codes.append(present % radix + low)
+            present = present // radix
+        return data, codes[::-1], counts, totals
+
+    def group(self, table: str, by: Sequence[str], sums: Sequence[str] = (), filters: Optional[dict] = None,
+              sort: str = "count", limit: int = 1000) -> dict:
+        """Redak po grupi s brojem redaka i sumama, sortirano po broju (silazno) ili po ključu."""
+        data, codes, counts, totals = self.aggregate(table, by, sums, filters)
+        keys = [data.order(name, code) for name, code in zip(by, codes)][::-1]
+        order = np.lexsort((*keys, -counts) if sort == "count" else (*keys, np.zeros(len(counts))))
+        order = order[:limit]
+        # dekodira se samo ono što ide u odgovor, preko Python listi umjesto numpy skalara
+        columns = [(name, code[order].tolist()) for name, code in zip(by, codes)]
+        columns += [(f"sum_{name}", [_number(value) for value in total[order].tolist()]) for name, total in zip(sums, totals)]
+        rows = []
+        for position, count in enumerate(counts[order].tolist()):
+            row = {name: data.decode(name, values[position]) for name, values in columns[:len(by)]}
+            row["count"] = count
+            for name, values in columns[len(by):]:
+                row[name] = values[position]
+            rows.append(row)
+        return {"entitet": table, "by": list(by), "groups": len(counts), "truncated": len(counts) > limit,
+                "rows": rows}
+
+    def pivot(self, table: str, rows: str, columns: str, value: Optional[str] = None,
+              filters: Optional[dict] = None, limit: int = 1000) -> dict:
+        """Matrica `rows` x `columns` s brojem redaka ili sumom stupca `value`; retci sortirani po ključu."""
+        sums = [value] if value else []
+        data, codes, counts, totals = self.aggregate(table, [rows, columns], sums, filters)
+        cells = totals[0] if value else counts
+        row_codes, row_index = _unique_sorted(data, rows, codes[0])
+        column_codes, column_index = _unique_sorted(data, columns, codes[1])
+        matrix = np.zeros((len(row_codes), len(column_codes)), np.float64 if value else np.int64)
+        matrix[row_index, column_index] = cells
+        kept = matrix[:limit]
+        return {
+            "entitet": table,
+            "rows": [data.decode(rows, int(code)) for code in row_codes[:limit].tolist()],
+            "columns": [data.decode(columns, int(code)) for code in column_codes.tolist()],
+            "value": f"sum_{value}" if value else "count",
+            "values": [[_number(cell) for cell in line] for line in kept.tolist()],
+            "truncated": len(row_codes) > limit,
+        }
+
+
+def _unique_sorted(data: ColumnTable, name: str, codes: np.ndarray):
+    """Različiti kodovi u redoslijedu vrijednosti i indeks svakog koda među njima."""
+    unique, inverse = np.unique(codes, return_inverse=True)
+    order = np.argsort(data.order(name, unique), kind="stable")
+    position = np.empty(len(order), np.int64)
+    position[order] = np.arange(len(order))
+    return unique[order], position[inverse]
+
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
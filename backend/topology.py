@@ -0,0 +1,320 @@
+"""
+Hitronet EMS - topologija mreže
+Graf lokacija (čvorovi) i veza (bridovi) u memoriji, u CSR obliku nad `array` poljima.
+
+CSR se gradi jednom; promjene veza idu u mali overlay (dodani bridovi i skup
+zastarjelih id-eva) pa se graf ne gradi iznova za svaki zahtjev. Kad overlay
+naraste, CSR se kompaktira.
+"""
+
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+import heapq
+import threading
+
+# Samo aktivne veze prenose promet; planirane i u kvaru se preskaču
+ACTIVE_STATUSES = frozenset({"aktivan"})
+# Ako overlay naraste iznad ovog udjela CSR-a, graf se kompaktira
+COMPACT_RATIO = 0.1
+
+
+class Edge(NamedTuple):
+    id: int
+    a: int
+    b: int
+    brzina_mbps: Optional[int]
+    status: Optional[str]
+    redundantna_veza_id: Optional[int]
+
+
+class Node(NamedTuple):
+    id: int
+    tip: Optional[str]
+    status: Optional[str]
+    korisnik_id: Optional[int]
+
+
+class Path(NamedTuple):
+    lokacije: List[int]
+    veze: List[int]
+    cost: float
+
+
+def edge_weight(edge: Edge, weight: str) -> float:
+    if weight == "hops":
+        return 1.0
+    # inverzna propusnost u Gbps; veza bez podatka o brzini tretira se kao 1 Mbps
+    return 1000.0 / (edge.brzina_mbps or 1)
+
+
+class Topology:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+        self.version = 0
+        self.edges: Dict[int, Edge] = {}
+        # atributi lokacija; graf ih ne treba, ali ih koristi analiza utjecaja kvarova
+        self.nodes: Dict[int, Node] = {}
+        self._node_index: Dict[int, int] = {}
+        self._node_ids = array("q")
+        # CSR: susjedi čvora i su targets[offsets[i]:offsets[i + 1]]
+        self._offsets = array("q", [0])
+        self._targets = array("q")
+        self._edge_ids = array("q")
+        # overlay promjena od zadnjeg kompaktiranja
+        self._stale = set()
+        self._extra: Dict[int, List[tuple]] = {}
+        self._extra_count = 0
+        self._components = None
+
+    # --- održavanje ---
+
+    def load(self, fetch_edges: Callable[[], Iterable[Edge]], fetch_nodes: Callable[[], Iterable[Node]] = tuple):
+        """Gradi graf iz baze, jednom (do invalidate()); ostali pozivatelji čekaju prvo učitavanje.
+
+        Kasnije promjene dolaze kroz upsert/remove (vidi IndexFeed u main.py).
+        """
+        with self._load_lock:
+            if self.loaded:
+                return
+            edges = list(fetch_edges())
+            nodes = list(fetch_nodes())
+            with self._lock:
+                self.edges = {e.id: e for e in edges}
+                self.nodes = {n.id: n for n in nodes}
+                self._rebuild()
+                self.version += 1
+                self.loaded = True
+
+    def invalidate(self):
+        """Sljedeći load() gradi indeks iznova (npr. kad je u bazi previše promjena za dostizanje)."""
+        with self._load_lock:
+            self.loaded = False
+
+    def upsert_node(self, node: Node):
+        with self._lock:
+            if node.id not in self.nodes:
+                self._components = None
+            self.nodes[node.id] = node
+            self.version += 1
+
+    def remove_node(self, lokacija_id: int):
+        with self._lock:
+            if self.nodes.pop(lokacija_id, None) is not None:
+                self._components = None
+                self.version += 1
+
+    def upsert(self, edge: Edge):
+        with self._lock:
+            old = self.edges.get(edge.id)
+            self.edges[edge.id] = edge
+            if old is None or (old.a, old.b) != (edge.a, edge.b):
+                # krajnje točke su u CSR-u; status i brzinu čitamo iz self.edges
+                if old is not None:
+                    self._drop_from_overlay(old)
+                self._stale.add(edge.id)
+                self._add_to_overlay(edge)
+            self._changed()
+
+    def remove(self, edge_id: int):
+        with self._lock:
+            old = self.edges.pop(edge_id, None)
+            if old is None:
+                return
+            self._drop_from_overlay(old)
+            self._stale.add(edge_id)
+            self._changed()
+
+    def _changed(self):
+        self.version += 1
+        self._components = None
+        if self._extra_count + len(self._stale) > max(1024, COMPACT_RATIO * len(self._targets)):
+            self._rebuild()
+
+    def _node(self, lokacija_id: int) -> int:
+        index = self._node_index.get(lokacija_id)
+        if index is None:
+            index = len(self._node_ids)
+            self._node_index[lokacija_id] = index
+            self._node_ids.append(lokacija_id)
+        return index
+
+    def _add_to_overlay(self, edge: Edge):
+        a, b = self._node(edge.a), self._node(edge.b)
+        self._extra.setdefault(a, []).append((b, edge.id))
+        self._extra.setdefault(b, []).append((a, edge.id))
+        self._extra_count += 2
+
+    def _drop_from_overlay(self, edge: Edge):
+        for node in (self._node_index.get(edge.a), self._node_index.get(edge.b)):
+            entries = self._extra.get(node)
+            if entries:
+                kept = [entry for entry in entries if entry[1] != edge.id]
+                self._extra_count -= len(entries) - len(kept)
+                self._extra[node] = kept
+
+    def _rebuild(self):
+        self._node_index = {}
+        self._node_ids = array("q")
+        for edge in self.edges.values():
+            self._node(edge.a)
+            self._node(edge.b)
+        n = len(self._node_ids)
+        degree = array("q", bytes(8 * (n + 1)))
+        for edge in self.edges.values():
+            degree[self._node_index[edge.a] + 1] += 1
+            degree[self._node_index[edge.b] + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+        offsets = degree
+        fill = array("q", offsets[:n])
+        targets = array("q", bytes(8 * offsets[n]))
+        edge_ids = array("q", bytes(8 * offsets[n]))
+        for edge in self.edges.values():
+            a, b = self._node_index[edge.a], self._node_index[edge.b]
+            targets[fill[a]], edge_ids[fill[a]] = b, edge.id
+            fill[a] += 1
+            targets[fill[b]], edge_ids[fill[b]] = a, edge.id
+            fill[b] += 1
+        self._offsets, self._targets, self._edge_ids = offsets, targets, edge_ids
+        self._stale = set()
+        self._extra = {}
+        self._extra_count = 0
+        self._components = None
+
+    # --- upiti ---
+
+    def _neighbors(self, node: int, statuses) -> List[tuple]:
+        """(susjed, veza_id) za sve bridove čvora čiji je status u `statuses` (None = svi)."""
+        edges = self.edges
+        result = []
+        if node + 1 < len(self._offsets):
+            stale, targets, edge_ids = self._stale, self._targets, self._edge_ids
+            for i in range(self._offsets[node], self._offsets[node + 1]):
+                edge_id = edge_ids[i]
+                if edge_id not in stale and (statuses is None or edges[edge_id].status in statuses):
+                    result.append((targets[i], edge_id))
+        for target, edge_id in self._extra.get(node, ()):
+            if statuses is None or edges[edge_id].status in statuses:
+                result.append((target, edge_id))
+        return result
+
+    def shortest_path(self, source: int, target: int, weight: str = "hops",
+                      statuses=ACTIVE_STATUSES) -> Optional[Path]:
+        """Najkraći put između dvije lokacije; None ako put ne postoji.
+
+        `hops` koristi dvosmjerni BFS, `bandwidth` dvosmjernu Dijkstru s
+        težinom 1/brzina_mbps; obje pretražuju od oba kraja pa obilaze tek
+        mali dio grafa.
+        """
+        with self._lock:
+            if source == target and source in self.nodes:
+                return Path([source], [], 0.0)
+            if source not in self._node_index or target not in self._node_index:
+                return None
+            s, t = self._node_index[source], self._node_index[target]
+            if s == t:
+                return Path([source], [], 0.0)
+            if weight == "hops":
+                return self._bfs_path(s, t, statuses)
+            return self._dijkstra_path(s, t, statuses, weight)
+
+    def _bfs_path(self, s: int, t: int, statuses) -> Optional[Path]:
+        # roditelj svakog posjećenog čvora s obje strane: čvor -> (prethodnik, veza)
+        parents = ({s: None}, {t: None})
+        frontiers = (deque([s]), deque([t]))
+        while frontiers[0] and frontiers[1]:
+            # širi manju frontu
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            frontier, seen, other = frontiers[side], parents[side], parents[1 - side]
+            for _ in range(len(frontier)):
+                node = frontier.popleft()
+                for neighbor, edge_id in self._neighbors(node, statuses):
+                    if neighbor in seen:
+                        continue
+                    seen[neighbor] = (node, edge_id)
+                    if neighbor in other:
+                        return self._join(neighbor, parents[0], parents[1])
+                    frontier.append(neighbor)
+        return None
+
+    def _join(self, meet: int, forward: dict, backward: dict) -> Path:
+        nodes, edge_ids = [meet], []
+        node = meet
+        while forward[node] is not None:
+            node, edge_id = forward[node]
+            nodes.append(node)
+            edge_ids.append(edge_id)
+        nodes.reverse()
+        edge_ids.reverse()
+        node = meet
+        while backward[node] is not None:
+            node, edge_id = backward[node]
+            nodes.append(node)
+            edge_ids.append(edge_id)
+        return Path([self._node_ids[n] for n in nodes], edge_ids, float(len(edge_ids)))
+
+    def _dijkstra_path(self, s: int, t: int, statuses, weight: str) -> Optional[Path]:
+        inf = float("inf")
+        edges = self.edges
+        dist = ({s: 0.0}, {t: 0.0})
+        parents = ({s: None}, {t: None})
+        heaps = ([(0.0, s)], [(0.0, t)])
+        settled = (set(), set())
+        best, meet = inf, None
+        while heaps[0] and heaps[1]:
+            # nijedan kraći put više ne može proći kroz neobrađene čvorove
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            d, node = heapq.heappop(heaps[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+            own, other, parent = dist[side], dist[1 - side], parents[side]
+            for neighbor, edge_id in self._neighbors(node, statuses):
+                nd = d + edge_weight(edges[edge_id], weight)
+                if nd < own.get(neighbor, inf):
+                    own[neighbor] = nd
+                    parent[neighbor] = (node, edge_id)
+                    heapq.heappush(heaps[side], (nd, neighbor))
+                    if neighbor in other and nd + other[neighbor] < best:
+                        best, meet = nd + other[neighbor], neighbor
+        if meet is None:
+            return None
+        path = self._join(meet, parents[0], parents[1])
+        return Path(path.lokacije, path.veze, best)
+
+    def components(self, statuses=ACTIVE_STATUSES) -> List[List[int]]:
+        """Povezane komponente (liste id-eva lokacija), od najveće prema najmanjoj.
+
+        Obuhvaća sve lokacije, i one bez ijedne veze (kao komponente od jedne
+        lokacije), neovisno o tome kad je graf zadnji put kompaktiran.
+        """
+        with self._lock:
+            if statuses == ACTIVE_STATUSES and self._components is not None:
+                return self._components
+            parent = {lokacija_id: lokacija_id for lokacija_id in self.nodes}
+
+            def find(x):
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                return x
+
+            for edge in self.edges.values():
+                if statuses is None or edge.status in statuses:
+                    parent.setdefault(edge.a, edge.a)
+                    parent.setdefault(edge.b, edge.b)
+                    ra, rb = find(edge.a), find(edge.b)
+                    if ra != rb:
+                        parent[ra] = rb
+            groups: Dict[int, List[int]] = {}
+            for lokacija_id in parent:
+                groups.setdefault(find(lokacija_id), []).append(lokacija_id)
+            result = sorted((sorted(g) for g in groups.values()), key=lambda g: (-len(g), g[0]))
+            if statuses == ACTIVE_STATUSES:
+                self._components = result
+            return result
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Container,
   Paper,
@@ -57,6 +57,8 @@ function App() {
   const [currentItem, setCurrentItem] = useState({});
   const [currentEntity, setCurrentEntity] = useState('korisnici');
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'success' });
+  // Pozicija u slijedu promjena (/changes) do koje su lokalni podaci ažurni
+  const seqRef = useRef(null);
 
   // Fetch data
   const fetchData = async (entity) => {
@@ -70,6 +72,40 @@ function App() {
     }
   };
 
+  // Primijeni promjene s /changes na lokalne liste
+  const applyChanges = (result) => {
+    setData(prev => {
+      const next = { ...prev };
+      Object.keys(prev).forEach(entity => {
+        const changed = result[entity] || [];
+        const deleted = new Set(result.obrisano[entity] || []);
+        if (!changed.length && !deleted.size) return;
+        const byId = new Map(changed.map(row => [row.id, row]));
+        const existing = new Set(prev[entity].map(row => row.id));
+        next[entity] = prev[entity]
+          .filter(row => !deleted.has(row.id))
+          .map(row => byId.get(row.id) || row)
+          .concat(changed.filter(row => !existing.has(row.id)));
+      });
+      return next;
+    });
+  };
+
+  // Dohvati samo promjene od zadnje sinkronizacije umjesto cijelih lista
+  const syncChanges = async () => {
+    try {
+      let result;
+      do {
+        const response = await fetch(`${API_BASE}/changes?since=${seqRef.current}`);
+        result = await response.json();
+        applyChanges(result);
+        seqRef.current = result.seq;
+      } while (result.more);
+    } catch (error) {
+      console.error('Error syncing changes:', error);
+    }
+  };
+
   const fetchStats = async () => {
     try {
       const response = await fetch(`${API_BASE}/stats`);
@@ -81,13 +117,36 @@ function App() {
   };
 
   useEffect(() => {
-    fetchData('korisnici');
-    fetchData('lokacije');
-    fetchData('veze');
-    fetchData('oprema');
-    fetchStats();
+    const load = async () => {
+      // liste, statistika i pozicija u slijedu u jednom zahtjevu (isti snapshot)
+      try {
+        const response = await fetch(`${API_BASE}/bootstrap`);
+        const result = await response.json();
+        setData({
+          korisnici: result.korisnici,
+          lokacije: result.lokacije,
+          veze: result.veze,
+          oprema: result.oprema,
+        });
+        setStats(result.stats);
+        seqRef.current = result.seq;
+      } catch (error) {
+        console.error('Error fetching bootstrap:', error);
+        showSnackbar('Greška pri dohvaćanju podataka', 'error');
+      }
+    };
+    load();
   }, []);
 
+  const refreshAfterWrite = (entity) => {
+    if (seqRef.current === null) {
+      fetchData(entity);
+    } else {
+      syncChanges();
+    }
+    fetchStats();
+  };
+
   const showSnackbar = (message, severity = 'success') => {
     setSnackbar({ open: true, message, severity });
   };
@@ -183,7 +242,7 @@ function App() {
       });
 
       if (response.ok) {
-        fetchData(currentEntity);
+        refreshAfterWrite(currentEntity);
         handleClose();
         showSnackbar(editMode ? 'Uspješno ažurirano!' : 'Uspješno dodano!');
       } else {
@@ -204,7 +263,7 @@ function App() {
       });
 
       if (response.ok) {
-        fetchData(entity);
+        refreshAfterWrite(entity);
         showSnackbar('Uspješno obrisano!');
       } else {
         throw new Error('Greška pri brisanju');